@@ -0,0 +1,61 @@
+"""
+Mide lo que añade ``batch_analyze(aspects=True)`` al análisis con el motor léxico.
+
+Las columnas de aspectos salen de los mismos códigos de token que la
+polaridad global, así que solo se paga el reparto de valoraciones y palabras
+clave entre menciones. El corpus sintético menciona algún aspecto en casi
+todas las frases, así que es el peor caso. El objetivo es que el coste extra
+no pase de ``MAX_OVERHEAD`` (20 %) del análisis base.
+
+Uso:
+    python -m benchmarks.bench_aspects --rows 200000
+"""
+import argparse
+import time
+
+from benchmarks.corpus import make_corpus
+from src.sentiment_model import batch_analyze
+
+MAX_OVERHEAD = 0.20
+
+
+def best_times(df, repeats):
+    """
+    El mejor de ``repeats`` análisis completos con y sin aspectos, alternados
+    para que los dos encuentren la misma caché de tokens.
+    """
+    best = {False: float('inf'), True: float('inf')}
+    results = {}
+    for _ in range(repeats):
+        for aspects in best:
+            start = time.perf_counter()
+            results[aspects] = batch_analyze(df, engine='lexicon', aspects=aspects)
+            best[aspects] = min(best[aspects], time.perf_counter() - start)
+    return best[False], best[True], results[False], results[True]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    df = make_corpus(args.rows)
+    batch_analyze(df.head(100), engine='lexicon', aspects=True)  # Carga del léxico fuera de la medida
+    base, with_aspects, expected, result = best_times(df, args.repeats)
+    assert result['polarity'].equals(expected['polarity'])
+
+    overhead = with_aspects / base - 1
+    aspect_columns = [column for column in result if column.startswith('aspect_')]
+    mentioned = result[aspect_columns].notna().mean()
+    print(f"{args.rows:,} reseñas, mejor de {args.repeats}")
+    print(f"{'batch_analyze':<28} {base:>8.2f} s {args.rows / base:>12,.0f} filas/s")
+    print(f"{'batch_analyze(aspects=True)':<28} {with_aspects:>8.2f} s {args.rows / with_aspects:>12,.0f} filas/s")
+    print("Reseñas que mencionan cada aspecto: "
+          + ', '.join(f"{column[len('aspect_'):]} {share:.0%}" for column, share in mentioned.items()))
+    verdict = 'dentro' if overhead <= MAX_OVERHEAD else 'FUERA'
+    print(f"Coste extra: {overhead:.1%} ({verdict} del objetivo del {MAX_OVERHEAD:.0%})")
+
+
+if __name__ == '__main__':
+    main()
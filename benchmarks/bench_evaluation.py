@@ -0,0 +1,86 @@
+"""
+Compara las métricas por máscaras booleanas con la matriz de confusión acumulada.
+
+Genera etiquetas reales y predichas al azar (sin analizar texto) y mide el
+cálculo clásico, una pasada de máscaras por clase sobre todo el DataFrame,
+frente a ``EvaluationMetrics`` alimentado por trozos.
+
+Uso:
+    python -m benchmarks.bench_evaluation --rows 10000000 --chunksize 1000000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.evaluation import EvaluationMetrics
+from src.sentiment_model import SENTIMENT_LABELS
+
+
+def make_labels(n_rows, seed=0):
+    """Etiquetas reales y predichas que aciertan un 80 % de las veces."""
+    rng = np.random.default_rng(seed)
+    labels = np.array(SENTIMENT_LABELS, dtype=object)
+    true = rng.integers(0, len(labels), n_rows)
+    predicted = np.where(rng.random(n_rows) < 0.8, true, rng.integers(0, len(labels), n_rows))
+    return pd.DataFrame({'true_sentiment': labels[true], 'sentiment': labels[predicted]})
+
+
+def mask_metrics(df):
+    """El cálculo por máscaras que hacía ``evaluate_model``."""
+    metrics = {'accuracy': (df['sentiment'] == df['true_sentiment']).mean()}
+    for sentiment in SENTIMENT_LABELS:
+        tp = ((df['true_sentiment'] == sentiment) & (df['sentiment'] == sentiment)).sum()
+        fp = ((df['true_sentiment'] != sentiment) & (df['sentiment'] == sentiment)).sum()
+        fn = ((df['true_sentiment'] == sentiment) & (df['sentiment'] != sentiment)).sum()
+        precision = tp / (tp + fp) if tp + fp else 0
+        recall = tp / (tp + fn) if tp + fn else 0
+        metrics[sentiment] = 2 * precision * recall / (precision + recall) if precision + recall else 0
+    return metrics
+
+
+def evaluate_by_chunks(df, chunksize):
+    evaluation = EvaluationMetrics()
+    for i in range(0, len(df), chunksize):
+        chunk = df.iloc[i:i + chunksize]
+        evaluation.update(chunk['true_sentiment'], chunk['sentiment'])
+    return evaluation
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=10_000_000)
+    parser.add_argument('--chunksize', type=int, default=1_000_000)
+    parser.add_argument('--bootstrap', type=int, default=1000)
+    args = parser.parse_args()
+
+    df = make_labels(args.rows)
+    start = time.perf_counter()
+    expected = mask_metrics(df)
+    masks = time.perf_counter() - start
+
+    start = time.perf_counter()
+    evaluation = evaluate_by_chunks(df, args.chunksize)
+    confusion = time.perf_counter() - start
+    assert abs(evaluation.accuracy - expected['accuracy']) < 1e-12
+
+    # Con etiquetas categóricas no hay que comparar texto: solo se traducen las categorías
+    df = df.astype('category')
+    start = time.perf_counter()
+    evaluate_by_chunks(df, args.chunksize)
+    categorical = time.perf_counter() - start
+
+    start = time.perf_counter()
+    evaluation.bootstrap(args.bootstrap)
+    bootstrap = time.perf_counter() - start
+
+    print(f"{args.rows:,} reseñas etiquetadas, trozos de {args.chunksize:,}")
+    print(f"{'máscaras por clase':<28} {masks:>8.2f} s {args.rows / masks:>14,.0f} filas/s")
+    print(f"{'matriz de confusión':<28} {confusion:>8.2f} s {args.rows / confusion:>14,.0f} filas/s")
+    print(f"{'matriz (categóricas)':<28} {categorical:>8.2f} s {args.rows / categorical:>14,.0f} filas/s")
+    print(f"{f'bootstrap ({args.bootstrap} remuestreos)':<28} {bootstrap:>8.2f} s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Compara TextBlob, el motor de léxico y el modelo de rasgos hasheados.
+
+El modelo hasheado se entrena (por destilación del motor de léxico, salvo que
+se indique ``--model``) sobre un corpus sintético, y después los tres motores
+puntúan el mismo corpus. Se mide el rendimiento en reseñas/s, el acuerdo con el
+motor de léxico y la exactitud sobre las reseñas etiquetadas de ejemplo.
+
+Uso:
+    python -m benchmarks.bench_hashing --rows 200000
+    python -m benchmarks.bench_hashing --model hashing.npz --save resultados.json
+"""
+import argparse
+import json
+import time
+
+from benchmarks.corpus import make_corpus
+from src.hashing_model import HashingSentimentModel
+from src.sentiment_model import ENGINES, score_texts, use_hashing_model
+from tests.evaluate_model import load_sample_reviews
+
+# TextBlob es unas 50 veces más lento: se mide sobre una muestra
+TEXTBLOB_SAMPLE = 20_000
+
+
+def train_distilled(texts, chunksize=50_000, epochs=2):
+    """Entrena el modelo hasheado imitando las etiquetas del motor de léxico."""
+    model = HashingSentimentModel()
+    labels = score_texts(texts, 'lexicon')[1]
+    for _ in range(epochs):
+        for start in range(0, len(texts), chunksize):
+            model.partial_fit(texts[start:start + chunksize], labels[start:start + chunksize])
+    return model
+
+
+def measure(engine, texts):
+    start = time.perf_counter()
+    _, sentiments = score_texts(texts, engine)
+    return sentiments, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--train-rows', type=int, default=200_000)
+    parser.add_argument('--model', help="Modelo .npz ya entrenado (si no, se entrena aquí)")
+    parser.add_argument('--save', help="Guarda los resultados en JSON")
+    args = parser.parse_args()
+
+    if args.model:
+        model = HashingSentimentModel.load(args.model)
+    else:
+        train = make_corpus(args.train_rows, seed=1)['review'].tolist()
+        start = time.perf_counter()
+        model = train_distilled(train)
+        print(f"Entrenado con {len(train):,} reseñas en {time.perf_counter() - start:.1f} s")
+    use_hashing_model(model)
+
+    texts = make_corpus(args.rows)['review'].tolist()
+    labeled = load_sample_reviews()
+    reference, _ = measure('lexicon', texts)
+    results = {}
+    print(f"{'motor':>10} {'filas':>10} {'filas/s':>12} {'acuerdo':>9} {'exactitud':>10}")
+    for engine in ENGINES:
+        sample = texts[:TEXTBLOB_SAMPLE] if engine == 'textblob' else texts
+        sentiments, elapsed = measure(engine, sample)
+        agreement = float((sentiments == reference[:len(sample)]).mean())
+        accuracy = float((score_texts(labeled['review'], engine)[1] == labeled['true_sentiment']).mean())
+        results[engine] = {'rows': len(sample), 'rows_per_s': len(sample) / elapsed,
+                           'agreement_with_lexicon': agreement, 'accuracy': accuracy}
+        print(f"{engine:>10} {len(sample):>10,} {len(sample) / elapsed:>12,.0f} "
+              f"{agreement:>9.1%} {accuracy:>10.1%}")
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as handle:
+            json.dump(results, handle, indent=2)
+
+
+if __name__ == '__main__':
+    main()
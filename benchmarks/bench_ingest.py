@@ -0,0 +1,96 @@
+"""
+Compara la lectura por ``mmap`` de ``iter_text_batches`` con pandas y json.loads.
+
+Escribe el mismo corpus sintético como CSV y como JSONL, con algunos campos
+además de la reseña, y mide cuánto se tarda en tener todos los textos en
+memoria. Como referencia, también mide el análisis de esos textos con el
+motor léxico, para ver qué parte del total es la lectura.
+
+Uso:
+    python -m benchmarks.bench_ingest --rows 1000000
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.corpus import make_corpus
+from src.data_loader import iter_text_batches
+from src.sentiment_model import score_texts
+
+
+def make_export(n_rows, seed=0):
+    """El corpus con los campos que suele traer una exportación de reseñas."""
+    df = make_corpus(n_rows, seed)
+    df.insert(0, 'id', range(n_rows))
+    df.insert(1, 'hotel', [f'Hotel {i % 977}' for i in range(n_rows)])
+    df.insert(2, 'date', pd.date_range('2020-01-01', periods=n_rows, freq='min').strftime('%Y-%m-%d %H:%M'))
+    df.insert(3, 'rating', [i % 5 + 1 for i in range(n_rows)])
+    return df
+
+
+def write_jsonl(df, path):
+    with open(path, 'w', encoding='utf-8') as handle:
+        for record in df.to_dict('records'):
+            handle.write(json.dumps(record) + '\n')
+
+
+def read_csv_full(path):
+    return pd.read_csv(path)['review'].fillna('').tolist()
+
+
+def read_csv_column(path):
+    return pd.read_csv(path, usecols=['review'])['review'].fillna('').tolist()
+
+
+def json_loads_lines(path):
+    with open(path, 'rb') as handle:
+        return [json.loads(line)['review'] for line in handle]
+
+
+def mmap_batches(path):
+    return [text for batch in iter_text_batches(path, 'review') for text in batch]
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    df = make_export(args.rows)
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path, jsonl_path = os.path.join(tmp, 'reviews.csv'), os.path.join(tmp, 'reviews.jsonl')
+        df.to_csv(csv_path, index=False)
+        write_jsonl(df, jsonl_path)
+        cases = [
+            ('csv', csv_path, 'pd.read_csv', read_csv_full),
+            ('csv', csv_path, 'pd.read_csv(usecols)', read_csv_column),
+            ('csv', csv_path, 'iter_text_batches', mmap_batches),
+            ('jsonl', jsonl_path, 'json.loads por línea', json_loads_lines),
+            ('jsonl', jsonl_path, 'iter_text_batches', mmap_batches),
+        ]
+        print(f"{args.rows:,} reseñas; CSV {os.path.getsize(csv_path) / 2 ** 20:.0f} MB, "
+              f"JSONL {os.path.getsize(jsonl_path) / 2 ** 20:.0f} MB")
+        print(f"{'formato':<7} {'lector':<22} {'segundos':>9} {'MB/s':>8} {'filas/s':>12}")
+        expected = df['review'].tolist()
+        for file_format, path, name, reader in cases:
+            seconds, texts = timed(reader, path)
+            assert texts == expected, name
+            megabytes = os.path.getsize(path) / 2 ** 20
+            print(f"{file_format:<7} {name:<22} {seconds:>9.2f} {megabytes / seconds:>8.0f} "
+                  f"{len(texts) / seconds:>12,.0f}")
+        seconds, _ = timed(score_texts, expected, 'lexicon')
+        print(f"Análisis con el motor léxico: {seconds:.2f} s ({len(expected) / seconds:,.0f} filas/s)")
+
+
+if __name__ == '__main__':
+    main()
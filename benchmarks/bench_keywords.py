@@ -0,0 +1,70 @@
+"""
+Compara el autómata de palabras clave con la intersección de sets original.
+
+Uso:
+    python -m benchmarks.bench_keywords --rows 20000
+"""
+import argparse
+import random
+import string
+import time
+
+from benchmarks.corpus import make_corpus
+from src.keyword_matcher import KeywordMatcher
+from src.sentiment_model import (
+    HOTEL_NEGATIVE_KEYWORDS, HOTEL_POSITIVE_KEYWORDS, NEGATION_WORDS, preprocess_text,
+)
+
+LEXICON_SIZES = (20, 2_000, 20_000)
+
+
+def synthetic_lexicon(size, seed=0):
+    """Léxico de ``size`` entradas: las reales y el resto inventadas, un 30 % frases."""
+    rng = random.Random(seed)
+    real = sorted(HOTEL_POSITIVE_KEYWORDS | HOTEL_NEGATIVE_KEYWORDS)[:size]
+    entries = set(real)
+    while len(entries) < size:
+        words = [''.join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 9)))
+                 for _ in range(rng.choice((1, 1, 1, 2, 3)))]
+        entries.add(' '.join(words))
+    entries = sorted(entries)
+    return set(entries[::2]), set(entries[1::2])
+
+
+def set_intersection(texts, positive, negative):
+    """El camino original: solo palabras sueltas separadas por espacios."""
+    for text in texts:
+        words = set(text.split())
+        words.intersection(positive)
+        words.intersection(negative)
+
+
+def automaton(texts, matcher):
+    for text in texts:
+        matcher.match(text)
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=20_000)
+    args = parser.parse_args()
+
+    texts = [preprocess_text(t) for t in make_corpus(args.rows)['review']]
+    print(f"{args.rows} reseñas; microsegundos por reseña")
+    print(f"{'entradas':>9} {'estados':>9} {'sets':>8} {'autómata':>9}")
+    for size in LEXICON_SIZES:
+        positive, negative = synthetic_lexicon(size)
+        matcher = KeywordMatcher(positive, negative, NEGATION_WORDS)
+        sets = timed(set_intersection, texts, positive, negative)
+        compiled = timed(automaton, texts, matcher)
+        print(f"{size:>9,} {len(matcher):>9,} {sets / args.rows * 1e6:>8.2f} {compiled / args.rows * 1e6:>9.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Compara la normalización con tablas de traducción con la de ``lower`` más regex.
+
+Mide el coste por reseña de la implementación anterior de ``preprocess_text``,
+de la nueva reseña a reseña y de la versión por lotes (``preprocess_texts``),
+sobre el corpus sintético en inglés (solo ASCII) y sobre una variante con
+palabras en español acentuadas, que es el camino lento de la nueva.
+
+Uso:
+    python -m benchmarks.bench_normalize --rows 200000
+"""
+import argparse
+import re
+import time
+
+from benchmarks.corpus import make_corpus
+from src.sentiment_model import preprocess_text, preprocess_texts
+
+# Palabras del corpus que se cambian por su equivalente en español
+SPANISH = {
+    'room': 'habitación', 'staff': 'recepción', 'breakfast': 'desayuno', 'location': 'ubicación',
+    'clean': 'límpia', 'great': 'estupendo', 'the': 'él', 'was': 'estaba', 'and': 'y también',
+}
+
+
+def legacy_preprocess(text):
+    """La implementación anterior de ``preprocess_text``."""
+    text = text.lower()
+    text = re.sub(r'[^a-zA-Z0-9\s.,!?]', '', text)
+    return ' '.join(text.split())
+
+
+def spanish(texts):
+    pattern = re.compile(r'\b(' + '|'.join(SPANISH) + r')\b')
+    return [pattern.sub(lambda match: SPANISH[match.group()], text) for text in texts]
+
+
+def best_time(fn, texts, repeats):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(texts)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    english = make_corpus(args.rows)['review'].tolist()
+    corpora = {'inglés (ASCII)': english, 'español (tildes)': spanish(english)}
+    assert preprocess_texts(english) == [legacy_preprocess(t) for t in english]
+    methods = {
+        'regex (anterior)': lambda texts: [legacy_preprocess(t) for t in texts],
+        'preprocess_text': lambda texts: [preprocess_text(t) for t in texts],
+        'preprocess_texts': preprocess_texts,
+    }
+    print(f"{args.rows:,} reseñas, mejor de {args.repeats}; microsegundos por reseña")
+    print(f"{'':<18}" + ''.join(f"{name:>20}" for name in corpora))
+    baseline = {}
+    for method, fn in methods.items():
+        cells = []
+        for name, texts in corpora.items():
+            seconds = best_time(fn, texts, args.repeats)
+            baseline.setdefault(name, seconds)
+            cells.append(f"{seconds / args.rows * 1e6:>8.2f} ({baseline[name] / seconds:>4.1f}x)")
+        print(f"{method:<18}" + ''.join(f"{cell:>20}" for cell in cells))
+
+
+if __name__ == '__main__':
+    main()
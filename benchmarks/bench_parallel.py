@@ -0,0 +1,48 @@
+"""
+Mide cómo escala ``parallel_batch_analyze`` de 1 a N núcleos.
+
+Uso:
+    python -m benchmarks.bench_parallel --rows 500000 --engine lexicon
+"""
+import argparse
+import os
+import time
+
+from benchmarks.corpus import make_corpus
+from src.parallel import DEFAULT_CHUNKSIZE, parallel_batch_analyze
+from src.sentiment_model import ENGINES
+
+
+def core_counts(max_jobs):
+    """1, 2, 4, 8... hasta max_jobs (incluido)."""
+    counts, n = [], 1
+    while n < max_jobs:
+        counts.append(n)
+        n *= 2
+    counts.append(max_jobs)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--engine', choices=ENGINES, default='lexicon')
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument('--max-jobs', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    df = make_corpus(args.rows)
+    print(f"{args.rows} reseñas, motor '{args.engine}', trozos de {args.chunksize}")
+    print(f"{'núcleos':>8} {'segundos':>10} {'filas/s':>12} {'aceleración':>12}")
+    baseline = None
+    for n_jobs in core_counts(args.max_jobs):
+        start = time.perf_counter()
+        parallel_batch_analyze(df, engine=args.engine, n_jobs=n_jobs,
+                               chunksize=args.chunksize, min_rows=0)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"{n_jobs:>8} {elapsed:>10.2f} {args.rows / elapsed:>12,.0f} {baseline / elapsed:>11.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Compara añadir un día a ``RollingSummary`` con recalcular el groupby de pandas.
+
+Genera reseñas ya puntuadas al azar (sin analizar texto) para varios hoteles
+y días, y mide, día a día, lo que cuesta tener los agregados al día: el
+dashboard de antes agrupaba toda la historia con pandas; ``RollingSummary``
+solo suma las reseñas del día nuevo. Al final compara las consultas de la
+ventana actual de un hotel.
+
+Uso:
+    python -m benchmarks.bench_rolling --days 365 --rows-per-day 20000 --hotels 500
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.rolling import RollingSummary
+from src.sentiment_model import SENTIMENT_LABELS
+
+
+def make_day(day, n_rows, n_hotels, rng):
+    """Las reseñas puntuadas de un día."""
+    polarity = rng.uniform(-1, 1, n_rows)
+    return pd.DataFrame({
+        'hotel': pd.Categorical.from_codes(rng.integers(0, n_hotels, n_rows),
+                                           [f'Hotel {i}' for i in range(n_hotels)]).astype(str),
+        'date': pd.Timestamp('2024-01-01') + pd.Timedelta(days=day)
+                + pd.to_timedelta(rng.integers(0, 86_400, n_rows), unit='s'),
+        'polarity': polarity,
+        'sentiment': np.array(SENTIMENT_LABELS, dtype=object)[2 - np.digitize(polarity, [-0.1, 0.1])],
+    })
+
+
+def groupby_summary(history):
+    """El recálculo completo que hacía el dashboard."""
+    grouped = history.groupby(['hotel', history['date'].dt.floor('D')])
+    summary = grouped['polarity'].agg(['count', 'mean', 'std'])
+    return summary.join(grouped['sentiment'].value_counts().unstack(fill_value=0))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--rows-per-day', type=int, default=20_000)
+    parser.add_argument('--hotels', type=int, default=500)
+    parser.add_argument('--every', type=int, default=30,
+                        help="Días entre mediciones del recálculo con pandas, que es lento")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    summary = RollingSummary('day')
+    days, incremental, recompute = [], [], []
+    for day in range(args.days):
+        batch = make_day(day, args.rows_per_day, args.hotels, rng)
+        days.append(batch)
+        start = time.perf_counter()
+        summary.update(batch)
+        incremental.append(time.perf_counter() - start)
+        if (day + 1) % args.every == 0 or day + 1 == args.days:
+            history = pd.concat(days, ignore_index=True)
+            start = time.perf_counter()
+            expected = groupby_summary(history)
+            seconds = time.perf_counter() - start
+            recompute.append(seconds)
+            assert len(expected) == len(summary)
+            print(f"día {day + 1:>4}: {len(history):>12,} reseñas; "
+                  f"groupby {seconds:>7.3f} s, último día incremental {incremental[-1]:>7.4f} s")
+
+    print(f"Incremental: media {np.mean(incremental):.4f} s por día "
+          f"({args.rows_per_day / np.mean(incremental):,.0f} filas/s), "
+          f"primer mes {np.mean(incremental[:30]):.4f} s, último mes {np.mean(incremental[-30:]):.4f} s")
+
+    hotels = [f'Hotel {i}' for i in range(args.hotels)]
+    start = time.perf_counter()
+    for hotel in hotels:
+        summary.current(hotel)
+    current = (time.perf_counter() - start) / len(hotels)
+    frame = summary.to_frame()
+    start = time.perf_counter()
+    for hotel in hotels[:20]:
+        frame[frame['hotel'] == hotel].iloc[-1]
+    filtered = (time.perf_counter() - start) / 20
+    print(f"Ventana actual de un hotel: current() {current * 1e6:.1f} µs, "
+          f"filtrar el DataFrame agregado {filtered * 1e6:.1f} µs")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,32 @@
+"""
+Generador de corpus sintéticos de reseñas de hoteles para los benchmarks.
+"""
+import random
+
+import pandas as pd
+
+_SUBJECTS = ['the room', 'the staff', 'the breakfast', 'the location', 'the bed',
+             'the bathroom', 'the pool', 'the view', 'the service', 'the price']
+_OPINIONS = ['was amazing', 'was very friendly', 'was dirty', 'was small and noisy',
+             'was clean and comfortable', 'was terrible', 'was okay', 'was not great',
+             'was really helpful', 'was overpriced', 'could be better', 'was perfect',
+             'was outdated', 'was spacious', 'was rude', 'was convenient']
+_ENDINGS = ['.', '!', '.', '...', '!!', '.']
+
+
+def make_review(rng):
+    """Una reseña de entre una y cuatro frases."""
+    sentences = []
+    for _ in range(rng.randint(1, 4)):
+        sentence = f"{rng.choice(_SUBJECTS)} {rng.choice(_OPINIONS)}{rng.choice(_ENDINGS)}"
+        sentences.append(sentence.capitalize())
+    return ' '.join(sentences)
+
+
+def make_corpus(n_rows, seed=0):
+    """
+    Genera un DataFrame con ``n_rows`` reseñas sintéticas en la columna 'review'.
+    La misma semilla siempre produce el mismo corpus.
+    """
+    rng = random.Random(seed)
+    return pd.DataFrame({'review': [make_review(rng) for _ in range(n_rows)]})
@@ -0,0 +1,112 @@
+"""
+Generador de carga para el servicio de micro-lotes.
+
+Abre varias conexiones y lanza peticiones concurrentes con reseñas del corpus
+sintético. Informa de peticiones/s, latencia vista por el cliente (p50/p99) y
+las métricas del propio servicio. Sin ``--port`` ni ``--unix`` arranca el
+servicio dentro del mismo proceso.
+
+Uso:
+    python -m benchmarks.load_service --requests 50000 --concurrency 256
+    python -m benchmarks.load_service --port 8765 --requests 100000 --connections 8
+"""
+import argparse
+import asyncio
+import time
+
+import numpy as np
+
+from benchmarks.corpus import make_corpus
+from src.service import (
+    DEFAULT_MAX_BATCH_SIZE,
+    DEFAULT_MAX_WAIT,
+    MicroBatcher,
+    ScoringClient,
+    ServiceOverloaded,
+    start_server,
+)
+from src.sentiment_model import ENGINES
+
+
+async def run_load(host, port, path, texts, concurrency, connections):
+    """
+    Envía ``texts`` con ``concurrency`` peticiones en vuelo repartidas en ``connections``.
+    Returns:
+        dict: segundos, peticiones/s, latencias p50/p99 en ms, rechazos y métricas del servicio
+    """
+    clients = [await ScoringClient.connect(host, port, path) for _ in range(connections)]
+    latencies = np.zeros(len(texts))
+    rejected = 0
+    next_index = 0
+
+    async def worker(client):
+        nonlocal next_index, rejected
+        while next_index < len(texts):
+            i = next_index
+            next_index += 1
+            start = time.perf_counter()
+            try:
+                await client.score(texts[i])
+            except ServiceOverloaded:
+                rejected += 1
+            latencies[i] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(clients[i % connections]) for i in range(concurrency)))
+    seconds = time.perf_counter() - start
+    metrics = await clients[0].metrics()
+    for client in clients:
+        await client.close()
+    p50, p99 = (np.percentile(latencies, [50, 99]) * 1e3).tolist()
+    return {
+        'seconds': seconds,
+        'requests_per_s': len(texts) / seconds,
+        'latency_p50_ms': p50,
+        'latency_p99_ms': p99,
+        'rejected': rejected,
+        'service': metrics,
+    }
+
+
+async def _main(args):
+    texts = make_corpus(args.requests, seed=args.seed)['review'].tolist()
+    server = None
+    host, port, path = args.host, args.port, args.unix
+    if port is None and path is None:
+        batcher = MicroBatcher(args.engine, args.max_batch_size, args.max_wait_ms / 1e3)
+        server = await start_server(batcher, host, 0)
+        port = server.sockets[0].getsockname()[1]
+    try:
+        report = await run_load(host, port, path, texts, args.concurrency, args.connections)
+    finally:
+        if server is not None:
+            server.close()
+            await server.wait_closed()
+    service = report['service']
+    print(f"{args.requests} peticiones, {args.concurrency} en vuelo, {args.connections} conexiones")
+    print(f"  {report['requests_per_s']:,.0f} peticiones/s en {report['seconds']:.2f} s")
+    print(f"  latencia cliente: p50 {report['latency_p50_ms']:.2f} ms, p99 {report['latency_p99_ms']:.2f} ms")
+    print(f"  rechazadas: {report['rejected']}")
+    print(f"  servicio: {service['batches']} lotes, {service['mean_batch_size']:.1f} textos de media, "
+          f"p99 en cola+lote {service['latency_p99_ms']:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, help="Servicio ya arrancado en este puerto")
+    parser.add_argument('--unix', help="Servicio ya arrancado en este socket Unix")
+    parser.add_argument('--requests', type=int, default=20_000)
+    parser.add_argument('--concurrency', type=int, default=128)
+    parser.add_argument('--connections', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--engine', choices=ENGINES, default='lexicon',
+                        help="Motor del servicio cuando se arranca dentro del proceso")
+    parser.add_argument('--max-batch-size', type=int, default=DEFAULT_MAX_BATCH_SIZE)
+    parser.add_argument('--max-wait-ms', type=float, default=DEFAULT_MAX_WAIT * 1e3)
+    args = parser.parse_args()
+    asyncio.run(_main(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,295 @@
+"""
+Benchmark de cada etapa del pipeline de sentimiento.
+
+Genera corpus sintéticos de reseñas (de 1k a 10M filas) y mide por separado
+``preprocess_text``, ``calculate_domain_sentiment``, la polaridad de TextBlob,
+``analyze_sentiment``, ``batch_analyze`` y ``load_reviews``. Para cada etapa
+informa del rendimiento (reseñas/s), la latencia por reseña (p50/p99) y el pico
+de memoria (RSS). Cada medición corre en un proceso propio para que el pico de
+memoria sea solo suyo.
+
+Uso:
+    python -m benchmarks.suite --sizes 1000,100000 --output bench.json
+    python -m benchmarks.suite --sizes 1000,100000 --compare bench.json --threshold 0.15
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from queue import Empty
+
+import numpy as np
+
+from benchmarks.corpus import make_corpus
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+# Las etapas reseña a reseña solo miden una muestra: TextBlob sobre 10M filas
+# llevaría horas y la latencia no cambia con el tamaño del corpus
+DEFAULT_SAMPLE = 20_000
+# Las etapas por lotes se cronometran por bloques para sacar la latencia por reseña
+BATCH_BLOCK = 1_000
+
+
+def _per_review(fn, texts):
+    """Cronometra ``fn`` reseña a reseña y devuelve (segundos, latencias en ns)."""
+    latencies = np.empty(len(texts), dtype=np.int64)
+    clock = time.perf_counter_ns
+    for i, text in enumerate(texts):
+        start = clock()
+        fn(text)
+        latencies[i] = clock() - start
+    return latencies.sum() / 1e9, latencies
+
+
+def _per_block(fn, df):
+    """Cronometra ``fn`` por bloques y reparte el tiempo de cada bloque entre sus filas."""
+    latencies = np.empty(len(df), dtype=np.int64)
+    clock = time.perf_counter_ns
+    for start in range(0, len(df), BATCH_BLOCK):
+        block = df.iloc[start:start + BATCH_BLOCK]
+        begin = clock()
+        fn(block)
+        latencies[start:start + len(block)] = (clock() - begin) // len(block)
+    return latencies.sum() / 1e9, latencies
+
+
+def stage_preprocess(df, sample, csv_path):
+    from src.sentiment_model import preprocess_text
+    return _per_review(preprocess_text, df['review'].tolist()[:sample])
+
+
+def stage_domain(df, sample, csv_path):
+    from src.sentiment_model import calculate_domain_sentiment, preprocess_text
+    texts = [preprocess_text(t) for t in df['review'].tolist()[:sample]]
+    return _per_review(calculate_domain_sentiment, texts)
+
+
+def stage_textblob(df, sample, csv_path):
+    from textblob import TextBlob
+    from src.sentiment_model import preprocess_text
+    texts = [preprocess_text(t) for t in df['review'].tolist()[:sample]]
+    return _per_review(lambda text: TextBlob(text).sentiment.polarity, texts)
+
+
+def stage_analyze(df, sample, csv_path):
+    from src.sentiment_model import analyze_sentiment, configure_cache
+    configure_cache(0)  # el corpus sintético repite reseñas; medimos el análisis real
+    return _per_review(analyze_sentiment, df['review'].tolist()[:sample])
+
+
+def stage_batch_textblob(df, sample, csv_path):
+    from src.sentiment_model import batch_analyze, configure_cache
+    configure_cache(0)
+    return _per_block(batch_analyze, df.iloc[:sample])
+
+
+def stage_batch_lexicon(df, sample, csv_path):
+    from src.lexicon_engine import get_default_engine
+    from src.sentiment_model import batch_analyze
+    get_default_engine()  # la carga del léxico no es parte del lote
+    return _per_block(lambda block: batch_analyze(block, engine='lexicon'), df)
+
+
+def stage_load_reviews(df, sample, csv_path):
+    from src.data_loader import load_reviews
+    start = time.perf_counter()
+    load_reviews(csv_path)
+    return time.perf_counter() - start, None
+
+
+STAGES = {
+    'preprocess_text': stage_preprocess,
+    'calculate_domain_sentiment': stage_domain,
+    'textblob_polarity': stage_textblob,
+    'analyze_sentiment': stage_analyze,
+    'batch_analyze[textblob]': stage_batch_textblob,
+    'batch_analyze[lexicon]': stage_batch_lexicon,
+    'load_reviews': stage_load_reviews,
+}
+
+
+def _write_corpus(rows, seed, path):
+    make_corpus(rows, seed=seed).to_csv(path, index=False)
+
+
+def _measure(stage, rows, sample, seed, csv_path, queue):
+    """Corre una etapa en un proceso hijo y devuelve el resultado por la cola."""
+    # load_reviews parte de un CSV ya escrito para que el corpus en memoria no
+    # cuente en su pico de RSS
+    df = None if csv_path else make_corpus(rows, seed=seed)
+    seconds, latencies = STAGES[stage](df, sample, csv_path)
+    measured = rows if latencies is None else len(latencies)
+    # ru_maxrss va en KiB en Linux y en bytes en macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_mb = peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+    queue.put({
+        'stage': stage,
+        'rows': rows,
+        'measured_rows': measured,
+        'seconds': seconds,
+        'rows_per_s': measured / seconds if seconds else None,
+        'p50_us': float(np.percentile(latencies, 50)) / 1e3 if latencies is not None else None,
+        'p99_us': float(np.percentile(latencies, 99)) / 1e3 if latencies is not None else None,
+        'peak_rss_mb': round(peak_mb, 1),
+    })
+
+
+def _run_child(ctx, target, *args):
+    process = ctx.Process(target=target, args=args)
+    process.start()
+    process.join()
+    if process.exitcode != 0:
+        raise RuntimeError(f"El proceso de benchmark terminó con código {process.exitcode}")
+
+
+def _collect(process, queue, poll=1.0):
+    """
+    Espera el resultado de ``process`` por ``queue``. Si el hijo muere sin
+    enviarlo (un fallo, el OOM killer...) lanza RuntimeError en lugar de
+    quedarse esperando para siempre.
+    """
+    while True:
+        try:
+            result = queue.get(timeout=poll)
+            break
+        except Empty:
+            if process.is_alive():
+                continue
+            # Pudo enviar el resultado justo antes de terminar
+            try:
+                result = queue.get(timeout=poll)
+                break
+            except Empty:
+                raise RuntimeError(f"El proceso de benchmark terminó con código {process.exitcode} "
+                                   "sin enviar el resultado") from None
+    process.join()
+    if process.exitcode != 0:
+        raise RuntimeError(f"El proceso de benchmark terminó con código {process.exitcode}")
+    return result
+
+
+def run_stage(stage, rows, sample=DEFAULT_SAMPLE, seed=0):
+    """Mide una etapa sobre un corpus de ``rows`` reseñas en un proceso aparte."""
+    ctx = multiprocessing.get_context('spawn')
+    queue = ctx.Queue()
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = None
+        if stage == 'load_reviews':
+            csv_path = os.path.join(tmp, 'reviews.csv')
+            _run_child(ctx, _write_corpus, rows, seed, csv_path)
+        process = ctx.Process(target=_measure, args=(stage, rows, sample, seed, csv_path, queue))
+        process.start()
+        return _collect(process, queue)
+
+
+def run_suite(sizes=DEFAULT_SIZES, stages=None, sample=DEFAULT_SAMPLE, seed=0, verbose=True):
+    """Mide todas las etapas pedidas para cada tamaño de corpus."""
+    results = []
+    for rows in sizes:
+        for stage in stages or STAGES:
+            result = run_stage(stage, rows, sample, seed)
+            results.append(result)
+            if verbose:
+                print(format_result(result), flush=True)
+    return {'meta': _metadata(sample, seed), 'results': results}
+
+
+def _metadata(sample, seed):
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'sample': sample,
+        'seed': seed,
+    }
+
+
+def _fmt(value, spec):
+    return format(value, spec) if value is not None else '-'
+
+
+def format_result(result):
+    rate = _fmt(result['rows_per_s'], ',.0f')
+    p50 = _fmt(result['p50_us'], '.1f')
+    p99 = _fmt(result['p99_us'], '.1f')
+    return (f"{result['stage']:<28} {result['rows']:>10,} {rate:>12} {p50:>9} {p99:>9} "
+            f"{result['peak_rss_mb']:>9.1f}")
+
+
+HEADER = f"{'etapa':<28} {'filas':>10} {'reseñas/s':>12} {'p50 µs':>9} {'p99 µs':>9} {'RSS MB':>9}"
+
+
+def compare(current, baseline, threshold):
+    """
+    Compara dos ejecuciones etapa a etapa.
+    Returns:
+        list: (etapa, filas, rendimiento base, actual, cambio relativo) de las que
+            empeoran más que ``threshold`` (0.1 = 10 % menos reseñas/s)
+    """
+    previous = {(r['stage'], r['rows']): r for r in baseline['results']}
+    regressions = []
+    for result in current['results']:
+        old = previous.get((result['stage'], result['rows']))
+        if not old or not old['rows_per_s'] or not result['rows_per_s']:
+            continue
+        change = result['rows_per_s'] / old['rows_per_s'] - 1
+        if change < -threshold:
+            regressions.append((result['stage'], result['rows'], old['rows_per_s'],
+                                result['rows_per_s'], change))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help="Tamaños de corpus separados por comas (hasta 10000000)")
+    parser.add_argument('--stages', help="Etapas a medir, separadas por comas: " + ', '.join(STAGES))
+    parser.add_argument('--sample', type=int, default=DEFAULT_SAMPLE,
+                        help="Máximo de reseñas para las etapas reseña a reseña y TextBlob por lotes")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="Guarda los resultados en este JSON")
+    parser.add_argument('--compare', help="JSON de una ejecución anterior con el que comparar")
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help="Caída máxima de reseñas/s admitida al comparar (0.10 = 10 %%)")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    stages = args.stages.split(',') if args.stages else None
+    unknown = set(stages or ()) - set(STAGES)
+    if unknown:
+        parser.error(f"etapas desconocidas: {', '.join(sorted(unknown))}")
+
+    print(HEADER)
+    report = run_suite(sizes, stages, args.sample, args.seed)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as handle:
+            json.dump(report, handle, indent=2)
+        print(f"\nResultados guardados en {args.output}")
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as handle:
+            baseline = json.load(handle)
+        regressions = compare(report, baseline, args.threshold)
+        for stage, rows, old, new, change in regressions:
+            print(f"REGRESIÓN {stage} ({rows:,} filas): {old:,.0f} -> {new:,.0f} reseñas/s ({change:+.1%})")
+        if regressions:
+            return 1
+        print(f"\nSin regresiones por encima del {args.threshold:.0%} frente a {args.compare}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,14 +1,261 @@
-import sys
+"""
+Línea de comandos para analizar ficheros de reseñas.
+
+Lee uno o varios CSV o JSONL (admite patrones como ``exports/*.csv``), analiza
+cada trozo según llega y escribe el resultado en streaming a CSV o Parquet,
+o como CSV a la salida estándar si no se da ``--output``. Al terminar escribe
+en la salida de error un resumen: filas, filas/s, almacén y tiempo de
+lectura, análisis y escritura. Con ``--profile`` se activa la instrumentación
+(``src/instrumentation.py``) y el resumen añade la reutilización de textos, la
+caché y el desglose del análisis por etapa.
+
+Todas las entradas deben ser del mismo formato: de un JSONL solo se lee la
+columna de texto, así que no casa con las filas completas de un CSV.
+
+Las filas mal formadas se descartan y se cuentan; con ``--strict`` la primera
+detiene el análisis, no se publica ninguna salida y el código de salida es 1.
+
+Uso:
+    python -m src.app 'exports/*.csv' --output scored.parquet --workers -1
+    python -m src.app reviews.jsonl --engine textblob --cache-size 100000 > scored.csv
+"""
+import argparse
+import glob
 import os
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import sys
+import time
+from contextlib import nullcontext
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pandas.errors import ParserError
+
+from src import instrumentation
+from src.data_loader import DEFAULT_BATCH_BYTES, input_format_for, iter_csv_frames
+from src.jobs import main as jobs_main
+from src.parallel import resolve_n_jobs
+from src.pipeline import analyze_chunks, open_writer, output_format_for, text_batch_frames
+from src.score_store import ScoreStore
+from src.sentiment_model import ENGINES, configure_cache
+
+# Filas mal formadas que se listan una a una antes de dar solo el total
+MAX_REPORTED_BAD_LINES = 10
+
+
+def expand_inputs(patterns):
+    """
+    Expande los patrones de entrada en una lista de ficheros sin repetidos,
+    en orden alfabético dentro de cada patrón.
+    """
+    paths = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern, recursive=True)) if glob.has_magic(pattern) else [pattern]
+        matches = [path for path in matches if os.path.isfile(path)]
+        if not matches:
+            raise FileNotFoundError(f"Ningún fichero coincide con {pattern!r}")
+        paths.extend(path for path in matches if path not in paths)
+    return paths
+
+
+class InputError(Exception):
+    """Un fichero de entrada no se puede leer como se ha pedido."""
+
+
+class RunStats:
+    """Contadores y tiempos de una ejecución para el resumen final."""
+
+    def __init__(self):
+        self.files = 0
+        self.rows = 0
+        self.bad_lines = 0
+        self.seconds = {'lectura': 0.0, 'análisis': 0.0, 'escritura': 0.0}
+
+    def bad_line(self, path, message):
+        self.bad_lines += 1
+        if self.bad_lines <= MAX_REPORTED_BAD_LINES:
+            print(f"aviso: {path}: {message} (fila descartada)", file=sys.stderr)
+
+    def timed_chunks(self, chunks):
+        """Pasa los trozos tal cual, sumando a 'lectura' lo que se tarda en obtenerlos."""
+        chunks = iter(chunks)
+        while True:
+            start = time.perf_counter()
+            chunk = next(chunks, None)
+            self.seconds['lectura'] += time.perf_counter() - start
+            if chunk is None:
+                return
+            yield chunk
+
+
+def read_inputs(paths, text_column, batch_bytes, strict, stats):
+    """Trozos de todos los ficheros, uno detrás de otro, con la columna de texto sin nulos."""
+    for path in paths:
+        stats.files += 1
+        on_bad_lines = 'error' if strict else (lambda message, path=path: stats.bad_line(path, message))
+        try:
+            if input_format_for(path) == 'jsonl':
+                chunks = text_batch_frames(path, text_column, batch_bytes, on_bad_lines=on_bad_lines)
+            else:
+                chunks = iter_csv_frames(path, batch_bytes, on_bad_lines=on_bad_lines)
+            for chunk in chunks:
+                if text_column not in chunk:
+                    raise KeyError(f"No hay columna {text_column!r}")
+                chunk[text_column] = chunk[text_column].fillna('').astype(str)
+                yield chunk
+        except (ParserError, KeyError, UnicodeDecodeError) as exc:
+            raise InputError(f"{path}: {exc}") from exc
+
+
+def write_results(scored_chunks, writer, stats):
+    columns = None
+    for scored in scored_chunks:
+        if columns is None:
+            columns = list(scored.columns)
+        elif list(scored.columns) != columns:
+            raise InputError("Los ficheros de entrada no tienen las mismas columnas")
+        start = time.perf_counter()
+        writer.write(scored)
+        stats.seconds['escritura'] += time.perf_counter() - start
+        stats.rows += len(scored)
+
+
+def format_summary(stats, elapsed, recorder, store, workers):
+    """Resumen legible de la ejecución; el desglose solo con ``recorder`` (``--profile``)."""
+    lines = [f"{stats.rows:,} filas de {stats.files} fichero(s) en {elapsed:.2f} s "
+             f"({stats.rows / elapsed if elapsed else 0:,.0f} filas/s)"]
+    if stats.bad_lines:
+        lines.append(f"  filas mal formadas descartadas: {stats.bad_lines:,}")
+    data = recorder.as_dict() if recorder is not None else None
+    if data is not None:
+        if stats.rows and workers <= 1:
+            # Las filas que no llegan a analizarse repiten un texto del trozo o salen del almacén
+            scored = data['counters'].get('unique_texts', 0)
+            lines.append(f"  textos analizados: {scored:,} de {stats.rows:,} filas "
+                         f"({1 - scored / stats.rows:.0%} reutilizado)")
+        if data['cache']['hit_rate'] is not None:
+            lines.append(f"  caché de analyze_sentiment: {data['cache']['hit_rate']:.0%} de aciertos")
+    if store is not None:
+        lines.append(f"  almacén: {store.reused:,} reutilizadas, {store.scored:,} analizadas")
+    lines.append("  tiempo por etapa:")
+    for stage, seconds in stats.seconds.items():
+        lines.append(f"    {stage:<20} {seconds:8.2f} s")
+        if stage == 'análisis' and data is not None:
+            if workers > 1:
+                lines.append("      (el desglose solo está disponible con --workers 1)")
+                continue
+            for name, values in sorted(data['stages'].items(), key=lambda item: -item[1]['seconds']):
+                if name not in ('batch_analyze', 'analyze_sentiment'):
+                    lines.append(f"      {name:<18} {values['seconds']:8.2f} s")
+    return '\n'.join(lines)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Analiza el sentimiento de ficheros CSV o JSONL de reseñas.")
+    parser.add_argument('inputs', nargs='+', metavar='input',
+                        help="Ficheros o patrones (entre comillas) como 'exports/*.csv'")
+    parser.add_argument('--text-column', default='review')
+    parser.add_argument('--output', help="Fichero de resultados; sin él se escribe CSV en la salida estándar")
+    parser.add_argument('--format', choices=['csv', 'parquet'],
+                        help="Formato de --output; por defecto, según la extensión")
+    parser.add_argument('--engine', choices=ENGINES, default='lexicon')
+    parser.add_argument('--workers', type=int, default=1, help="Procesos de análisis (-1 = todos los núcleos)")
+    parser.add_argument('--chunk-mb', type=float,
+                        help=f"Tamaño de cada trozo leído, en MB del fichero de entrada (por defecto "
+                             f"{DEFAULT_BATCH_BYTES / 2 ** 20:g}); con --output-dir, el de cada fragmento")
+    parser.add_argument('--cache-size', type=int,
+                        help="Entradas de la caché LRU de analyze_sentiment (motor textblob)")
+    parser.add_argument('--store', help="Fichero SQLite con puntuaciones previas para no repetir trabajo")
+    parser.add_argument('--compact', action='store_true',
+                        help="Guarda la polaridad en float32 y el sentimiento como categoría")
+    parser.add_argument('--strict', action='store_true',
+                        help="Termina con código 1 ante la primera fila mal formada; en JSONL se valida "
+                             "cada línea entera con json.loads, que es más lento")
+    parser.add_argument('--profile', action='store_true',
+                        help="Añade al resumen el desglose por etapa, la reutilización de textos y la "
+                             "caché; la instrumentación hace el análisis algo más lento")
+    parser.add_argument('--output-dir',
+                        help="Analiza un solo CSV por fragmentos, reanudable (ver src/jobs.py); no admite "
+                             "--output, --strict, --store ni --cache-size")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.chunk_mb is not None and args.chunk_mb <= 0:
+        parser.error("--chunk-mb debe ser positivo")
+    try:
+        paths = expand_inputs(args.inputs)
+    except FileNotFoundError as exc:
+        parser.error(str(exc))
+
+    if args.output_dir:
+        if len(paths) != 1:
+            parser.error("--output-dir admite un solo fichero de entrada")
+        unsupported = [option for option, value in (('--output', args.output), ('--strict', args.strict),
+                                                    ('--store', args.store), ('--cache-size', args.cache_size))
+                       if value]
+        if unsupported:
+            parser.error(f"--output-dir no admite {', '.join(unsupported)}")
+        job_argv = [paths[0], '--output-dir', args.output_dir, '--text-column', args.text_column,
+                    '--engine', args.engine, '--workers', str(args.workers), '--format', args.format or 'parquet']
+        if args.chunk_mb is not None:
+            job_argv += ['--shard-mb', str(args.chunk_mb)]
+        if args.compact:
+            job_argv.append('--compact')
+        try:
+            jobs_main(job_argv)
+        except (ValueError, OSError) as exc:
+            # Manifiesto de otro trabajo, columna que no existe, CSV ilegible...
+            print(f"error: {exc}", file=sys.stderr)
+            return 1
+        return 0
+
+    if args.output is None and args.format == 'parquet':
+        parser.error("Para escribir Parquet hace falta --output")
+    if len({input_format_for(path) for path in paths}) > 1:
+        parser.error("No se pueden mezclar CSV y JSONL: de los JSONL solo se lee la columna de texto")
+    chunk_mb = args.chunk_mb if args.chunk_mb is not None else DEFAULT_BATCH_BYTES / 2 ** 20
+    if args.cache_size is not None:
+        configure_cache(args.cache_size)
 
-from data_loader import load_reviews
-from sentiment_model import batch_analyze
+    stats = RunStats()
+    store = ScoreStore(args.store) if args.store else None
+    # La salida se escribe con otro nombre y se publica al terminar sin errores
+    partial_path = args.output + '.partial' if args.output else None
+    writer = open_writer(partial_path or sys.stdout, args.format or output_format_for(args.output or '.csv'))
+    start = time.perf_counter()
+    published = False
+    try:
+        with instrumentation.recording() if args.profile else nullcontext() as recorder:
+            chunks = stats.timed_chunks(read_inputs(paths, args.text_column, int(chunk_mb * 2 ** 20),
+                                                    args.strict, stats))
+            scored = analyze_chunks(chunks, args.text_column, args.engine, store=store, compact=args.compact,
+                                    n_jobs=args.workers)
+            write_results(scored, writer, stats)
+        writer.close()
+        if partial_path is not None:
+            os.replace(partial_path, args.output)
+        published = True
+    except InputError as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 1
+    except BrokenPipeError:
+        # Quien lee la salida estándar ha cerrado (por ejemplo, ``| head``)
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    finally:
+        if not published:
+            writer.close()
+            if partial_path is not None and os.path.exists(partial_path):
+                os.remove(partial_path)
+        if store is not None:
+            store.close()
+    elapsed = time.perf_counter() - start
+    stats.seconds['análisis'] = max(elapsed - stats.seconds['lectura'] - stats.seconds['escritura'], 0.0)
+    print(format_summary(stats, elapsed, recorder, store, resolve_n_jobs(args.workers)), file=sys.stderr)
+    return 0
 
-def main():
-    df = load_reviews('../data/sample_reviews.csv')
-    result = batch_analyze(df)
-    print(result[['review', 'sentiment', 'polarity']])
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
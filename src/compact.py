@@ -0,0 +1,149 @@
+"""
+Formato compacto de resultados para lotes de decenas de millones de reseñas.
+
+Con ``compact=True`` los análisis por lotes no devuelven objetos de Python:
+la polaridad y la confianza van en float32, el sentimiento es un categórico
+de pandas (códigos int8 en el orden de ``SENTIMENT_LABELS``) y las palabras
+clave son máscaras uint64 con un bit por entrada del léxico
+(``KeywordMatcher.entries``). Si el léxico pasa de 64 entradas, cada fila lleva
+en su lugar las posiciones de sus coincidencias en ``entries`` (int16, o int32
+con más de 32768 entradas): un solo buffer de posiciones troceado con offsets,
+del que cada texto distinto es una vista que comparten todas sus filas.
+Todas las columnas pasan a Arrow/Parquet como tipos nativos (float32,
+diccionario, uint64 o list<int16>) y vuelven igual al leerlas.
+
+La conversión se hace sobre los textos distintos, antes de repartir el
+resultado a las filas, así que nunca se crea un array de objetos por fila.
+"""
+import numpy as np
+import pandas as pd
+
+from .evaluation import encode_labels
+from .sentiment_model import SENTIMENT_LABELS, get_keyword_matcher
+
+SENTIMENT_DTYPE = pd.CategoricalDtype(SENTIMENT_LABELS)
+POLARITY_DTYPE = np.float32
+KEYWORD_MASK_DTYPE = np.uint64
+KEYWORD_MASK_BITS = 64
+
+
+def result_columns(polarity, sentiment, codes=None, compact=False):
+    """
+    Columnas de polaridad y sentimiento por fila.
+    Args:
+        polarity, sentiment (numpy.ndarray): Resultados de cada texto distinto
+            (o de cada fila, si ``codes`` es None)
+        codes (numpy.ndarray): Texto distinto que corresponde a cada fila
+        compact (bool): float32 y categórico en lugar de float64 y texto
+    Returns:
+        dict: {'polarity': ..., 'sentiment': ...}
+    """
+    if compact:
+        polarity = polarity.astype(POLARITY_DTYPE)
+        sentiment = encode_labels(sentiment)
+    if codes is not None:
+        polarity, sentiment = polarity[codes], sentiment[codes]
+    if compact:
+        sentiment = pd.Categorical.from_codes(sentiment, dtype=SENTIMENT_DTYPE)
+    return {'polarity': polarity, 'sentiment': sentiment}
+
+
+def keyword_columns(processed_texts, matcher=None):
+    """
+    Palabras clave positivas y negativas de cada texto normalizado en formato
+    compacto: máscaras (``keyword_masks``) si el léxico cabe en
+    ``KEYWORD_MASK_BITS`` bits y posiciones (``keyword_indices``) si no.
+    """
+    matcher = matcher or get_keyword_matcher()
+    if len(matcher.entries) > KEYWORD_MASK_BITS:
+        return keyword_indices(processed_texts, matcher)
+    return keyword_masks(processed_texts, matcher)
+
+
+def keyword_masks(processed_texts, matcher=None):
+    """
+    Máscaras de palabras clave positivas y negativas de cada texto normalizado.
+    Returns:
+        tuple: (máscaras positivas, máscaras negativas) como arrays uint64
+    """
+    matcher = matcher or get_keyword_matcher()
+    if len(matcher.entries) > KEYWORD_MASK_BITS:
+        raise ValueError(f"El léxico tiene {len(matcher.entries)} entradas y las máscaras solo "
+                         f"{KEYWORD_MASK_BITS} bits: usa keyword_indices")
+    positive = np.empty(len(processed_texts), dtype=KEYWORD_MASK_DTYPE)
+    negative = np.empty(len(processed_texts), dtype=KEYWORD_MASK_DTYPE)
+    for i, text in enumerate(processed_texts):
+        positive[i], negative[i] = matcher.match_masks(text)
+    return positive, negative
+
+
+def keyword_indices(processed_texts, matcher=None):
+    """
+    Posiciones en ``matcher.entries`` de las palabras clave positivas y
+    negativas de cada texto normalizado, para léxicos de cualquier tamaño.
+    Returns:
+        tuple: (posiciones positivas, posiciones negativas), arrays de objetos
+            con un array int16/int32 ordenado por texto
+    """
+    matcher = matcher or get_keyword_matcher()
+    dtype = np.int16 if len(matcher.entries) <= np.iinfo(np.int16).max + 1 else np.int32
+    found = ([], [])
+    ends = (np.empty(len(processed_texts), dtype=np.int64), np.empty(len(processed_texts), dtype=np.int64))
+    for i, text in enumerate(processed_texts):
+        for mask, entries, end in zip(matcher.match_masks(text), found, ends):
+            # Los bits activos, del más bajo al más alto: tantas vueltas como coincidencias
+            while mask:
+                low = mask & -mask
+                entries.append(low.bit_length() - 1)
+                mask ^= low
+            end[i] = len(entries)
+    return tuple(_split_rows(np.array(entries, dtype=dtype), end) for entries, end in zip(found, ends))
+
+
+def _split_rows(values, ends):
+    """Vistas de ``values`` entre offsets consecutivos, en un array de objetos."""
+    rows = np.empty(len(ends), dtype=object)
+    start = 0
+    for i, end in enumerate(ends.tolist()):
+        rows[i] = values[start:end]
+        start = end
+    return rows
+
+
+def decode_keywords(column, matcher=None):
+    """
+    Lista de entradas del léxico de cada máscara o array de posiciones, para
+    mostrarlas o exportarlas. Los valores repetidos se decodifican una sola vez.
+    """
+    matcher = matcher or get_keyword_matcher()
+    values = np.asarray(column)
+    if values.dtype != object:
+        codes, uniques = pd.factorize(values.astype(KEYWORD_MASK_DTYPE))
+        decoded = np.empty(len(uniques), dtype=object)
+        decoded[:] = [matcher.decode_mask(int(mask)) for mask in uniques]
+        return decoded[codes]
+    entries = np.array(matcher.entries, dtype=object)
+    # Las filas de un mismo texto comparten el array, así que basta con decodificar cada objeto
+    seen = {}
+    decoded = np.empty(len(values), dtype=object)
+    for i, positions in enumerate(values):
+        key = id(positions)
+        if key not in seen:
+            seen[key] = entries[np.asarray(positions, dtype=np.int64)].tolist()
+        decoded[i] = seen[key]
+    return decoded
+
+
+def compact_results(result_df):
+    """
+    Versión compacta de un resultado ya calculado: 'polarity' y 'confidence'
+    en float32 y 'sentiment' categórico. Las listas de palabras clave no se
+    tocan, porque el texto de las negaciones no cabe en una máscara.
+    """
+    result_df = result_df.copy(deep=False)
+    columns = result_columns(result_df['polarity'].to_numpy(), result_df['sentiment'], compact=True)
+    result_df['polarity'] = columns['polarity']
+    result_df['sentiment'] = columns['sentiment']
+    if 'confidence' in result_df:
+        result_df['confidence'] = result_df['confidence'].astype(POLARITY_DTYPE)
+    return result_df
@@ -1,4 +1,323 @@
+"""
+Lectura de reseñas desde CSV y JSON Lines.
+
+``load_reviews`` e ``iter_reviews`` devuelven DataFrames completos. Para
+ficheros de varios GB en los que solo interesa el texto, ``iter_text_batches``
+proyecta el fichero en memoria con ``mmap``, busca los límites de registro
+sobre el buffer proyectado y solo decodifica la columna de texto, que entrega
+en lotes de unos ``batch_bytes`` bytes listos para ``score_texts``.
+``iter_csv_frames`` recorre un CSV de la misma forma pero con todas sus columnas.
+
+Las filas mal formadas (en CSV, con más campos que la cabecera; en JSONL,
+líneas que no son un objeto JSON) se tratan según ``on_bad_lines``, como en
+``pd.read_csv``: 'error' lanza ``ParserError``, 'warn' avisa con un
+``ParserWarning`` y 'skip' las descarta. También puede ser una función, que
+recibe el mensaje (con el número de línea) y descarta la fila.
+"""
+import codecs
+import csv
+import io
+import json
+import mmap
+import os
+import re
+import warnings
+
 import pandas as pd
+from pandas.errors import ParserError, ParserWarning
+
+DEFAULT_CHUNKSIZE = 50_000
+DEFAULT_BATCH_BYTES = 8 * 2 ** 20
+JSONL_EXTENSIONS = ('.jsonl', '.ndjson')
+# Columna de más que se pide al parser en C para detectar filas con campos de sobra
+_EXTRA_COLUMN = '\0extra'
 
 def load_reviews(path):
+    if input_format_for(path) == 'jsonl':
+        return pd.read_json(path, lines=True)
     return pd.read_csv(path)
+
+def iter_reviews(path, chunksize=DEFAULT_CHUNKSIZE, **read_csv_kwargs):
+    """
+    Lee el CSV por trozos de ``chunksize`` filas sin cargarlo entero en memoria.
+    Los argumentos extra se pasan tal cual a ``pd.read_csv``.
+    """
+    with pd.read_csv(path, chunksize=chunksize, **read_csv_kwargs) as reader:
+        for chunk in reader:
+            yield chunk
+
+
+def input_format_for(path):
+    """Deduce el formato de entrada ('jsonl' o 'csv') a partir de la extensión."""
+    return 'jsonl' if path.lower().endswith(JSONL_EXTENSIONS) else 'csv'
+
+
+def iter_text_batches(path, text_column='review', batch_bytes=DEFAULT_BATCH_BYTES, input_format=None,
+                      on_bad_lines='error'):
+    """
+    Recorre un CSV o JSONL proyectado en memoria y devuelve sus textos por lotes.
+    Cada lote cubre unos ``batch_bytes`` bytes del fichero y termina en fin de
+    registro; solo se copia ese tramo, nunca el fichero entero. Los textos
+    vacíos, nulos o ausentes se devuelven como ''.
+    Args:
+        path (str): Fichero de entrada (UTF-8)
+        text_column (str): Columna (CSV) o clave (JSONL) con el texto
+        batch_bytes (int): Tamaño aproximado de cada lote en bytes
+        input_format (str): 'csv' o 'jsonl' para ignorar la extensión
+        on_bad_lines (str or callable): Qué hacer con las filas mal formadas
+    Yields:
+        list of str: Textos del lote, en el orden del fichero
+    """
+    input_format = input_format or input_format_for(path)
+    if input_format not in ('csv', 'jsonl'):
+        raise ValueError(f"Formato de entrada desconocido: {input_format!r}")
+    handler = _bad_line_handler(on_bad_lines)
+    for buffer in _mapped(path, batch_bytes):
+        if input_format == 'jsonl':
+            # Con 'error' cada línea se valida entera, no solo hasta el texto
+            yield from _jsonl_batches(buffer, text_column, batch_bytes, handler, on_bad_lines == 'error')
+            continue
+        # El parser en C de pandas solo convierte a objetos la columna de texto
+        for frame in _csv_frames(buffer, batch_bytes, handler, text_column):
+            yield frame[text_column].fillna('').tolist()
+
+
+def iter_csv_frames(path, batch_bytes=DEFAULT_BATCH_BYTES, on_bad_lines='error'):
+    """
+    Recorre un CSV proyectado en memoria por trozos de unos ``batch_bytes``
+    bytes, cada uno leído con el parser en C de pandas por separado. A
+    diferencia de ``iter_reviews``, las filas con campos de más se detectan
+    en cualquier trozo (``pd.read_csv`` con ``chunksize`` solo lo hace bien
+    en el primero).
+    Args:
+        path (str): CSV de entrada (UTF-8)
+        batch_bytes (int): Tamaño aproximado de cada trozo en bytes
+        on_bad_lines (str or callable): Qué hacer con las filas mal formadas
+    Yields:
+        pandas.DataFrame: Un trozo por lote, con índice desde 0 en cada uno
+    """
+    handler = _bad_line_handler(on_bad_lines)
+    for buffer in _mapped(path, batch_bytes):
+        yield from _csv_frames(buffer, batch_bytes, handler)
+
+
+def _mapped(path, batch_bytes):
+    """Proyecta ``path`` en memoria; no devuelve nada si está vacío."""
+    if batch_bytes < 1:
+        raise ValueError("batch_bytes debe ser al menos 1")
+    with open(path, 'rb') as handle:
+        if os.fstat(handle.fileno()).st_size == 0:
+            return
+        with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            yield buffer
+
+
+def _bad_line_handler(on_bad_lines):
+    if callable(on_bad_lines):
+        return on_bad_lines
+    if on_bad_lines == 'error':
+        def handler(message):
+            raise ParserError(message)
+    elif on_bad_lines == 'warn':
+        def handler(message):
+            warnings.warn(message, ParserWarning, stacklevel=2)
+    elif on_bad_lines == 'skip':
+        def handler(message):
+            pass
+    else:
+        raise ValueError(f"on_bad_lines desconocido: {on_bad_lines!r}")
+    return handler
+
+
+def _record_end(buffer, start, batch_bytes, quoted):
+    """
+    Fin del lote que empieza en ``start``: justo después del último salto de
+    línea antes de ``start + batch_bytes`` (o del primero después, si un solo
+    registro es más largo). Con ``quoted`` el salto de línea tiene que quedar
+    fuera de comillas, como en CSV.
+    """
+    size = len(buffer)
+    limit = start + batch_bytes
+    if limit >= size:
+        return size
+    newline = buffer.rfind(b'\n', start, limit)
+    if not quoted:
+        if newline < 0:
+            newline = buffer.find(b'\n', limit)
+        return size if newline < 0 else newline + 1
+    # Paridad de comillas hacia atrás desde el último salto de línea; un campo
+    # entre comillas puede contener saltos de línea y no se puede cortar ahí
+    if newline >= 0:
+        region = buffer[start:newline]
+        parity = region.count(b'"') % 2
+        position = len(region)
+        while parity:
+            previous = region.rfind(b'\n', 0, position)
+            if previous < 0:
+                break
+            parity ^= region.count(b'"', previous, position) % 2
+            position = previous
+        if not parity:
+            return start + position + 1
+    # Un solo registro más largo que el lote: se sigue hasta cerrar las comillas
+    parity, position = 0, start
+    while True:
+        newline = buffer.find(b'\n', position)
+        if newline < 0:
+            return size
+        parity ^= buffer[position:newline].count(b'"') % 2
+        if not parity:
+            return newline + 1
+        position = newline + 1
+
+
+def _csv_frames(buffer, batch_bytes, handler, text_column=None):
+    header_end = _record_end(buffer, 0, 1, quoted=True)
+    header = codecs.decode(buffer[:header_end], 'utf-8-sig')
+    columns = next(csv.reader([header.rstrip('\r\n')]), [])
+    if text_column is not None and text_column not in columns:
+        raise KeyError(f"El CSV no tiene la columna {text_column!r}")
+    # Número de línea (desde 1) en el que empieza cada lote, para los mensajes
+    line = header.count('\n') + 1
+    position = header_end
+    while position < len(buffer):
+        end = _record_end(buffer, position, batch_bytes, quoted=True)
+        data = buffer[position:end]
+        frame = _parse_csv_batch(data, columns, text_column, handler, line)
+        line += data.count(b'\n')
+        position = end
+        if len(frame):
+            yield frame
+
+
+def _parse_csv_batch(data, columns, text_column, handler, first_line):
+    """
+    Lee un lote con el parser en C pidiendo una columna de más. Si esa columna
+    sale vacía y no hay avisos, ninguna fila tenía campos de sobra. Si no, el
+    parser en C no es fiable (toma el número de campos de la primera fila
+    ancha), así que se relee el lote con el módulo ``csv`` fila a fila.
+    Con ``text_column`` solo se convierte esa columna.
+    """
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always', ParserWarning)
+        if text_column is None:
+            frame = pd.read_csv(io.BytesIO(data), header=None, names=columns + [_EXTRA_COLUMN], index_col=False,
+                                on_bad_lines='warn')
+            extra = frame.pop(_EXTRA_COLUMN)
+        else:
+            # Con usecols el parser no comprueba los campos de cada fila: una
+            # primera fila vacía con un campo de más fija el ancho esperado
+            index = columns.index(text_column)
+            frame = pd.read_csv(io.BytesIO(b',' * len(columns) + b'\n' + data), header=None,
+                                usecols=[index, len(columns)], dtype={index: object}, on_bad_lines='warn',
+                                low_memory=False)
+            frame = frame.iloc[1:].reset_index(drop=True)
+            extra = frame.pop(len(columns))
+            frame.columns = [text_column]
+    if extra.isna().all() and not any(issubclass(w.category, ParserWarning) for w in caught):
+        return frame
+    reader = csv.reader(io.StringIO(data.decode('utf-8'), newline=''))
+    clean = io.StringIO()
+    writer = csv.writer(clean)
+    while True:
+        line = first_line + reader.line_num
+        row = next(reader, None)
+        if row is None:
+            break
+        if len(row) > len(columns):
+            handler(f"línea {line}: se esperaban {len(columns)} campos y hay {len(row)}")
+        else:
+            writer.writerow(row)
+    usecols = None if text_column is None else [text_column]
+    if not clean.tell():
+        return pd.DataFrame(columns=usecols or columns)
+    clean.seek(0)
+    return pd.read_csv(clean, header=None, names=columns, usecols=usecols, index_col=False,
+                       dtype=None if text_column is None else {text_column: object})
+
+
+def _jsonl_batches(buffer, text_column, batch_bytes, handler, validate):
+    reader = JsonFieldReader(text_column, validate)
+    line = 1
+    position = 0
+    while position < len(buffer):
+        end = _record_end(buffer, position, batch_bytes, quoted=False)
+        data = buffer[position:end]
+        texts = reader.read(data, handler, line)
+        line += data.count(b'\n')
+        position = end
+        if texts:
+            yield texts
+
+
+class JsonFieldReader:
+    """
+    Saca el valor de texto de una clave de cada línea de un tramo JSONL sin
+    decodificar el resto del registro.
+
+    Una expresión regular anclada al principio de línea reconoce la clave en el
+    primer nivel del objeto: antes de ella solo puede haber cadenas y valores
+    sin llaves ni corchetes. Si todas las líneas del tramo encajan y la clave
+    sale una vez por línea, el tramo entero se resuelve con un ``findall`` y un
+    solo ``decode``. Si no, se va línea a línea y las que no encajan (valores
+    nulos o numéricos, objetos anidados, claves repetidas...) se decodifican
+    con ``json.loads``. El camino rápido no valida los campos que siguen al
+    texto, solo que la línea termine cerrando el objeto; con ``validate`` no
+    se usa y todas las líneas pasan por ``json.loads``.
+    """
+
+    def __init__(self, key, validate=False):
+        self.key = key
+        self.validate = validate
+        self._token = json.dumps(key).encode('utf-8')
+        self._pattern = re.compile(
+            rb'^[ \t]*\{(?:[^"\n\\{}\[\]]+|"[^"\n\\]*")*?' + re.escape(self._token)
+            + rb'[ \t]*:[ \t]*"([^"\\\n]*(?:\\.[^"\\\n]*)*)"[^\n]*\}[ \t\r]*$', re.MULTILINE)
+        self._decode_string = json.JSONDecoder().decode
+
+    def read(self, data, on_bad_line=None, first_line=1):
+        """
+        Args:
+            data (bytes): Líneas JSON completas
+            on_bad_line (callable): Recibe el mensaje de cada línea que no es un
+                objeto JSON, que se descarta; sin ella se lanza la excepción
+            first_line (int): Número de la primera línea, para los mensajes
+        Returns:
+            list of str: Un texto por línea no vacía ('' si falta o es nulo)
+        """
+        if not self.validate:
+            values = self._pattern.findall(data)
+            lines = data.count(b'\n') + (not data.endswith(b'\n'))
+            if len(values) == lines == data.count(self._token):
+                return self._decode(values)
+        texts = []
+        for number, line in enumerate(data.split(b'\n'), first_line):
+            if not line.strip():
+                continue
+            try:
+                texts.append(self.read_line(line))
+            except ValueError as exc:
+                if on_bad_line is None:
+                    raise
+                on_bad_line(f"línea {number}: {exc}")
+        return texts
+
+    def read_line(self, line):
+        match = None if self.validate else self._pattern.match(line)
+        if match is not None and line.count(self._token) == 1:
+            return self._decode([match.group(1)])[0]
+        record = json.loads(line)
+        if not isinstance(record, dict):
+            raise ValueError("el registro no es un objeto JSON")
+        value = record.get(self.key)
+        return value if isinstance(value, str) else ('' if value is None else str(value))
+
+    def _decode(self, values):
+        # Un valor JSON no contiene saltos de línea sin escapar
+        texts = b'\n'.join(values).decode('utf-8').split('\n')
+        if len(texts) != len(values):  # Lista vacía
+            return []
+        for i, text in enumerate(texts):
+            if '\\' in text:
+                texts[i] = self._decode_string(f'"{text}"')
+        return texts
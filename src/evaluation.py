@@ -0,0 +1,160 @@
+"""
+Métricas de evaluación a partir de una matriz de confusión acumulada.
+
+Las etiquetas se codifican como enteros pequeños (el orden de
+``SENTIMENT_LABELS``) y cada trozo de reseñas etiquetadas suma sus conteos a
+la matriz con un solo ``bincount``. Exactitud, precisión, recall y F1 salen
+de la matriz, así que se puede evaluar un fichero de millones de filas por
+trozos y juntar resultados parciales con ``merge``.
+
+Los intervalos de confianza por bootstrap tampoco necesitan las filas:
+remuestrear N reseñas con reemplazo equivale a sacar los conteos de cada
+celda de una multinomial con las proporciones observadas.
+"""
+import numpy as np
+import pandas as pd
+
+from .sentiment_model import SENTIMENT_LABELS
+
+DEFAULT_RESAMPLES = 1000
+
+
+def encode_labels(values, labels=SENTIMENT_LABELS):
+    """
+    Códigos enteros (int8) de las etiquetas, en el orden de ``labels``.
+    Los enteros se aceptan tal cual si están en rango. El texto se factoriza
+    y solo se traducen los valores distintos, no las filas; con categóricos de
+    pandas ni siquiera hace falta factorizar.
+    """
+    if getattr(values, 'dtype', None) is None:
+        values = np.asarray(values)
+    if pd.api.types.is_integer_dtype(values.dtype):
+        values = np.asarray(values)
+        codes = np.where((values >= 0) & (values < len(labels)), values, -1).astype(np.int8)
+    else:
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            values = pd.Categorical(values)
+            raw, uniques = values.codes, values.categories
+        else:
+            raw, uniques = pd.factorize(values)
+        # El código -1 (nulo) cae en el -1 añadido al final
+        mapping = np.append(pd.Index(labels).get_indexer(uniques), -1).astype(np.int8)
+        codes = mapping[raw]
+    unknown = codes < 0
+    if unknown.any():
+        found = set(np.asarray(values, dtype=object)[unknown])
+        raise ValueError(f"Etiquetas desconocidas: {sorted(map(str, found))[:5]}")
+    return codes
+
+
+def metrics_from_confusion(confusion):
+    """
+    Métricas de una o muchas matrices de confusión (real en filas, predicción en
+    columnas). Acepta arrays (..., k, k) y devuelve arrays con la misma forma
+    inicial: 'accuracy' y 'macro_f1' (...) y 'precision', 'recall', 'f1' y
+    'support' (..., k).
+    """
+    confusion = np.asarray(confusion, dtype=float)
+    diagonal = np.diagonal(confusion, axis1=-2, axis2=-1)
+    support = confusion.sum(axis=-1)
+    predicted = confusion.sum(axis=-2)
+    total = support.sum(axis=-1)
+    zeros = np.zeros(diagonal.shape)
+    precision = np.divide(diagonal, predicted, out=zeros.copy(), where=predicted > 0)
+    recall = np.divide(diagonal, support, out=zeros.copy(), where=support > 0)
+    f1 = np.divide(2 * precision * recall, precision + recall, out=zeros.copy(),
+                   where=(precision + recall) > 0)
+    accuracy = np.divide(diagonal.sum(axis=-1), total, out=np.zeros(total.shape), where=total > 0)
+    return {'accuracy': accuracy, 'precision': precision, 'recall': recall, 'f1': f1,
+            'macro_f1': f1.mean(axis=-1), 'support': support}
+
+
+class EvaluationMetrics:
+    """
+    Matriz de confusión acumulada de las reseñas vistas hasta ahora.
+    Args:
+        labels (sequence of str): Etiquetas en el orden de los códigos
+    """
+
+    def __init__(self, labels=SENTIMENT_LABELS):
+        self.labels = tuple(labels)
+        self.confusion = np.zeros((len(self.labels), len(self.labels)), dtype=np.int64)
+
+    def update(self, true, predicted):
+        """Suma un trozo de etiquetas reales y predichas (texto o códigos)."""
+        k = len(self.labels)
+        cells = encode_labels(true, self.labels).astype(np.intp) * k + encode_labels(predicted, self.labels)
+        self.confusion += np.bincount(cells, minlength=k * k).reshape(k, k)
+        return self
+
+    def merge(self, other):
+        """Añade los conteos de otra evaluación con las mismas etiquetas."""
+        if self.labels != other.labels:
+            raise ValueError("Las evaluaciones tienen etiquetas distintas")
+        self.confusion += other.confusion
+        return self
+
+    @property
+    def rows(self):
+        return int(self.confusion.sum())
+
+    @property
+    def accuracy(self):
+        return float(metrics_from_confusion(self.confusion)['accuracy'])
+
+    def per_class(self):
+        """Precisión, recall, F1 y soporte de cada etiqueta."""
+        metrics = metrics_from_confusion(self.confusion)
+        frame = pd.DataFrame({name: metrics[name] for name in ('precision', 'recall', 'f1')},
+                             index=pd.Index(self.labels, name='sentiment'))
+        frame['support'] = self.confusion.sum(axis=1)
+        return frame
+
+    def confusion_frame(self):
+        return pd.DataFrame(self.confusion, index=pd.Index(self.labels, name='true'),
+                            columns=pd.Index(self.labels, name='predicted'))
+
+    def bootstrap(self, n_resamples=DEFAULT_RESAMPLES, confidence=0.95, seed=0):
+        """
+        Intervalos de confianza por bootstrap de la exactitud, el F1 macro y el F1 de
+        cada etiqueta, remuestreando los conteos de la matriz.
+        Returns:
+            pandas.DataFrame: Columnas 'estimate', 'low' y 'high', una fila por métrica
+        """
+        if self.rows == 0:
+            raise ValueError("No hay reseñas evaluadas")
+        rng = np.random.default_rng(seed)
+        counts = self.confusion.ravel()
+        samples = rng.multinomial(self.rows, counts / self.rows, size=n_resamples)
+        sampled = metrics_from_confusion(samples.reshape(n_resamples, *self.confusion.shape))
+        observed = metrics_from_confusion(self.confusion)
+        names = ['accuracy', 'macro_f1'] + [f'f1_{label}' for label in self.labels]
+        estimates = np.concatenate([[observed['accuracy'], observed['macro_f1']], observed['f1']])
+        draws = np.column_stack([sampled['accuracy'], sampled['macro_f1'], sampled['f1']])
+        alpha = (1 - confidence) / 2
+        low, high = np.quantile(draws, [alpha, 1 - alpha], axis=0)
+        return pd.DataFrame({'estimate': estimates, 'low': low, 'high': high}, index=pd.Index(names, name='metric'))
+
+
+def evaluate_chunks(chunks, text_column='review', label_column='true_sentiment',
+                    prediction_column=None, engine='lexicon'):
+    """
+    Evalúa un iterable de DataFrames etiquetados sin juntarlos en memoria.
+    Args:
+        chunks (iterable of pandas.DataFrame): Trozos con texto y etiqueta real
+        prediction_column (str): Si se da, usa esta columna como predicción en
+            lugar de analizar el texto
+        engine (str): Motor de ``score_texts`` con el que analizar el texto
+    Returns:
+        EvaluationMetrics: Conteos acumulados de todos los trozos
+    """
+    from .sentiment_model import score_texts
+
+    metrics = EvaluationMetrics()
+    for chunk in chunks:
+        if prediction_column is not None:
+            predicted = chunk[prediction_column].to_numpy()
+        else:
+            predicted = score_texts(chunk[text_column].fillna(''), engine)[1]
+        metrics.update(chunk[label_column].to_numpy(), predicted)
+    return metrics
@@ -0,0 +1,184 @@
+"""
+Modelo lineal sobre rasgos hasheados, alternativa de alto rendimiento a TextBlob.
+
+El texto normalizado se convierte en rasgos con un ``HashingVectorizer`` de
+scikit-learn, que no guarda vocabulario: no hay nada que ajustar y cualquier
+trozo se puede transformar por separado. Encima va un ``SGDClassifier`` con
+pérdida logística que se entrena con ``partial_fit``, así que el
+entrenamiento cabe en memoria aunque el corpus no quepa.
+
+El modelo se guarda en un ``.npz`` con los coeficientes en float32 y los
+parámetros del vectorizador; cargarlo no necesita pickle.
+
+Entrenar con un CSV etiquetado (o, sin etiquetas, imitando al motor de léxico):
+    python -m src.hashing_model train reviews.csv --label-column true_sentiment --output hashing.npz
+"""
+import argparse
+
+import numpy as np
+
+from .sentiment_model import SENTIMENT_LABELS, preprocess_texts
+
+DEFAULT_N_FEATURES = 2 ** 18
+DEFAULT_NGRAM_RANGE = (1, 2)
+DEFAULT_ALPHA = 1e-5
+# Palabras y también '!' y '?', que suelen reforzar la opinión
+TOKEN_PATTERN = r"(?u)\b\w+\b|[!?]"
+
+
+class HashingSentimentModel:
+    """
+    Clasificador Positivo/Neutral/Negativo sobre rasgos hasheados.
+    Args:
+        n_features (int): Columnas del espacio de rasgos hasheados
+        ngram_range (tuple): N-gramas de palabras a usar, como en scikit-learn
+        alpha (float): Regularización L2 del ``SGDClassifier``
+    """
+
+    def __init__(self, n_features=DEFAULT_N_FEATURES, ngram_range=DEFAULT_NGRAM_RANGE, alpha=DEFAULT_ALPHA):
+        self.n_features = n_features
+        self.ngram_range = tuple(ngram_range)
+        self.alpha = alpha
+        self.classes_ = None
+        self.coef_ = None
+        self.intercept_ = None
+        self._vectorizer = None
+        self._classifier = None
+
+    @property
+    def vectorizer(self):
+        if self._vectorizer is None:
+            from sklearn.feature_extraction.text import HashingVectorizer
+            self._vectorizer = HashingVectorizer(
+                n_features=self.n_features, ngram_range=self.ngram_range, token_pattern=TOKEN_PATTERN,
+                lowercase=False, alternate_sign=False, norm='l2', dtype=np.float32,
+            )
+        return self._vectorizer
+
+    def transform(self, texts, preprocessed=False):
+        """Matriz dispersa (CSR) de rasgos hasheados, una fila por texto."""
+        if not preprocessed:
+            texts = preprocess_texts(texts)
+        return self.vectorizer.transform(texts)
+
+    def partial_fit(self, texts, labels, preprocessed=False):
+        """
+        Ajusta el modelo con un lote más de textos etiquetados.
+        Args:
+            texts (sequence of str): Reseñas
+            labels (sequence of str): 'Positivo', 'Neutral' o 'Negativo' para cada reseña
+            preprocessed (bool): True si los textos ya pasaron por ``preprocess_text``
+        """
+        if self._classifier is None:
+            if self.coef_ is not None:
+                raise ValueError("Un modelo cargado de disco no se puede seguir entrenando")
+            from sklearn.linear_model import SGDClassifier
+            self._classifier = SGDClassifier(loss='log_loss', alpha=self.alpha, random_state=0)
+        self._classifier.partial_fit(self.transform(texts, preprocessed), np.asarray(labels, dtype=object),
+                                     classes=np.array(SENTIMENT_LABELS, dtype=object))
+        self.classes_ = self._classifier.classes_
+        self.coef_ = self._classifier.coef_
+        self.intercept_ = self._classifier.intercept_
+        return self
+
+    def fit_stream(self, chunks, text_column='review', label_column='sentiment', epochs=1):
+        """
+        Entrena fuera de memoria sobre un iterable de DataFrames. Con más de una
+        época, ``chunks`` debe poder recorrerse varias veces (p. ej. una lista
+        o una función que devuelva un iterador nuevo).
+        Returns:
+            int: Filas vistas en total
+        """
+        rows = 0
+        for _ in range(epochs):
+            for chunk in (chunks() if callable(chunks) else chunks):
+                self.partial_fit(chunk[text_column].astype(str).tolist(), chunk[label_column].tolist())
+                rows += len(chunk)
+        return rows
+
+    def predict_proba(self, texts, preprocessed=False):
+        """
+        Probabilidad de cada clase (columnas en el orden de ``classes_``). Igual que
+        ``SGDClassifier.predict_proba``: sigmoide por clase y normalización.
+        """
+        if self.coef_ is None:
+            raise ValueError("El modelo aún no está entrenado")
+        scores = self.transform(texts, preprocessed) @ self.coef_.T + self.intercept_
+        proba = 1.0 / (1.0 + np.exp(-np.asarray(scores, dtype=float)))
+        total = proba.sum(axis=1, keepdims=True)
+        return np.divide(proba, total, out=np.full_like(proba, 1.0 / proba.shape[1]), where=total > 0)
+
+    def predict(self, texts, preprocessed=False):
+        """
+        Analiza muchas reseñas de una vez, con el mismo esquema que ``score_texts``.
+        La polaridad es P(Positivo) - P(Negativo), entre -1 y 1.
+        Returns:
+            tuple: (polaridades, sentimientos) como arrays de NumPy
+        """
+        proba = self.predict_proba(texts, preprocessed)
+        classes = list(self.classes_)
+        polarity = proba[:, classes.index('Positivo')] - proba[:, classes.index('Negativo')]
+        sentiment = np.asarray(self.classes_, dtype=object)[proba.argmax(axis=1)]
+        return polarity, sentiment
+
+    def save(self, path):
+        if self.coef_ is None:
+            raise ValueError("El modelo aún no está entrenado")
+        np.savez_compressed(
+            path,
+            coef=self.coef_.astype(np.float32),
+            intercept=self.intercept_.astype(np.float32),
+            classes=np.asarray(self.classes_, dtype=str),
+            n_features=self.n_features,
+            ngram_range=np.asarray(self.ngram_range),
+            alpha=self.alpha,
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            model = cls(int(data['n_features']), tuple(int(n) for n in data['ngram_range']), float(data['alpha']))
+            model.coef_ = data['coef']
+            model.intercept_ = data['intercept']
+            model.classes_ = data['classes'].astype(object)
+        return model
+
+
+def _labeled_chunks(path, text_column, label_column, chunksize, engine):
+    """Trozos del CSV con etiqueta; sin ``label_column`` las pone el motor ``engine``."""
+    from .data_loader import iter_reviews
+    from .sentiment_model import score_texts
+
+    for chunk in iter_reviews(path, chunksize):
+        chunk = chunk.dropna(subset=[text_column])
+        if label_column not in chunk:
+            chunk = chunk.assign(**{label_column: score_texts(chunk[text_column], engine)[1]})
+        yield chunk
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Entrena el modelo de rasgos hasheados.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    train = subparsers.add_parser('train', help="Entrena con un CSV y guarda el modelo")
+    train.add_argument('input')
+    train.add_argument('--output', required=True, help="Fichero .npz del modelo")
+    train.add_argument('--text-column', default='review')
+    train.add_argument('--label-column', default='sentiment',
+                       help="Si el CSV no la tiene, las etiquetas las pone --teacher")
+    train.add_argument('--teacher', choices=['lexicon', 'textblob'], default='lexicon')
+    train.add_argument('--chunksize', type=int, default=50_000)
+    train.add_argument('--epochs', type=int, default=1)
+    train.add_argument('--n-features', type=int, default=DEFAULT_N_FEATURES)
+    args = parser.parse_args(argv)
+
+    model = HashingSentimentModel(n_features=args.n_features)
+    rows = model.fit_stream(
+        lambda: _labeled_chunks(args.input, args.text_column, args.label_column, args.chunksize, args.teacher),
+        args.text_column, args.label_column, epochs=args.epochs,
+    )
+    model.save(args.output)
+    print(f"Modelo entrenado con {rows} filas -> {args.output}")
+
+
+if __name__ == '__main__':
+    main()
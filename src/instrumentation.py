@@ -0,0 +1,163 @@
+"""
+Instrumentación opcional del camino caliente de ``sentiment_model``.
+
+Mientras no haya un ``Recorder`` activo, las funciones instrumentadas solo
+comprueban ``instrumentation.active is None`` y siguen: el coste es una
+consulta de atributo por llamada. Con uno activo se acumulan, por etapa, el
+tiempo y el número de llamadas, además de contadores, un histograma de
+longitudes de reseña y los aciertos de la caché de ``analyze_sentiment``.
+
+    with recording() as recorder:
+        batch_analyze(df)
+    print(recorder.to_prometheus())
+
+Las etapas se anidan: 'batch_analyze' incluye el tiempo de 'preprocess',
+'textblob', 'keywords' y 'pandas' que ocurren dentro de ella. Con ``n_jobs``
+mayor que 1 solo se registra lo que pasa en el proceso principal.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Límites superiores (en caracteres) de los cubos del histograma de longitudes
+LENGTH_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096)
+
+# Recorder activo, o None si la instrumentación está apagada
+active = None
+
+
+class Recorder:
+    """
+    Acumula las medidas de una ejecución. Las actualizaciones toman un cerrojo,
+    así que un mismo ``Recorder`` se puede compartir entre hilos.
+    """
+
+    clock = staticmethod(time.perf_counter)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Pone a cero todas las medidas."""
+        self.timers = {}  # etapa -> [llamadas, segundos]
+        self.counters = {}
+        self.length_buckets = [0] * (len(LENGTH_BUCKETS) + 1)
+        self.length_sum = 0
+
+    def observe(self, stage, start):
+        """Suma a ``stage`` el tiempo transcurrido desde ``start`` (tomado con ``clock``)."""
+        elapsed = self.clock() - start
+        with self._lock:
+            timer = self.timers.get(stage)
+            if timer is None:
+                self.timers[stage] = [1, elapsed]
+            else:
+                timer[0] += 1
+                timer[1] += elapsed
+
+    def count(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe_length(self, length):
+        """Anota la longitud (en caracteres) de una reseña."""
+        with self._lock:
+            self.length_buckets[bisect_left(LENGTH_BUCKETS, length)] += 1
+            self.length_sum += length
+
+    def record_cache(self, lookups, misses):
+        """Anota ``lookups`` consultas a la caché, de las que ``misses`` fallaron."""
+        self.count('cache_hits', lookups - misses)
+        self.count('cache_misses', misses)
+
+    def as_dict(self):
+        """
+        Copia de las medidas como diccionario serializable a JSON.
+        Returns:
+            dict: 'stages' (llamadas y segundos por etapa), 'counters',
+                'review_length' (histograma acumulado; el último cubo es '+Inf')
+                y 'cache' (aciertos, fallos y tasa de aciertos)
+        """
+        with self._lock:
+            stages = {name: {'calls': calls, 'seconds': seconds}
+                      for name, (calls, seconds) in self.timers.items()}
+            counters = dict(self.counters)
+            buckets = list(self.length_buckets)
+            length_sum = self.length_sum
+        cumulative, running = [], 0
+        for bound, n in zip(LENGTH_BUCKETS + ('+Inf',), buckets):
+            running += n
+            cumulative.append((bound, running))
+        hits = counters.get('cache_hits', 0)
+        misses = counters.get('cache_misses', 0)
+        return {
+            'stages': stages,
+            'counters': counters,
+            'review_length': {'buckets': cumulative, 'count': running, 'sum': length_sum},
+            'cache': {
+                'hits': hits,
+                'misses': misses,
+                'hit_rate': hits / (hits + misses) if hits + misses else None,
+            },
+        }
+
+    def to_prometheus(self, prefix='sentiment'):
+        """Las mismas medidas en el formato de texto de exposición de Prometheus."""
+        data = self.as_dict()
+        lines = [
+            f'# HELP {prefix}_stage_seconds_total Tiempo acumulado por etapa.',
+            f'# TYPE {prefix}_stage_seconds_total counter',
+        ]
+        for stage, values in sorted(data['stages'].items()):
+            lines.append(f'{prefix}_stage_seconds_total{{stage="{stage}"}} {values["seconds"]!r}')
+        lines += [
+            f'# HELP {prefix}_stage_calls_total Llamadas por etapa.',
+            f'# TYPE {prefix}_stage_calls_total counter',
+        ]
+        for stage, values in sorted(data['stages'].items()):
+            lines.append(f'{prefix}_stage_calls_total{{stage="{stage}"}} {values["calls"]}')
+        for name, value in sorted(data['counters'].items()):
+            lines += [f'# TYPE {prefix}_{name}_total counter', f'{prefix}_{name}_total {value}']
+        lines += [
+            f'# HELP {prefix}_review_length_chars Longitud de las reseñas en caracteres.',
+            f'# TYPE {prefix}_review_length_chars histogram',
+        ]
+        for bound, running in data['review_length']['buckets']:
+            lines.append(f'{prefix}_review_length_chars_bucket{{le="{bound}"}} {running}')
+        lines.append(f'{prefix}_review_length_chars_sum {data["review_length"]["sum"]}')
+        lines.append(f'{prefix}_review_length_chars_count {data["review_length"]["count"]}')
+        if data['cache']['hit_rate'] is not None:
+            lines += [f'# TYPE {prefix}_cache_hit_ratio gauge',
+                      f'{prefix}_cache_hit_ratio {data["cache"]["hit_rate"]!r}']
+        return '\n'.join(lines) + '\n'
+
+
+def enable(recorder=None):
+    """Activa la instrumentación con ``recorder`` (o uno nuevo) y lo devuelve."""
+    global active
+    active = recorder if recorder is not None else Recorder()
+    return active
+
+
+def disable():
+    """Apaga la instrumentación y devuelve el ``Recorder`` que estaba activo."""
+    global active
+    recorder, active = active, None
+    return recorder
+
+
+@contextmanager
+def recording(recorder=None):
+    """
+    Activa la instrumentación dentro del bloque ``with`` y restaura después la
+    que hubiera antes.
+    """
+    global active
+    previous = active
+    current = enable(recorder)
+    try:
+        yield current
+    finally:
+        active = previous
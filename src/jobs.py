@@ -0,0 +1,270 @@
+"""
+Trabajos por lotes reanudables: el CSV se reparte en fragmentos por rangos de bytes.
+
+Cada fragmento es un rango [inicio, fin) del fichero que empieza y acaba en un
+salto de línea fuera de comillas, así que no hace falta partir el CSV antes:
+cada proceso lee su rango, lo analiza y escribe un fichero de salida propio
+(``part-00000.parquet``...). La salida se escribe con otro nombre y se
+renombra al terminar, de modo que un fichero ``part-*`` siempre está completo.
+Todas las columnas se leen como texto, así que todas las salidas tienen el
+mismo esquema y se pueden leer juntas.
+
+El proceso principal apunta cada fragmento terminado en ``manifest.json``.
+Si el trabajo se interrumpe, al relanzarlo con la misma carpeta de salida se
+saltan los fragmentos ya hechos. Si la entrada, los parámetros o la
+configuración del modelo han cambiado, el manifiesto no vale y hay que usar
+``restart=True``.
+
+Uso:
+    python -m src.jobs reviews.csv --output-dir scored/ --shard-mb 64 --workers 8
+"""
+import argparse
+import io
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from . import sentiment_model
+from .parallel import _init_worker, _worker_initargs, resolve_n_jobs
+from .pipeline import open_writer
+from .score_store import model_version
+from .sentiment_model import ENGINES, batch_analyze
+
+DEFAULT_SHARD_BYTES = 64 * 2 ** 20
+MANIFEST_NAME = 'manifest.json'
+MANIFEST_FORMAT = 1
+_BLOCK_SIZE = 2 ** 20
+
+
+def plan_shards(path, shard_bytes=DEFAULT_SHARD_BYTES):
+    """
+    Reparte un CSV en rangos de unos ``shard_bytes`` bytes que acaban en fin de
+    fila. Se lee el fichero una vez contando comillas, para no cortar un campo
+    entre comillas que contenga saltos de línea.
+    Returns:
+        tuple: (cabecera en bytes, lista de rangos (inicio, fin))
+    """
+    if shard_bytes < 1:
+        raise ValueError("shard_bytes debe ser al menos 1")
+    size = os.path.getsize(path)
+    with open(path, 'rb') as handle:
+        header = handle.readline()
+        boundaries = [len(header)]
+        target = len(header) + shard_bytes
+        position, quoted = len(header), 0
+        while target < size:
+            block = handle.read(_BLOCK_SIZE)
+            if not block:
+                break
+            search = max(target - position, 0)
+            while search < len(block):
+                newline = block.find(b'\n', search)
+                if newline < 0:
+                    break
+                # Las comillas dobles escapadas ("") no cambian la paridad
+                if (quoted + block.count(b'"', 0, newline)) % 2 == 0:
+                    boundaries.append(position + newline + 1)
+                    target = boundaries[-1] + shard_bytes
+                    search = max(target - position, newline + 1)
+                else:
+                    search = newline + 1
+            quoted = (quoted + block.count(b'"')) % 2
+            position += len(block)
+    if boundaries[-1] < size:
+        boundaries.append(size)
+    return header, list(zip(boundaries[:-1], boundaries[1:]))
+
+
+def _read_options(header, text_column):
+    """
+    Opciones de ``pd.read_csv`` para todos los fragmentos, sacadas solo de la
+    cabecera. Si cada fragmento dedujera sus tipos, uno con una columna vacía o
+    toda numérica daría otro esquema que sus vecinos y los ``part-*`` no se
+    podrían leer juntos, así que todas las columnas se leen como texto. En la
+    de reseñas un campo vacío es '' y en las demás, nulo.
+    """
+    columns = pd.read_csv(io.BytesIO(header), nrows=0).columns
+    if text_column not in columns:
+        raise ValueError(f"no hay ninguna columna {text_column!r}")
+    return {'dtype': dict.fromkeys(columns, str), 'keep_default_na': False,
+            'na_values': {column: [''] for column in columns if column != text_column}}
+
+
+def _score_shard(input_path, header, start, end, output_path, text_column, engine, compact, output_format):
+    """Analiza un fragmento en un proceso del pool y publica su salida de forma atómica."""
+    began = time.perf_counter()
+    with open(input_path, 'rb') as handle:
+        handle.seek(start)
+        data = handle.read(end - start)
+    frame = pd.read_csv(io.BytesIO(header + data), **_read_options(header, text_column))
+    scored = batch_analyze(frame, text_column, engine=engine, compact=compact)
+    partial_path = output_path + '.partial'
+    writer = open_writer(partial_path, output_format)
+    try:
+        writer.write(scored)
+    finally:
+        writer.close()
+    os.replace(partial_path, output_path)
+    return len(scored), time.perf_counter() - began, os.getpid()
+
+
+def _write_manifest(path, manifest):
+    partial_path = path + '.partial'
+    with open(partial_path, 'w', encoding='utf-8') as handle:
+        json.dump(manifest, handle, indent=1)
+    os.replace(partial_path, path)
+
+
+def run_job(input_path, output_dir, text_column='review', engine='lexicon', shard_bytes=DEFAULT_SHARD_BYTES,
+            n_jobs=-1, output_format='parquet', compact=False, restart=False, progress=None):
+    """
+    Analiza un CSV por fragmentos en un pool de procesos, reanudando si ya hay
+    un manifiesto compatible en ``output_dir``.
+    Args:
+        input_path (str): CSV de entrada
+        output_dir (str): Carpeta para los ficheros ``part-*`` y el manifiesto
+        text_column (str): Nombre de la columna que contiene los textos
+        engine (str): Motor de ``batch_analyze``
+        shard_bytes (int): Tamaño aproximado de cada fragmento en bytes
+        n_jobs (int): Procesos a usar; -1 usa todos los núcleos
+        output_format (str): 'parquet' o 'csv'
+        compact (bool): Columnas compactas, como en ``batch_analyze``
+        restart (bool): Descarta el manifiesto y las salidas anteriores
+        progress (callable): Se llama con un dict por cada fragmento terminado
+    Returns:
+        dict: 'shards', 'skipped', 'rows', 'seconds', 'outputs' (en orden) y
+            'workers' (pid -> fragmentos, filas, segundos y filas/s)
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Motor de análisis desconocido: {engine!r}")
+    if output_format not in ('parquet', 'csv'):
+        raise ValueError(f"Formato de salida desconocido: {output_format!r}")
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    stat = os.stat(input_path)
+    job = {
+        'input': os.path.abspath(input_path),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'shard_bytes': shard_bytes,
+        'text_column': text_column,
+        'engine': engine,
+        'scorer': sentiment_model.SCORER,
+        'output_format': output_format,
+        'compact': compact,
+        'model_version': model_version(),
+    }
+
+    manifest = None
+    if os.path.exists(manifest_path) and not restart:
+        with open(manifest_path, encoding='utf-8') as handle:
+            manifest = json.load(handle)
+        if manifest.get('format') != MANIFEST_FORMAT or manifest['job'] != job:
+            raise ValueError(f"El manifiesto de {output_dir} es de otro trabajo (entrada, parámetros o "
+                             "modelo distintos): usa otra carpeta o restart=True")
+    for name in os.listdir(output_dir):
+        # Salidas a medias de una ejecución que se cortó; al reanudar se rehacen
+        if name.startswith('part-') and name.endswith('.partial'):
+            os.remove(os.path.join(output_dir, name))
+    if manifest is None:
+        for name in os.listdir(output_dir):
+            if name.startswith('part-') or name == MANIFEST_NAME:
+                os.remove(os.path.join(output_dir, name))
+        header, ranges = plan_shards(input_path, shard_bytes)
+        manifest = {'format': MANIFEST_FORMAT, 'job': job, 'header': header.decode('latin-1'),
+                    'shards': [{'start': start, 'end': end, 'done': False} for start, end in ranges]}
+        _write_manifest(manifest_path, manifest)
+    header = manifest['header'].encode('latin-1')
+    try:
+        _read_options(header, text_column)
+    except ValueError as exc:
+        raise ValueError(f"{input_path}: {exc}") from None
+
+    extension = 'parquet' if output_format == 'parquet' else 'csv'
+    outputs = [os.path.join(output_dir, f'part-{i:05d}.{extension}') for i in range(len(manifest['shards']))]
+    pending = [i for i, shard in enumerate(manifest['shards'])
+               if not (shard['done'] and os.path.exists(outputs[i]))]
+    workers = {}
+    rows = 0
+    began = time.perf_counter()
+    if pending:
+        n_workers = min(resolve_n_jobs(n_jobs), len(pending))
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker,
+                                 initargs=_worker_initargs(engine)) as pool:
+            futures = {
+                pool.submit(_score_shard, input_path, header, manifest['shards'][i]['start'],
+                            manifest['shards'][i]['end'], outputs[i], text_column, engine, compact,
+                            output_format): i
+                for i in pending
+            }
+            error = None
+            for future in as_completed(futures):
+                i = futures[future]
+                if future.cancelled():
+                    continue
+                try:
+                    shard_rows, seconds, pid = future.result()
+                except Exception as exc:
+                    # Se cancela lo que no ha empezado, pero lo que ya está en marcha se
+                    # apunta al terminar para no repetirlo al reanudar
+                    if error is None:
+                        error = exc
+                        for other in futures:
+                            other.cancel()
+                    continue
+                manifest['shards'][i].update(done=True, rows=shard_rows, seconds=round(seconds, 3), worker=pid)
+                _write_manifest(manifest_path, manifest)
+                rows += shard_rows
+                stats = workers.setdefault(pid, {'shards': 0, 'rows': 0, 'seconds': 0.0})
+                stats['shards'] += 1
+                stats['rows'] += shard_rows
+                stats['seconds'] += seconds
+                stats['rows_per_s'] = stats['rows'] / stats['seconds'] if stats['seconds'] else 0.0
+                if progress is not None:
+                    done = sum(shard['done'] for shard in manifest['shards'])
+                    progress({'shard': i, 'rows': shard_rows, 'seconds': seconds, 'worker': pid,
+                              'done': done, 'total': len(manifest['shards'])})
+            if error is not None:
+                raise error
+    return {
+        'shards': len(manifest['shards']),
+        'skipped': len(manifest['shards']) - len(pending),
+        'rows': rows,
+        'seconds': time.perf_counter() - began,
+        'outputs': outputs,
+        'workers': workers,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analiza un CSV grande por fragmentos, con reanudación.")
+    parser.add_argument('input')
+    parser.add_argument('--output-dir', required=True)
+    parser.add_argument('--text-column', default='review')
+    parser.add_argument('--engine', choices=ENGINES, default='lexicon')
+    parser.add_argument('--shard-mb', type=float, default=DEFAULT_SHARD_BYTES / 2 ** 20)
+    parser.add_argument('--workers', type=int, default=-1)
+    parser.add_argument('--format', choices=['parquet', 'csv'], default='parquet')
+    parser.add_argument('--compact', action='store_true')
+    parser.add_argument('--restart', action='store_true', help="Descarta el progreso guardado")
+    args = parser.parse_args(argv)
+
+    def progress(event):
+        print(f"[{event['done']}/{event['total']}] fragmento {event['shard']}: {event['rows']:,} filas en "
+              f"{event['seconds']:.1f} s ({event['rows'] / max(event['seconds'], 1e-9):,.0f} filas/s, "
+              f"proceso {event['worker']})")
+
+    report = run_job(args.input, args.output_dir, args.text_column, args.engine, int(args.shard_mb * 2 ** 20),
+                     args.workers, args.format, args.compact, args.restart, progress)
+    print(f"{report['shards']} fragmentos ({report['skipped']} ya hechos), {report['rows']:,} filas "
+          f"nuevas en {report['seconds']:.1f} s")
+    for pid, stats in sorted(report['workers'].items()):
+        print(f"  proceso {pid}: {stats['shards']} fragmentos, {stats['rows']:,} filas, "
+              f"{stats['rows_per_s']:,.0f} filas/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,510 @@
+"""
+Motor vectorizado de polaridad para lotes grandes de reseñas.
+
+Reproduce el analizador de patrones que TextBlob usa por defecto, pero en
+lugar de crear un objeto TextBlob por reseña carga el léxico una sola vez en
+tablas compactas de NumPy y puntúa columnas enteras de golpe.
+
+Sobre el texto ya limpiado por ``preprocess_text`` el resultado coincide con
+``analyze_sentiment`` salvo errores de redondeo (tolerancia documentada:
+``POLARITY_TOLERANCE``).
+
+Los mismos códigos de token sirven para puntuar cada frase y cada aspecto de
+la reseña (``score_aspects``): las palabras de los aspectos, las palabras clave
+sueltas y los signos que cortan frases tienen código propio, así que no hace
+falta volver a tokenizar.
+"""
+import numpy as np
+
+from . import sentiment_model
+from .keyword_matcher import tokenize
+from .sentiment_model import (
+    preprocess_text,
+    preprocess_texts,
+    combine_polarity,
+    domain_polarity_of,
+    get_pattern_lexicon,
+)
+
+# Diferencia máxima admitida frente a analyze_sentiment. Solo aparece cuando
+# varios '!' seguidos refuerzan una palabra (1.25**k frente a k productos).
+POLARITY_TOLERANCE = 1e-9
+
+# Clases para los tokens que no están en el léxico. Se guardan al final de la
+# tabla, después de las palabras conocidas y de los emoticonos.
+_SHORT, _EXCLAMATION, _TWO_CHARS, _LONG, _NEGATION_SHORT, _NEGATION_LONG = range(6)
+
+# Estado del analizador antes de cada token: (modificador, negación) -> m * 2 + n
+# m: 0 sin modificador, 1 modificador, 2 modificador terminado en "-ly"
+_N_STATES = 6
+
+# Lo que corta cada token en el análisis por aspectos
+_NO_BREAK, _CLAUSE, _SENTENCE = range(3)
+_SENTENCE_BREAKS = ('.', '!', '?', '..', '...')
+_CLAUSE_BREAKS = (',', 'but', 'although', 'though', 'however', 'whereas')
+
+
+def _transition(known, is_modifier, is_ly, is_negation, length, m, n):
+    """
+    Aplica a un estado abstracto las reglas de ``Sentiment.assessments`` de
+    pattern. Devuelve el nuevo estado y si la negación se aplicó sobre el
+    modificador anterior ("really not good").
+    """
+    if known:
+        m = (2 if is_ly else 1) if is_modifier else 0
+        n = 1 if is_negation else 0
+        return m * 2 + n, False
+    fired = False
+    if is_negation:
+        n = 1
+    elif n and length > 1:
+        n = 0
+    if n and m == 2:
+        fired = True
+        n = 0
+    elif m and length > 2:
+        m = 0
+    return m * 2 + n, fired
+
+
+class LexiconEngine:
+    """
+    Puntúa muchas reseñas a la vez con el léxico de pattern precompilado.
+    Crear el motor es lo caro (carga del léxico); reutilízalo con
+    ``get_default_engine``.
+    Args:
+        lexicon (lexicon_snapshot.PatternLexicon): Léxico a usar; por defecto
+            el de ``sentiment_model.get_pattern_lexicon``
+    """
+
+    def __init__(self, lexicon=None, max_cached_chunks=500_000, batch_size=100_000):
+        self.lexicon = lexicon if lexicon is not None else get_pattern_lexicon()
+        self.max_cached_chunks = max_cached_chunks
+        self.batch_size = batch_size
+        self._tokenizer = self.lexicon.tokenize
+        self._negations = self.lexicon.negations
+        self._sources = _aspect_sources()
+        self._build_tables()
+        # Trozo separado por espacios -> códigos de token
+        self._chunk_cache = {}
+
+    def _build_tables(self):
+        """Convierte el léxico de pattern en arrays indexados por código de token."""
+        words = sorted(self.lexicon.words)
+        emoticons = sorted(self.lexicon.emoticons)
+        n_words = len(words)
+        # Los emoticonos abren siempre una valoración nueva que nunca se niega,
+        # pero para modificadores y negaciones cuentan como palabras desconocidas
+        n_known = n_words + len(emoticons)
+        self._vocab = {w: i for i, w in enumerate(words + emoticons)}
+        self._n_words = n_words
+        self._n_known = n_known
+        # Palabras que pattern no conoce pero que el análisis por aspectos tiene
+        # que distinguir: llevan código propio, detrás de las clases de desconocidas
+        extra = sorted(self._aspect_tokens() - self._vocab.keys() - {'!'})
+        self._vocab.update((token, code) for code, token in enumerate(extra, start=n_known + 6))
+        n_codes = n_known + 6 + len(extra)
+        self._polarity = np.zeros(n_codes)
+        self._intensity = np.ones(n_codes)
+        self._transitions = np.zeros((n_codes, _N_STATES), dtype=np.int8)
+        self._ly_fire = np.zeros((n_codes, _N_STATES), dtype=bool)
+        for code, word in enumerate(words):
+            polarity, intensity, is_modifier, is_ly = self.lexicon.words[word]
+            self._polarity[code] = polarity
+            self._intensity[code] = intensity
+            self._fill_row(code, True, is_modifier, is_ly, word in self._negations, len(word))
+        for code, emoticon in enumerate(emoticons, start=n_words):
+            self._polarity[code] = self.lexicon.emoticons[emoticon]
+            self._fill_row(code, False, False, False, False, len(emoticon))
+        unknown = {
+            _SHORT: (False, 1), _EXCLAMATION: (False, 1), _TWO_CHARS: (False, 2),
+            _LONG: (False, 3), _NEGATION_SHORT: (True, 2), _NEGATION_LONG: (True, 3),
+        }
+        for kind, (is_negation, length) in unknown.items():
+            self._fill_row(n_known + kind, False, False, False, is_negation, length)
+        for code, token in enumerate(extra, start=n_known + 6):
+            self._fill_row(code, False, False, False, token in self._negations, len(token))
+        self._exclamation = n_known + _EXCLAMATION
+        self._build_aspect_tables(n_codes)
+
+    def _aspect_tokens(self):
+        positive, negative, negations, aspects = self._sources
+        words = set().union(positive, negative, negations, *aspects.values())
+        return {w for w in words if ' ' not in w} | set(_SENTENCE_BREAKS) | set(_CLAUSE_BREAKS)
+
+    def _build_aspect_tables(self, n_codes):
+        """Qué aspecto menciona cada código, si es palabra clave o negación y qué corta."""
+        positive, negative, negations, aspects = self._sources
+        vocab = self._vocab
+        self.aspects = tuple(aspects)
+        self._aspect = np.full(n_codes, -1, dtype=np.int8)
+        # Al revés, para que una palabra de dos aspectos se quede con el primero
+        for i in reversed(range(len(self.aspects))):
+            self._aspect[[vocab[w] for w in aspects[self.aspects[i]] if w in vocab]] = i
+        self._keyword_sign = np.zeros(n_codes, dtype=np.int8)
+        self._keyword_sign[[vocab[w] for w in positive if w in vocab]] = 1
+        self._keyword_sign[[vocab[w] for w in negative if w in vocab]] = -1
+        self._domain_negation = np.zeros(n_codes, dtype=bool)
+        self._domain_negation[[vocab[w] for w in negations if w in vocab]] = True
+        self._break = np.zeros(n_codes, dtype=np.int8)
+        self._break[[vocab[t] for t in _CLAUSE_BREAKS]] = _CLAUSE
+        self._break[[vocab[t] for t in _SENTENCE_BREAKS if t != '!']] = _SENTENCE
+        self._break[self._exclamation] = _SENTENCE
+        self._marked = (self._break != _NO_BREAK) | (self._keyword_sign != 0) | self._domain_negation | \
+            (self._aspect >= 0)
+
+    def _fill_row(self, code, known, is_modifier, is_ly, is_negation, length):
+        for state in range(_N_STATES):
+            nxt, fired = _transition(known, is_modifier, is_ly, is_negation, length,
+                                     state // 2, state % 2)
+            self._transitions[code, state] = nxt
+            self._ly_fire[code, state] = fired
+
+    def _token_code(self, token):
+        code = self._vocab.get(token)
+        if code is not None:
+            return code
+        if token == '!':
+            kind = _EXCLAMATION
+        elif token in self._negations:
+            kind = _NEGATION_LONG if len(token) > 2 else _NEGATION_SHORT
+        elif len(token) <= 1:
+            kind = _SHORT
+        else:
+            kind = _TWO_CHARS if len(token) == 2 else _LONG
+        return self._n_known + kind
+
+    def _encode_chunk(self, chunk):
+        # El tokenizador de pattern solo separa puntuación dentro de cada trozo,
+        # así que tokenizar trozo a trozo da la misma secuencia que el texto
+        # entero. Con el de las palabras clave pasa lo mismo, y sus tokens se
+        # guardan al lado para que el autómata no tenga que volver a partir el texto.
+        entry = (tuple(self._token_code(t) for t in self._tokenizer(chunk)), tokenize(chunk))
+        if len(self._chunk_cache) >= self.max_cached_chunks:
+            self._chunk_cache.clear()
+        self._chunk_cache[chunk] = entry
+        return entry
+
+    def _encode(self, texts, preprocessed=False):
+        """
+        Texto -> códigos de token planos, longitudes y polaridad del dominio.
+        La polaridad del dominio sale del autómata de palabras clave, que ya
+        recorre cada texto en una sola pasada, sobre los tokens de la caché.
+        """
+        cache = self._chunk_cache
+        if not preprocessed:
+            texts = preprocess_texts(texts)
+        codes = []
+        lengths = np.zeros(len(texts), dtype=np.int64)
+        domain = np.zeros(len(texts))
+        for row, text in enumerate(texts):
+            start = len(codes)
+            tokens = []
+            for chunk in text.split():
+                entry = cache.get(chunk)
+                if entry is None:
+                    entry = self._encode_chunk(chunk)
+                codes.extend(entry[0])
+                tokens.extend(entry[1])
+            lengths[row] = len(codes) - start
+            domain[row] = domain_polarity_of(text, tokens)
+        return np.array(codes, dtype=np.int32), lengths, domain
+
+    def _pattern_polarity(self, codes, lengths):
+        """Equivalente vectorizado de ``TextBlob(texto).sentiment.polarity``."""
+        _, rows, values = self._assessments(codes, lengths)
+        return _group_means(rows, values, len(lengths))
+
+    def _assessments(self, codes, lengths):
+        """
+        Valoraciones de pattern de un bloque de reseñas. La polaridad de cada
+        reseña es la media de las suyas.
+        Returns:
+            tuple: (posición en ``codes`` de la última palabra de cada valoración,
+                reseña a la que pertenece, polaridad final)
+        """
+        n_rows = len(lengths)
+        n_tokens = len(codes)
+        nothing = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0))
+        if n_tokens == 0:
+            return nothing
+        ends = np.cumsum(lengths)
+        starts = ends - lengths
+        row_of = np.repeat(np.arange(n_rows), lengths)
+
+        # Estado tras cada token: composición prefija de las tablas de transición
+        # (duplicando el paso). El primer token de cada reseña parte del estado 0,
+        # así que se convierte en una función constante que corta la cadena.
+        trans = self._transitions[codes]
+        first = starts[lengths > 0]
+        trans[first] = trans[first, :1]
+        step = 1
+        while step < lengths.max():
+            trans[step:] = np.take_along_axis(trans[step:], trans[:-step], axis=1)
+            step *= 2
+        before = np.empty(n_tokens, dtype=np.int8)
+        before[1:] = trans[:-1, 0]
+        before[first] = 0
+        m_before = before >> 1
+        n_before = before & 1
+
+        known = codes < self._n_known
+        kpos = np.flatnonzero(known)
+        if len(kpos) == 0:
+            return nothing
+        kcodes = codes[kpos]
+        emoticon = kcodes >= self._n_words
+        starts_new = (m_before[kpos] == 0) | emoticon
+        negated_before = (n_before[kpos] == 1) & ~emoticon
+        intensity = self._intensity[kcodes]
+        intensity = np.where(negated_before, 1.0 / intensity, intensity)
+
+        # Una palabra precedida de modificador se une a la valoración anterior
+        # ("very good"): su polaridad se multiplica por la intensidad del modificador.
+        p = self._polarity[kcodes]
+        merged = np.flatnonzero(~starts_new)
+        p[merged] = np.clip(p[merged] * intensity[merged - 1], -1.0, 1.0)
+
+        assessment = np.cumsum(starts_new) - 1
+        n_assessments = int(assessment[-1]) + 1
+        is_last = np.ones(len(kpos), dtype=bool)
+        is_last[:-1] = assessment[1:] != assessment[:-1]
+
+        # Cada '!' entre la última palabra de una valoración y la siguiente
+        # palabra conocida de la reseña refuerza la polaridad un 25 %.
+        exclamations = np.cumsum(codes == self._exclamation)
+        upper = np.empty(len(kpos), dtype=np.int64)
+        upper[:-1] = kpos[1:]
+        upper[-1] = n_tokens
+        upper = np.minimum(upper, ends[row_of[kpos]])
+        boosts = exclamations[upper - 1] - exclamations[kpos]
+        boosted = np.flatnonzero(is_last & (boosts > 0))
+        p[boosted] = np.clip(p[boosted] * 1.25 ** boosts[boosted], -1.0, 1.0)
+
+        # "not good" = algo malo, "not bad" = algo bueno
+        negated = np.zeros(n_assessments, dtype=bool)
+        negated[assessment[negated_before]] = True
+        fired = np.flatnonzero(self._ly_fire[codes, before])
+        if len(fired):
+            # La negación se aplica antes de que un emoticono abra su valoración
+            last_known = np.cumsum(known)[fired] - 1 - known[fired]
+            negated[assessment[last_known]] = True
+        final = p[is_last]
+        final = np.where(negated, final * -0.5, final)
+        positions = kpos[is_last]
+        return positions, row_of[positions], final
+
+    def _aspect_scores(self, codes, lengths, sentences=False):
+        """
+        Reparte las valoraciones de pattern y las palabras clave sueltas del
+        dominio entre los aspectos: cada una va a la mención más cercana de la
+        misma frase, mejor si está en la misma cláusula ("the location was
+        convenient but the room was small").
+        Returns:
+            tuple: (polaridad de TextBlob por reseña, matriz reseña x aspecto con
+                la polaridad combinada, NaN si no se menciona, y con ``sentences``
+                un dict de arrays por frase: 'row', 'start', 'end',
+                'textblob_polarity' y 'domain_polarity')
+        """
+        n_rows, n_aspects, n_tokens = len(lengths), len(self.aspects), len(codes)
+        positions, rows, values = self._assessments(codes, lengths)
+        ends = np.cumsum(lengths)
+        # Solo se miran los tokens que cortan, niegan, son palabra clave o mencionan un aspecto
+        marked = np.flatnonzero(self._marked[codes])
+        marked_codes = codes[marked]
+        breaks = self._break[marked_codes]
+        # Una frase empieza con la reseña o tras los signos que cierran la anterior;
+        # una cláusula, además, tras una coma o una conjunción como 'but'
+        starts_sentence = np.zeros(n_tokens, dtype=bool)
+        starts_sentence[(ends - lengths)[lengths > 0]] = True
+        starts_sentence[_starts_after(marked[breaks == _SENTENCE], n_tokens)] = True
+        starts_clause = starts_sentence.copy()
+        starts_clause[_starts_after(marked[breaks != _NO_BREAK], n_tokens)] = True
+        sentence_of = np.cumsum(starts_sentence) - 1
+        clause_of = np.cumsum(starts_clause) - 1
+        clause_starts = np.flatnonzero(starts_clause)
+
+        # Como en el autómata, una negación poco antes y en la misma cláusula invierte la palabra clave
+        signs = self._keyword_sign[marked_codes]
+        hits, hit_signs = marked[signs != 0], signs[signs != 0]
+        negations = marked[self._domain_negation[marked_codes]]
+        negation = np.append(negations, -1)[np.searchsorted(negations, hits) - 1]
+        negated = (negation >= clause_starts[clause_of[hits]]) & \
+            (hits - negation <= sentiment_model.NEGATION_SCOPE)
+        hit_signs = np.where(negated, -hit_signs, hit_signs)
+
+        # Basta con comparar la mención siguiente y la anterior de cada opinión
+        is_mention = self._aspect[marked_codes] >= 0
+        mentions, mention_aspects = marked[is_mention], self._aspect[marked_codes[is_mention]]
+        opinions = np.concatenate([positions, hits])
+        sentence, clause = sentence_of[opinions], clause_of[opinions]
+        # Con un hueco al final para las opiniones sin mención antes o después
+        padded = [np.append(values, -1) for values in
+                  (mentions, mention_aspects, sentence_of[mentions], clause_of[mentions])]
+        after = np.searchsorted(mentions, opinions)
+        before = after - 1 + (padded[0][after] == opinions)
+        costs, aspects = [], []
+        for index in (before, after):
+            mention, mention_aspect, mention_sentence, mention_clause = (values[index] for values in padded)
+            # Otra cláusula pesa más que cualquier distancia; otra frase descarta la mención
+            cost = np.abs(opinions - mention) + n_tokens * (mention_clause != clause)
+            costs.append(np.where(mention_sentence == sentence, cost, 2 * n_tokens + 1))
+            aspects.append(mention_aspect)
+        # A igualdad, la mención anterior
+        aspect = np.where(costs[0] <= costs[1], aspects[0], aspects[1])
+        aspect[np.minimum(*costs) > 2 * n_tokens] = -1
+
+        def per_aspect(owners, aspect, weights=None):
+            keep = aspect >= 0
+            return np.bincount(owners[keep] * n_aspects + aspect[keep],
+                               weights=None if weights is None else weights[keep], minlength=n_rows * n_aspects)
+
+        n_assessments = len(positions)
+        textblob_aspect = _ratio(per_aspect(rows, aspect[:n_assessments], values),
+                                 per_aspect(rows, aspect[:n_assessments]))
+        hit_rows = np.searchsorted(ends, hits, side='right')
+        positive = per_aspect(hit_rows, np.where(hit_signs > 0, aspect[n_assessments:], -1))
+        negative = per_aspect(hit_rows, np.where(hit_signs < 0, aspect[n_assessments:], -1))
+        polarity = combine_polarity(textblob_aspect, _ratio(positive - negative, positive + negative))
+        mentioned = per_aspect(np.searchsorted(ends, mentions, side='right'), mention_aspects) > 0
+        aspect_polarity = np.where(mentioned, polarity, np.nan).reshape(n_rows, n_aspects)
+        textblob = _group_means(rows, values, n_rows)
+        if not sentences:
+            return textblob, aspect_polarity, None
+
+        sentence_starts = np.flatnonzero(starts_sentence)
+        n_sentences = len(sentence_starts)
+        sentence_ends = np.append(sentence_starts[1:], n_tokens)
+        hit_sentence = sentence[n_assessments:]
+        positive = np.bincount(hit_sentence[hit_signs > 0], minlength=n_sentences)
+        negative = np.bincount(hit_sentence[hit_signs < 0], minlength=n_sentences)
+        # Las frases hechas solo de signos no cuentan
+        cuts = np.bincount(sentence_of[marked[breaks != _NO_BREAK]], minlength=n_sentences)
+        words = sentence_ends - sentence_starts > cuts
+        details = {
+            'row': np.searchsorted(ends, sentence_starts, side='right'),
+            'start': sentence_starts,
+            'end': sentence_ends,
+            'textblob_polarity': _group_means(sentence[:n_assessments], values, n_sentences),
+            'domain_polarity': _ratio(positive - negative, positive + negative),
+        }
+        return textblob, aspect_polarity, {name: array[words] for name, array in details.items()}
+
+    def score_components(self, texts, preprocessed=False):
+        """
+        Devuelve las polaridades de TextBlob y del dominio hotelero para cada texto.
+        Args:
+            texts (sequence of str): Reseñas sin procesar
+            preprocessed (bool): True si los textos ya pasaron por ``preprocess_text``
+        Returns:
+            tuple: (textblob_polarity, domain_polarity) como arrays de NumPy
+        """
+        texts = list(texts)
+        textblob_parts, domain_parts = [], []
+        for start in range(0, len(texts), self.batch_size):
+            block = texts[start:start + self.batch_size]
+            codes, lengths, domain = self._encode(block, preprocessed)
+            textblob_parts.append(self._pattern_polarity(codes, lengths))
+            domain_parts.append(domain)
+        if not textblob_parts:
+            return np.zeros(0), np.zeros(0)
+        return np.concatenate(textblob_parts), np.concatenate(domain_parts)
+
+    def score_aspects(self, texts, preprocessed=False):
+        """
+        Como ``score_components`` y, de la misma tokenización, la polaridad
+        combinada de cada aspecto de ``aspects``.
+        Returns:
+            tuple: (textblob_polarity, domain_polarity, aspect_polarity); la
+                última es una matriz con una columna por aspecto y NaN donde la
+                reseña no lo menciona
+        """
+        texts = list(texts)
+        parts = []
+        for start in range(0, len(texts), self.batch_size):
+            codes, lengths, domain = self._encode(texts[start:start + self.batch_size], preprocessed)
+            textblob, aspect_polarity, _ = self._aspect_scores(codes, lengths)
+            parts.append((textblob, domain, aspect_polarity))
+        if not parts:
+            return np.zeros(0), np.zeros(0), np.zeros((0, len(self.aspects)))
+        return tuple(np.concatenate(arrays) for arrays in zip(*parts))
+
+    def aspect_details(self, text, preprocessed=False):
+        """
+        Frases y aspectos de una sola reseña.
+        Returns:
+            tuple: (textblob_polarity, domain_polarity, polaridad de cada aspecto
+                (NaN si no se menciona), lista de frases como
+                (texto tokenizado, textblob_polarity, domain_polarity))
+        """
+        text = text if preprocessed else preprocess_text(text)
+        tokens = [token for chunk in text.split() for token in self._tokenizer(chunk)]
+        codes = np.array([self._token_code(t) for t in tokens], dtype=np.int32)
+        textblob, aspect_polarity, sentences = self._aspect_scores(codes, np.array([len(codes)]), sentences=True)
+        sentences = [(' '.join(tokens[start:end]), float(textblob_polarity), float(domain_polarity))
+                     for start, end, textblob_polarity, domain_polarity in
+                     zip(sentences['start'], sentences['end'], sentences['textblob_polarity'],
+                         sentences['domain_polarity'])]
+        return float(textblob[0]), float(domain_polarity_of(text)), aspect_polarity[0], sentences
+
+    def score(self, texts, preprocessed=False):
+        """
+        Analiza muchas reseñas de una vez.
+        Args:
+            texts (sequence of str): Reseñas sin procesar
+            preprocessed (bool): True si los textos ya pasaron por ``preprocess_text``
+        Returns:
+            tuple: (polaridades, sentimientos) como arrays de NumPy
+        """
+        textblob_polarity, domain_polarity = self.score_components(texts, preprocessed)
+        polarity = combine_polarity(textblob_polarity, domain_polarity)
+        return polarity, label_polarities(polarity)
+
+
+def _group_means(groups, values, n_groups):
+    """Media de ``values`` en cada grupo; 0 en los grupos vacíos."""
+    return _ratio(np.bincount(groups, weights=values, minlength=n_groups),
+                  np.bincount(groups, minlength=n_groups))
+
+
+def _starts_after(cuts, n_tokens):
+    """Posición siguiente a cada racha de tokens de corte (``cuts`` ordenadas)."""
+    following = cuts + 1
+    last = np.ones(len(cuts), dtype=bool)
+    last[:-1] = cuts[1:] != following[:-1]
+    following = following[last]
+    return following[following < n_tokens]
+
+
+def _ratio(numerator, denominator):
+    return numerator / np.maximum(denominator, 1)
+
+
+def _aspect_sources():
+    """Léxicos de los que salen las tablas de aspectos: si cambia alguno, el motor se rehace."""
+    return (sentiment_model.HOTEL_POSITIVE_KEYWORDS, sentiment_model.HOTEL_NEGATIVE_KEYWORDS,
+            sentiment_model.NEGATION_WORDS, sentiment_model.ASPECT_TERMS)
+
+
+def label_polarities(polarity):
+    """Versión vectorizada de ``label_polarity`` para un array de polaridades."""
+    return np.select(
+        [polarity > sentiment_model.POSITIVE_THRESHOLD, polarity < sentiment_model.NEGATIVE_THRESHOLD],
+        ['Positivo', 'Negativo'],
+        'Neutral',
+    ).astype(object)
+
+
+_default_engine = None
+
+
+def get_default_engine():
+    """
+    Devuelve el motor compartido del proceso, creándolo la primera vez (o
+    cuando ``sentiment_model.configure_scorer`` cambia el léxico).
+    """
+    global _default_engine
+    if (_default_engine is None or _default_engine.lexicon is not get_pattern_lexicon()
+            or any(a is not b for a, b in zip(_default_engine._sources, _aspect_sources()))):
+        _default_engine = LexiconEngine()
+    return _default_engine
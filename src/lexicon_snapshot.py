@@ -0,0 +1,197 @@
+"""
+Instantánea precompilada del léxico de sentimiento que TextBlob usa por defecto.
+
+Importar TextBlob arrastra NLTK y cuesta un par de segundos, mucho más que
+puntuar una reseña. ``PatternLexicon`` guarda en un JSON lo que el analizador
+de patrones necesita (polaridad e intensidad de cada palabra, modificadores,
+negaciones, emoticonos y reglas del tokenizador) y reproduce su cálculo en
+Python puro, sin importar TextBlob, NumPy ni pandas.
+
+El tokenizador reproducido solo cubre el texto ya normalizado con
+``preprocess_text`` (minúsculas, dígitos, espacios y . , ! ?); sobre ese texto
+la polaridad coincide exactamente con ``TextBlob(texto).sentiment.polarity``.
+
+Para regenerar la instantánea tras actualizar TextBlob:
+    python -m src.lexicon_snapshot
+"""
+import json
+import os
+import re
+
+SNAPSHOT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'lexicons', 'pattern_sentiment.json')
+SNAPSHOT_FORMAT = 1
+
+
+class PatternLexicon:
+    """
+    Léxico de pattern y su analizador, sin dependencias.
+    Args:
+        words (dict): palabra -> (polaridad, intensidad, es modificador, termina en "-ly")
+        negations (iterable of str): Palabras que niegan la siguiente valoración
+        emoticons (dict): emoticono -> polaridad
+        abbreviations (iterable of str): Abreviaturas cuyo punto no se separa
+        abbreviation_patterns (iterable of str): Expresiones regulares de más abreviaturas
+        punctuation (str): Signos que el tokenizador separa de las palabras
+        textblob_version (str): Versión de TextBlob de la que salió el léxico
+    """
+
+    def __init__(self, words, negations, emoticons, abbreviations, abbreviation_patterns,
+                 punctuation, textblob_version=None):
+        self.words = words
+        self.negations = frozenset(negations)
+        self.emoticons = emoticons
+        self.abbreviations = frozenset(abbreviations)
+        self.abbreviation_patterns = tuple(abbreviation_patterns)
+        self.punctuation = punctuation
+        self.textblob_version = textblob_version
+        self._abbreviation_res = [re.compile(p) for p in self.abbreviation_patterns]
+        # El punto se trata aparte: solo se separa al final y si no es abreviatura
+        self._leading = tuple(punctuation.replace('.', ''))
+        self._trailing = self._leading + ('.',)
+
+    @classmethod
+    def from_textblob(cls):
+        """Extrae el léxico de la instalación actual de TextBlob (la importa)."""
+        from importlib import metadata
+        from textblob import _text
+        from textblob.en import sentiment
+
+        len(sentiment)  # fuerza la carga perezosa del XML
+        words = {}
+        for word, tags in dict.items(sentiment):
+            if None in tags:
+                polarity, _, intensity = tags[None]
+                is_modifier = any(t in tags for t in sentiment.modifiers)
+                words[word] = (polarity, intensity, is_modifier, bool(sentiment.modifier(word)))
+        # pattern compara en minúsculas y se queda con el primer grupo que coincide
+        emoticons = {}
+        for (_, polarity), group in _text.EMOTICONS.items():
+            for emoticon in group:
+                emoticon = emoticon.lower()
+                if not emoticon.isalpha() and len(emoticon) <= 5 and emoticon not in _text.PUNCTUATION:
+                    emoticons.setdefault(emoticon, polarity)
+        return cls(
+            words=words,
+            negations=sentiment.negations,
+            emoticons=emoticons,
+            abbreviations=_text.ABBREVIATIONS,
+            abbreviation_patterns=[r.pattern for r in (_text.RE_ABBR1, _text.RE_ABBR2, _text.RE_ABBR3)],
+            punctuation=_text.PUNCTUATION,
+            textblob_version=metadata.version('textblob'),
+        )
+
+    @classmethod
+    def load(cls, path=SNAPSHOT_PATH):
+        with open(path, encoding='utf-8') as handle:
+            data = json.load(handle)
+        if data.get('format') != SNAPSHOT_FORMAT:
+            raise ValueError(f"Formato de instantánea no soportado en {path}: {data.get('format')!r}")
+        return cls(
+            words={w: tuple(entry) for w, entry in data['words'].items()},
+            negations=data['negations'],
+            emoticons=data['emoticons'],
+            abbreviations=data['abbreviations'],
+            abbreviation_patterns=data['abbreviation_patterns'],
+            punctuation=data['punctuation'],
+            textblob_version=data.get('textblob_version'),
+        )
+
+    def save(self, path=SNAPSHOT_PATH):
+        data = {
+            'format': SNAPSHOT_FORMAT,
+            'textblob_version': self.textblob_version,
+            'punctuation': self.punctuation,
+            'abbreviations': sorted(self.abbreviations),
+            'abbreviation_patterns': list(self.abbreviation_patterns),
+            'negations': sorted(self.negations),
+            'emoticons': dict(sorted(self.emoticons.items())),
+            'words': {w: list(self.words[w]) for w in sorted(self.words)},
+        }
+        with open(path, 'w', encoding='utf-8') as handle:
+            json.dump(data, handle, ensure_ascii=False, separators=(',', ':'))
+            handle.write('\n')
+
+    def _is_abbreviation(self, token):
+        return token in self.abbreviations or any(r.match(token) for r in self._abbreviation_res)
+
+    def tokenize(self, text):
+        """Tokens de un texto normalizado, como los produce el tokenizador de pattern."""
+        leading, trailing = self._leading, self._trailing
+        tokens = []
+        for token in text.split():
+            tail = []
+            while token.startswith(leading):
+                tokens.append(token[0])
+                token = token[1:]
+            while token.endswith(trailing):
+                if token.endswith(leading):
+                    tail.append(token[-1])
+                    token = token[:-1]
+                if token.endswith('...'):
+                    tail.append('...')
+                    token = token[:-3].rstrip('.')
+                if token.endswith('.'):
+                    if self._is_abbreviation(token):
+                        break
+                    tail.append('.')
+                    token = token[:-1]
+            if token:
+                tokens.append(token)
+            tokens.extend(reversed(tail))
+        return tokens
+
+    def polarity(self, text):
+        """
+        Equivalente de ``TextBlob(texto).sentiment.polarity`` para un texto normalizado.
+        Sigue las reglas de ``Sentiment.assessments`` de pattern: los modificadores
+        ("very good") se unen a la palabra siguiente, las negaciones invierten la
+        valoración a la mitad y cada '!' la refuerza un 25 %.
+        """
+        words, negations, emoticons = self.words, self.negations, self.emoticons
+        assessments = []  # [polaridad, intensidad, negada]
+        modifier = negation = None
+        for token in self.tokenize(text):
+            entry = words.get(token)
+            if entry is not None:
+                polarity, intensity, is_modifier, _ = entry
+                if modifier is None:
+                    assessments.append([polarity, intensity, False])
+                else:
+                    last = assessments[-1]
+                    last[0] = max(-1.0, min(polarity * last[1], 1.0))
+                    last[1] = intensity
+                if negation is not None:
+                    assessments[-1][1] = 1.0 / assessments[-1][1]
+                    assessments[-1][2] = True
+                modifier = token if is_modifier else None
+                negation = token if token in negations else None
+                continue
+            if token in negations:
+                negation = token
+            elif negation and len(token) > 1:
+                negation = None
+            if negation is not None and modifier is not None and words[modifier][3]:
+                # "really not good": la negación tras un adverbio en "-ly"
+                assessments[-1][2] = True
+                negation = None
+            elif modifier and len(token) > 2:
+                modifier = None
+            if token == '!' and assessments:
+                assessments[-1][0] = max(-1.0, min(assessments[-1][0] * 1.25, 1.0))
+            emoticon = emoticons.get(token)
+            if emoticon is not None:
+                assessments.append([emoticon, 1.0, False])
+        total = 0
+        for polarity, _, negated in assessments:
+            total += polarity * -0.5 if negated else polarity
+        return total / float(len(assessments) or 1)
+
+
+def main():
+    lexicon = PatternLexicon.from_textblob()
+    lexicon.save()
+    print(f"{len(lexicon.words)} palabras (TextBlob {lexicon.textblob_version}) -> {SNAPSHOT_PATH}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+"""
+Análisis por lotes repartido entre varios núcleos.
+
+La columna de texto se corta en trozos que se puntúan en un pool de procesos.
+Cada proceso carga el léxico una sola vez al arrancar y lo reutiliza para todos
+los trozos que recibe. El resultado conserva el orden y el índice originales.
+"""
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from . import sentiment_model
+from .compact import result_columns
+from .sentiment_model import (
+    ENGINES,
+    analyze_sentiment,
+    aspect_columns,
+    batch_analyze,
+    configure_lexicons,
+    configure_model,
+    configure_scorer,
+    lexicon_config,
+    model_config,
+    polarity_from_components,
+    result_frame,
+    score_aspects,
+    score_components,
+    score_texts,
+)
+
+# Por debajo de este número de filas arrancar procesos cuesta más de lo que ahorra
+MIN_PARALLEL_ROWS = 20_000
+DEFAULT_CHUNKSIZE = 10_000
+
+
+def resolve_n_jobs(n_jobs):
+    """Traduce n_jobs (-1 = todos los núcleos, -2 = todos menos uno...) a un número real."""
+    cpus = os.cpu_count() or 1
+    if n_jobs is None:
+        return 1
+    if n_jobs < 0:
+        return max(1, cpus + 1 + n_jobs)
+    return max(1, n_jobs)
+
+
+def _worker_initargs(engine):
+    """Argumentos de ``_init_worker``: el motor y la configuración de este proceso."""
+    return (engine, sentiment_model.SCORER, sentiment_model.HASHING_MODEL_PATH,
+            sentiment_model.LEXICON_SNAPSHOT_PATH, model_config(), lexicon_config())
+
+
+def _init_worker(engine, scorer, model_path, snapshot_path, config, lexicons):
+    """Se ejecuta una vez por proceso: deja listo el léxico antes del primer trozo."""
+    # Con 'spawn' o 'forkserver' el proceso no hereda la configuración del padre
+    if (scorer, model_path, snapshot_path) != (sentiment_model.SCORER, sentiment_model.HASHING_MODEL_PATH,
+                                               sentiment_model.LEXICON_SNAPSHOT_PATH):
+        configure_scorer(scorer, snapshot_path=snapshot_path, model_path=model_path)
+    if config != model_config():
+        configure_model(**config)
+    if lexicons != lexicon_config():
+        configure_lexicons(**lexicons)
+    if engine == 'hashing' or scorer == 'hashing':
+        sentiment_model.get_hashing_model()
+    elif engine == 'lexicon':
+        from .lexicon_engine import get_default_engine
+        get_default_engine()
+    else:
+        analyze_sentiment('warm up')
+
+
+def parallel_batch_analyze(df, text_column='review', engine='lexicon', n_jobs=-1,
+                           chunksize=DEFAULT_CHUNKSIZE, min_rows=MIN_PARALLEL_ROWS, components=False,
+                           aspects=False, compact=False, copy=True):
+    """
+    Igual que ``batch_analyze`` pero repartiendo el trabajo en varios procesos.
+    Args:
+        df (pandas.DataFrame): DataFrame con la columna de texto a analizar
+        text_column (str): Nombre de la columna que contiene los textos
+        engine (str): 'lexicon', 'textblob' o 'hashing', como en ``batch_analyze``
+        n_jobs (int): Procesos a usar; -1 usa todos los núcleos
+        chunksize (int): Filas por trozo enviado a cada proceso
+        min_rows (int): Con menos filas se analiza en serie, sin pool
+        components (bool): Añade 'textblob_polarity' y 'domain_polarity', como en ``batch_analyze``
+        aspects (bool): Añade las columnas 'aspect_<aspecto>', como en ``batch_analyze``
+        compact (bool): float32 y sentimiento categórico, como en ``batch_analyze``
+        copy (bool): Con False devuelve solo las columnas nuevas, como en ``batch_analyze``
+    Returns:
+        pandas.DataFrame: DataFrame original con columnas extra de polaridad y sentimiento
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Motor de análisis desconocido: {engine!r}")
+    if chunksize is None:
+        chunksize = DEFAULT_CHUNKSIZE
+    if chunksize < 1:
+        raise ValueError("chunksize debe ser al menos 1")
+    n_rows = len(df)
+    n_chunks = -(-n_rows // chunksize)
+    workers = min(resolve_n_jobs(n_jobs), n_chunks)
+    if workers <= 1 or n_rows < min_rows:
+        return batch_analyze(df, text_column, engine=engine, components=components, aspects=aspects,
+                             compact=compact, copy=copy)
+
+    texts = df[text_column].tolist()
+    chunks = [texts[i:i + chunksize] for i in range(0, n_rows, chunksize)]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=_worker_initargs(engine)) as pool:
+        # map devuelve los resultados en el mismo orden que los trozos
+        scorer = score_aspects if aspects else score_components if components else score_texts
+        parts = list(pool.map(scorer, chunks, [engine] * len(chunks)))
+
+    first = np.concatenate([part[0] for part in parts])
+    second = np.concatenate([part[1] for part in parts])
+    if components or aspects:
+        columns = result_columns(*polarity_from_components(first, second), compact=compact)
+        dtype = columns['polarity'].dtype
+        if components:
+            columns.update(textblob_polarity=first.astype(dtype), domain_polarity=second.astype(dtype))
+        if aspects:
+            columns.update(aspect_columns(np.concatenate([part[2] for part in parts]), dtype))
+    else:
+        columns = result_columns(first, second, compact=compact)
+    return result_frame(df, columns, copy)
+
+
+def parallel_analyze_chunks(chunks, text_column='review', engine='lexicon', n_jobs=-1, compact=False, window=2):
+    """
+    Analiza un flujo de trozos con un pool de procesos que dura toda la pasada,
+    en lugar de uno por trozo como ``parallel_batch_analyze``. A los procesos
+    solo viajan los textos; las demás columnas se quedan en el principal.
+    Los trozos se devuelven en el orden de llegada y nunca hay más de
+    ``window`` pendientes por proceso, así que la memoria sigue acotada.
+    Args:
+        chunks (iterable of pandas.DataFrame): Trozos con la columna de texto
+        window (int): Trozos en vuelo por proceso
+    Yields:
+        pandas.DataFrame: Cada trozo con polaridad y sentimiento
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Motor de análisis desconocido: {engine!r}")
+    workers = resolve_n_jobs(n_jobs)
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=_worker_initargs(engine)) as pool:
+        for chunk in chunks:
+            pending.append((chunk, pool.submit(score_texts, chunk[text_column].tolist(), engine)))
+            if len(pending) >= workers * window:
+                yield _chunk_result(*pending.popleft(), compact)
+        while pending:
+            yield _chunk_result(*pending.popleft(), compact)
+
+
+def _chunk_result(chunk, future, compact):
+    polarity, sentiment = future.result()
+    return result_frame(chunk, result_columns(polarity, sentiment, compact=compact))
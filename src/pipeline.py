@@ -0,0 +1,139 @@
+"""
+Pipeline en streaming: del CSV o JSONL de entrada al fichero de resultados, trozo a trozo.
+
+Nunca hay más de un trozo en memoria, así que el consumo no depende del tamaño
+del fichero de entrada.
+"""
+import pandas as pd
+
+from .data_loader import DEFAULT_BATCH_BYTES, DEFAULT_CHUNKSIZE, input_format_for, iter_reviews, iter_text_batches
+from .parallel import resolve_n_jobs
+from .sentiment_model import batch_analyze, batch_sentiment_details
+
+PARQUET_EXTENSIONS = ('.parquet', '.pq')
+
+
+def output_format_for(path):
+    """Deduce el formato de salida ('csv' o 'parquet') a partir de la extensión."""
+    return 'parquet' if path.lower().endswith(PARQUET_EXTENSIONS) else 'csv'
+
+
+class CsvChunkWriter:
+    """Escribe trozos en un CSV: la cabecera solo con el primero."""
+
+    def __init__(self, path):
+        self.path = path
+        self._header_written = False
+
+    def write(self, chunk):
+        chunk.to_csv(self.path, mode='a' if self._header_written else 'w',
+                     header=not self._header_written, index=False)
+        self._header_written = True
+
+    def close(self):
+        pass
+
+
+class ParquetChunkWriter:
+    """Escribe trozos como grupos de filas de un mismo fichero Parquet."""
+
+    def __init__(self, path):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as exc:
+            raise ImportError("Para escribir Parquet hace falta instalar pyarrow") from exc
+        self._pa = pa
+        self._pq = pq
+        self.path = path
+        self._writer = None
+
+    def write(self, chunk):
+        table = self._pa.Table.from_pandas(chunk, preserve_index=False)
+        if self._writer is None:
+            self._writer = self._pq.ParquetWriter(self.path, table.schema)
+        else:
+            table = table.cast(self._writer.schema)
+        self._writer.write_table(table)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def open_writer(path, output_format=None):
+    """Devuelve el escritor de trozos adecuado para ``path``."""
+    output_format = output_format or output_format_for(path)
+    if output_format == 'csv':
+        return CsvChunkWriter(path)
+    if output_format == 'parquet':
+        return ParquetChunkWriter(path)
+    raise ValueError(f"Formato de salida desconocido: {output_format!r}")
+
+
+def analyze_chunks(chunks, text_column='review', engine='lexicon', store=None, details=False, compact=False,
+                   n_jobs=1):
+    """
+    Analiza cada trozo según llega y lo devuelve con polaridad y sentimiento.
+    Con ``details=True`` usa ``batch_sentiment_details``, que en la misma pasada
+    añade confianza y palabras clave (y no usa ``store`` ni ``n_jobs``). Con
+    ``compact=True`` las columnas nuevas usan el formato compacto de ``compact``.
+    Con ``n_jobs`` distinto de 1 y sin ``store``, los trozos se reparten entre
+    un mismo pool de procesos (``parallel.parallel_analyze_chunks``); con
+    ``store``, cada trozo se analiza en paralelo por su cuenta.
+    """
+    if n_jobs != 1 and store is None and not details and resolve_n_jobs(n_jobs) > 1:
+        from .parallel import parallel_analyze_chunks
+        yield from parallel_analyze_chunks(chunks, text_column, engine, n_jobs, compact)
+        return
+    for chunk in chunks:
+        if details:
+            yield batch_sentiment_details(chunk, text_column, engine=engine, compact=compact)
+        else:
+            yield batch_analyze(chunk, text_column, engine=engine, store=store, compact=compact,
+                                n_jobs=n_jobs if store is not None else 1)
+
+
+def text_batch_frames(path, text_column='review', batch_bytes=DEFAULT_BATCH_BYTES, input_format=None,
+                      on_bad_lines='error'):
+    """
+    Trozos de una sola columna con los textos de ``iter_text_batches``, para
+    ``analyze_chunks``. Es el camino de los JSONL, de los que solo se lee el texto.
+    """
+    for texts in iter_text_batches(path, text_column, batch_bytes, input_format, on_bad_lines):
+        yield pd.DataFrame({text_column: texts})
+
+
+def analyze_stream(input_path, output_path, text_column='review', chunksize=DEFAULT_CHUNKSIZE,
+                   engine='lexicon', output_format=None, store=None, compact=False):
+    """
+    Analiza un CSV o JSONL de reseñas en streaming y escribe el resultado en CSV o Parquet.
+    De un CSV se conservan todas las columnas; de un JSONL (``.jsonl``,
+    ``.ndjson``) solo la del texto, que se lee sin decodificar el resto del registro.
+    Args:
+        input_path (str): CSV o JSONL de entrada
+        output_path (str): Fichero de salida; la extensión decide el formato
+        text_column (str): Nombre de la columna que contiene los textos
+        chunksize (int): Filas que se leen, analizan y escriben de cada vez (en
+            JSONL los trozos son de ``DEFAULT_BATCH_BYTES`` bytes)
+        engine (str): Motor de ``batch_analyze`` ('lexicon' o 'textblob')
+        output_format (str): 'csv' o 'parquet' para ignorar la extensión
+        store (score_store.ScoreStore): Almacén de puntuaciones a reutilizar
+        compact (bool): Polaridad en float32 y sentimiento categórico (en Parquet,
+            un diccionario con índices int8)
+    Returns:
+        int: Número de filas escritas
+    """
+    if input_format_for(input_path) == 'jsonl':
+        chunks = text_batch_frames(input_path, text_column)
+    else:
+        chunks = iter_reviews(input_path, chunksize)
+    writer = open_writer(output_path, output_format)
+    rows = 0
+    try:
+        for scored in analyze_chunks(chunks, text_column, engine, store, compact=compact):
+            writer.write(scored)
+            rows += len(scored)
+    finally:
+        writer.close()
+    return rows
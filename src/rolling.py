@@ -0,0 +1,269 @@
+"""
+Agregados incrementales de sentimiento por hotel y ventana de tiempo.
+
+``RollingSummary`` recibe reseñas ya puntuadas, de una en una o por trozos,
+y para cada clave (hotel, día o semana) guarda en arrays de NumPy:
+- cuántas reseñas hay de cada etiqueta;
+- la suma de las polaridades y la de sus cuadrados (media y desviación);
+- cuántas veces aparece cada entrada del léxico de palabras clave.
+
+Cada clave es una fila de esos arrays y un diccionario lleva de la clave a
+su fila, así que consultar una ventana cuesta lo mismo con un día de historia
+que con diez años, y añadir las reseñas de un día solo toca las filas de ese
+día. Dos resúmenes con la misma ventana y el mismo léxico se suman con
+``merge``, por ejemplo uno por proceso.
+
+    summary = RollingSummary(window='day')
+    summary.update(batch_sentiment_details(df, engine='lexicon'))
+    summary.current('Hotel Sol')  # última ventana del hotel
+"""
+import numpy as np
+import pandas as pd
+
+from .compact import KEYWORD_MASK_DTYPE
+from .evaluation import encode_labels
+from .keyword_matcher import lexicon_entry
+from .sentiment_model import SENTIMENT_LABELS, get_keyword_matcher
+
+WINDOWS = ('day', 'week')
+_INITIAL_CAPACITY = 64
+# El 1 de enero de 1970 fue jueves: sumando 3, los lunes dan resto 0
+_MONDAY_OFFSET = 3
+
+
+def window_start(days, window):
+    """
+    Primer día de la ventana de cada fecha.
+    Args:
+        days (numpy.ndarray): Días desde 1970-01-01 (enteros)
+        window (str): 'day' o 'week' (semanas de lunes a domingo)
+    """
+    if window == 'day':
+        return days
+    return days - (days + _MONDAY_OFFSET) % 7
+
+
+def _to_days(values):
+    """Días desde 1970-01-01 de una serie de fechas (texto o datetime, con o sin zona)."""
+    times = pd.to_datetime(pd.Series(values))
+    if times.dt.tz is not None:
+        times = times.dt.tz_convert(None)
+    if times.isna().any():
+        raise ValueError("Hay reseñas sin fecha")
+    return times.to_numpy(dtype='datetime64[ns]').astype('datetime64[D]').astype(np.int64)
+
+
+def _day_of(timestamp):
+    """Como ``_to_days`` para una sola fecha."""
+    timestamp = pd.Timestamp(timestamp)
+    if timestamp is pd.NaT:
+        raise ValueError("La reseña no tiene fecha")
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.tz_convert(None)
+    return np.int64(timestamp.to_datetime64().astype('datetime64[D]').astype(np.int64))
+
+
+class RollingSummary:
+    """
+    Agregados por (hotel, ventana) que se actualizan sin recorrer la historia.
+    Args:
+        window (str): 'day' o 'week'
+        keywords (tuple of str): Entradas del léxico que se cuentan; por
+            defecto, ``get_keyword_matcher().entries``
+    """
+
+    def __init__(self, window='day', keywords=None):
+        if window not in WINDOWS:
+            raise ValueError(f"Ventana desconocida: {window!r}")
+        self.window = window
+        self.keywords = tuple(get_keyword_matcher().entries if keywords is None else keywords)
+        self._keyword_index = {entry: i for i, entry in enumerate(self.keywords)}
+        self._slots = {}   # (hotel, primer día de la ventana) -> fila
+        self._keys = []    # fila -> (hotel, primer día)
+        self._latest = {}  # hotel -> primer día de su ventana más reciente
+        self.label_counts = np.zeros((_INITIAL_CAPACITY, len(SENTIMENT_LABELS)), dtype=np.int64)
+        self.polarity_sum = np.zeros(_INITIAL_CAPACITY)
+        self.polarity_sq_sum = np.zeros(_INITIAL_CAPACITY)
+        self.positive_keywords = np.zeros((_INITIAL_CAPACITY, len(self.keywords)), dtype=np.int32)
+        self.negative_keywords = np.zeros((_INITIAL_CAPACITY, len(self.keywords)), dtype=np.int32)
+
+    def __len__(self):
+        """Número de claves (hotel, ventana) con alguna reseña."""
+        return len(self._keys)
+
+    # Altas
+
+    def _slot(self, hotel, day):
+        slot = self._slots.get((hotel, day))
+        if slot is None:
+            slot = len(self._keys)
+            if slot == len(self.polarity_sum):
+                self._grow()
+            self._slots[(hotel, day)] = slot
+            self._keys.append((hotel, day))
+            if day > self._latest.get(hotel, day - 1):
+                self._latest[hotel] = day
+        return slot
+
+    def _grow(self):
+        # Capacidad doble: el coste de copiar se reparte entre todas las altas
+        for name in ('label_counts', 'polarity_sum', 'polarity_sq_sum', 'positive_keywords', 'negative_keywords'):
+            array = getattr(self, name)
+            grown = np.zeros((2 * len(array),) + array.shape[1:], dtype=array.dtype)
+            grown[:len(array)] = array
+            setattr(self, name, grown)
+
+    def add(self, hotel, timestamp, polarity, sentiment, positive_keywords=(), negative_keywords=()):
+        """Suma una sola reseña puntuada, sin crear DataFrames."""
+        day = int(window_start(_day_of(timestamp), self.window))
+        slot = self._slot(hotel, day)
+        self.label_counts[slot, SENTIMENT_LABELS.index(sentiment)] += 1
+        self.polarity_sum[slot] += polarity
+        self.polarity_sq_sum[slot] += polarity * polarity
+        for keywords, counts in ((positive_keywords, self.positive_keywords),
+                                 (negative_keywords, self.negative_keywords)):
+            for keyword in keywords:
+                entry = self._entry_of(keyword)
+                if entry >= 0:
+                    counts[slot, entry] += 1
+        return self
+
+    def update(self, scored, hotel_column='hotel', time_column='date'):
+        """
+        Suma un trozo de resultados de ``batch_analyze`` o ``batch_sentiment_details``
+        (también en formato compacto). Las palabras clave solo se cuentan si el
+        trozo trae sus columnas, como listas, como máscaras o como arrays de
+        posiciones en el léxico.
+        El coste es proporcional a las filas del trozo.
+        """
+        if not len(scored):
+            return self
+        days = window_start(_to_days(scored[time_column]), self.window)
+        hotel_codes, hotels = pd.factorize(scored[hotel_column])
+        if (hotel_codes < 0).any():
+            raise ValueError("Hay reseñas sin hotel")
+        first_day = days.min()
+        span = int(days.max() - first_day) + 1
+        keys, groups = np.unique(hotel_codes.astype(np.int64) * span + (days - first_day), return_inverse=True)
+        slots = np.array([self._slot(hotels[key // span], int(key % span + first_day)) for key in keys],
+                         dtype=np.int64)
+        n_groups = len(keys)
+
+        labels = encode_labels(scored['sentiment']).astype(np.int64)
+        n_labels = len(SENTIMENT_LABELS)
+        self.label_counts[slots] += np.bincount(groups * n_labels + labels,
+                                                minlength=n_groups * n_labels).reshape(n_groups, n_labels)
+        polarity = scored['polarity'].to_numpy(dtype=np.float64)
+        self.polarity_sum[slots] += np.bincount(groups, weights=polarity, minlength=n_groups)
+        self.polarity_sq_sum[slots] += np.bincount(groups, weights=polarity * polarity, minlength=n_groups)
+        for column, counts in (('positive_keywords', self.positive_keywords),
+                               ('negative_keywords', self.negative_keywords)):
+            if column in scored:
+                counts[slots] += self._keyword_counts(scored[column], groups, n_groups)
+        return self
+
+    def _keyword_counts(self, column, groups, n_groups):
+        """Veces que sale cada entrada del léxico en cada grupo del trozo."""
+        n_entries = len(self.keywords)
+        if column.dtype == KEYWORD_MASK_DTYPE:
+            if n_entries > 64:
+                raise ValueError("Las máscaras solo cubren 64 entradas del léxico")
+            # Cada máscara, como 8 bytes little-endian, da 64 bits con el bit i en la columna i
+            masks = column.to_numpy().astype('<u8').view(np.uint8).reshape(-1, 8)
+            bits = np.unpackbits(masks, axis=1, bitorder='little')[:, :n_entries]
+            order = np.argsort(groups, kind='stable')
+            starts = np.flatnonzero(np.r_[True, np.diff(groups[order]) != 0])
+            counts = np.zeros((n_groups, n_entries), dtype=np.int64)
+            counts[groups[order][starts]] = np.add.reduceat(bits[order], starts, axis=0, dtype=np.int64)
+            return counts
+        lists = column.tolist()
+        lengths = np.fromiter((len(keywords) for keywords in lists), dtype=np.int64, count=len(lists))
+        if any(isinstance(keywords, np.ndarray) and keywords.dtype.kind in 'iu' for keywords in lists):
+            # Formato compacto de léxicos grandes: ya son posiciones en el léxico
+            entries = np.concatenate(lists).astype(np.int64)
+        else:
+            entries = np.fromiter((self._entry_of(keyword) for keywords in lists for keyword in keywords),
+                                  dtype=np.int64, count=int(lengths.sum()))
+        rows = np.repeat(groups, lengths)
+        known = (entries >= 0) & (entries < n_entries)
+        return np.bincount(rows[known] * n_entries + entries[known],
+                           minlength=n_groups * n_entries).reshape(n_groups, n_entries)
+
+    def _entry_of(self, keyword):
+        """
+        Posición en el léxico de una coincidencia, o -1 si no está. Las negadas
+        ('not really dirty') se llevan a su entrada, sin la negación ni lo que
+        hay en medio; no se recuerdan, porque eso crecería con el vocabulario.
+        """
+        return self._keyword_index.get(lexicon_entry(keyword, self._keyword_index), -1)
+
+    def merge(self, other):
+        """Añade los agregados de otro resumen con la misma ventana y el mismo léxico."""
+        if (other.window, other.keywords) != (self.window, self.keywords):
+            raise ValueError("Los resúmenes tienen ventanas o léxicos distintos")
+        n = len(other)
+        slots = np.array([self._slot(hotel, day) for hotel, day in other._keys], dtype=np.int64)
+        self.label_counts[slots] += other.label_counts[:n]
+        self.polarity_sum[slots] += other.polarity_sum[:n]
+        self.polarity_sq_sum[slots] += other.polarity_sq_sum[:n]
+        self.positive_keywords[slots] += other.positive_keywords[:n]
+        self.negative_keywords[slots] += other.negative_keywords[:n]
+        return self
+
+    # Consultas
+
+    def window_of(self, timestamp):
+        """Primer día (``numpy.datetime64``) de la ventana que contiene ``timestamp``."""
+        return np.datetime64(int(window_start(_day_of(timestamp), self.window)), 'D')
+
+    def get(self, hotel, timestamp):
+        """
+        Agregados de la ventana de ``hotel`` que contiene ``timestamp``, o None
+        si no tiene reseñas. Cuesta lo mismo sea cual sea la historia guardada.
+        """
+        day = int(self.window_of(timestamp).astype(np.int64))
+        slot = self._slots.get((hotel, day))
+        return None if slot is None else self._stats(slot)
+
+    def current(self, hotel):
+        """Agregados de la ventana más reciente de ``hotel``, o None si no hay ninguna."""
+        day = self._latest.get(hotel)
+        return None if day is None else self._stats(self._slots[(hotel, day)])
+
+    def _stats(self, slot):
+        hotel, day = self._keys[slot]
+        counts = self.label_counts[slot]
+        reviews = int(counts.sum())
+        mean = self.polarity_sum[slot] / reviews
+        variance = max(self.polarity_sq_sum[slot] / reviews - mean * mean, 0.0)
+        return {
+            'hotel': hotel,
+            'window': np.datetime64(day, 'D'),
+            'reviews': reviews,
+            'labels': dict(zip(SENTIMENT_LABELS, counts.tolist())),
+            'mean_polarity': float(mean),
+            'std_polarity': float(np.sqrt(variance)),
+            'positive_keywords': self._nonzero_keywords(self.positive_keywords[slot]),
+            'negative_keywords': self._nonzero_keywords(self.negative_keywords[slot]),
+        }
+
+    def _nonzero_keywords(self, counts):
+        return {self.keywords[i]: int(counts[i]) for i in np.flatnonzero(counts)}
+
+    def to_frame(self):
+        """Una fila por (hotel, ventana) con recuentos, media y desviación, para dashboards."""
+        n = len(self)
+        counts = self.label_counts[:n]
+        reviews = counts.sum(axis=1)
+        mean = self.polarity_sum[:n] / np.maximum(reviews, 1)
+        variance = np.maximum(self.polarity_sq_sum[:n] / np.maximum(reviews, 1) - mean * mean, 0.0)
+        frame = pd.DataFrame({
+            'hotel': [hotel for hotel, _ in self._keys],
+            'window': np.array([day for _, day in self._keys], dtype='datetime64[D]'),
+            'reviews': reviews,
+        })
+        for i, label in enumerate(SENTIMENT_LABELS):
+            frame[label] = counts[:, i]
+        frame['mean_polarity'] = mean
+        frame['std_polarity'] = np.sqrt(variance)
+        return frame.sort_values(['hotel', 'window'], ignore_index=True)
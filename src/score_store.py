@@ -0,0 +1,188 @@
+"""
+Almacén persistente de puntuaciones en SQLite.
+
+Cada resultado se guarda con el hash del texto de la reseña y la versión de la
+configuración del modelo. Así, al volver a ejecutar sobre el mismo corpus solo
+se analizan las reseñas nuevas o modificadas. Si cambian las palabras clave,
+los pesos o los umbrales de ``sentiment_model`` la versión cambia y el almacén
+descarta lo guardado.
+"""
+import hashlib
+import json
+import sqlite3
+from importlib import metadata
+
+import numpy as np
+import pandas as pd
+
+from . import sentiment_model
+from .compact import result_columns
+
+# Súbelo a mano cuando cambie la forma de puntuar sin que cambien las constantes
+SCORER_VERSION = 3
+# SQLite limita el número de parámetros por consulta
+_LOOKUP_BATCH = 500
+
+
+def model_version():
+    """
+    Huella de todo lo que influye en la puntuación: léxicos de palabras clave y
+    negaciones, pesos, umbrales, versión de TextBlob y, con SCORER='hashing',
+    los coeficientes del modelo.
+    """
+    try:
+        textblob_version = metadata.version('textblob')
+    except metadata.PackageNotFoundError:
+        textblob_version = None
+    config = {
+        'scorer': SCORER_VERSION,
+        'textblob': textblob_version,
+        'positive_keywords': sorted(sentiment_model.HOTEL_POSITIVE_KEYWORDS),
+        'negative_keywords': sorted(sentiment_model.HOTEL_NEGATIVE_KEYWORDS),
+        'negations': sorted(sentiment_model.NEGATION_WORDS),
+        'negation_scope': sentiment_model.NEGATION_SCOPE,
+        'weights': [sentiment_model.TEXTBLOB_WEIGHT, sentiment_model.DOMAIN_WEIGHT],
+        'thresholds': [sentiment_model.POSITIVE_THRESHOLD, sentiment_model.NEGATIVE_THRESHOLD],
+    }
+    if sentiment_model.SCORER == 'hashing':
+        model = sentiment_model.get_hashing_model()
+        config['hashing_model'] = hashlib.sha256(model.coef_.tobytes() + model.intercept_.tobytes()).hexdigest()
+    payload = json.dumps(config, sort_keys=True).encode('utf-8')
+    return hashlib.sha256(payload).hexdigest()[:16]
+
+
+def text_hash(text):
+    """Hash de contenido (16 bytes) del texto original de la reseña."""
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+
+
+class ScoreStore:
+    """
+    Resultados ya calculados, guardados en un fichero SQLite local.
+    Lleva la cuenta de filas reutilizadas y analizadas desde que se abrió.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.reused = 0
+        self.scored = 0
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS scores ("
+            " text_hash BLOB NOT NULL,"
+            " model_version TEXT NOT NULL,"
+            " polarity REAL NOT NULL,"
+            " sentiment TEXT NOT NULL,"
+            " PRIMARY KEY (text_hash, model_version)"
+            ") WITHOUT ROWID"
+        )
+        self._version = None
+        self._check_version()
+
+    def _check_version(self):
+        """Descarta los resultados de configuraciones anteriores si la actual cambió."""
+        version = model_version()
+        if version != self._version:
+            with self._conn:
+                self._conn.execute("DELETE FROM scores WHERE model_version != ?", (version,))
+            self._version = version
+        return version
+
+    def lookup(self, hashes):
+        """
+        Busca en bloque los hashes dados.
+        Returns:
+            dict: hash -> (polaridad, sentimiento) para los que ya estaban guardados
+        """
+        version = self._check_version()
+        found = {}
+        for start in range(0, len(hashes), _LOOKUP_BATCH):
+            batch = hashes[start:start + _LOOKUP_BATCH]
+            placeholders = ','.join('?' * len(batch))
+            rows = self._conn.execute(
+                f"SELECT text_hash, polarity, sentiment FROM scores"
+                f" WHERE model_version = ? AND text_hash IN ({placeholders})",
+                [version, *batch],
+            )
+            for key, polarity, sentiment in rows:
+                found[key] = (polarity, sentiment)
+        return found
+
+    def save(self, hashes, polarity, sentiment):
+        """Guarda los resultados recién calculados para la configuración actual."""
+        version = self._check_version()
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO scores VALUES (?, ?, ?, ?)",
+                zip(hashes, [version] * len(hashes), map(float, polarity), sentiment),
+            )
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM scores").fetchone()[0]
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def batch_analyze_with_store(df, store, text_column='review', **batch_kwargs):
+    """
+    Como ``batch_analyze``, pero reutiliza las puntuaciones guardadas en ``store``
+    y solo analiza las reseñas que faltan. Las cuentas de la ejecución quedan
+    en ``result_df.attrs['score_store']``.
+    Args:
+        df (pandas.DataFrame): DataFrame con la columna de texto a analizar
+        store (ScoreStore): Almacén de puntuaciones
+        text_column (str): Nombre de la columna que contiene los textos
+        **batch_kwargs: engine, n_jobs, chunksize, compact y copy, como en ``batch_analyze``
+    Returns:
+        pandas.DataFrame: DataFrame original con columnas extra de polaridad y sentimiento
+    """
+    if batch_kwargs.get('engine') == 'hashing' and sentiment_model.SCORER != 'hashing':
+        raise ValueError("Para guardar puntuaciones del modelo hashing usa configure_scorer('hashing')")
+    # El almacén guarda la versión completa; la compacta solo se monta al final
+    compact = batch_kwargs.pop('compact', False)
+    copy = batch_kwargs.pop('copy', True)
+    codes, uniques = pd.factorize(df[text_column].to_numpy(dtype=object))
+    if len(codes) and codes.min() < 0:
+        # factorize da el código -1 a NaN/None, que indexaría la última reseña;
+        # sin almacén, batch_analyze tampoco acepta reseñas que no son texto
+        raise TypeError(f"La columna {text_column!r} tiene reseñas vacías (NaN o None); "
+                        "rellénalas antes, p. ej. con fillna('')")
+    hashes = [text_hash(text) for text in uniques]
+    found = store.lookup(hashes)
+
+    polarity = np.empty(len(uniques), dtype=float)
+    sentiment = np.empty(len(uniques), dtype=object)
+    missing = []
+    for i, key in enumerate(hashes):
+        hit = found.get(key)
+        if hit is None:
+            missing.append(i)
+        else:
+            polarity[i], sentiment[i] = hit
+    if missing:
+        pending = pd.DataFrame({text_column: uniques[missing]})
+        scored = sentiment_model.batch_analyze(pending, text_column, **batch_kwargs)
+        polarity[missing] = scored['polarity'].to_numpy()
+        sentiment[missing] = scored['sentiment'].to_numpy(dtype=object)
+        store.save([hashes[i] for i in missing], polarity[missing], sentiment[missing])
+
+    is_missing = np.zeros(len(uniques), dtype=bool)
+    is_missing[missing] = True
+    scored_rows = int(is_missing[codes].sum())
+    reused_rows = len(df) - scored_rows
+    store.scored += scored_rows
+    store.reused += reused_rows
+
+    columns = result_columns(polarity, sentiment, codes, compact=compact)
+    result_df = sentiment_model.result_frame(df, columns, copy)
+    result_df.attrs['score_store'] = {'reused': reused_rows, 'scored': scored_rows}
+    return result_df
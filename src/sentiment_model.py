@@ -1,42 +1,201 @@
-from textblob import TextBlob
-import re
-import pandas as pd
-
-# Palabras clave que suelen aparecer en reseñas de hoteles. ¡Ayudan a afinar el análisis!
-HOTEL_POSITIVE_KEYWORDS = {
-    'amazing', 'excellent', 'perfect', 'beautiful', 'wonderful', 'great',
-    'comfortable', 'friendly', 'helpful', 'spacious', 'modern', 'luxury',
-    'stunning', 'outstanding', 'fantastic', 'impressive', 'delicious',
-    'convenient', 'recommended'
-}
-
-HOTEL_NEGATIVE_KEYWORDS = {
-    'terrible', 'awful', 'dirty', 'noisy', 'small', 'outdated', 'poor', 'rude',
-    'unhelpful', 'disappointing', 'overpriced', 'basic', 'limited', 'cold', 'old',
-    'broken', 'uncomfortable', 'crowded', 'slow', 'expensive'
-}
+# TextBlob, NumPy y pandas se importan dentro de las funciones que los usan:
+# analizar una sola reseña no debe pagar su carga al arrancar.
+from functools import lru_cache
+import os
+
+from . import instrumentation
+from .keyword_matcher import KeywordMatcher, load_lexicon
+from .lexicon_snapshot import SNAPSHOT_PATH, PatternLexicon
+from .normalizer import normalize_text, normalize_texts
+
+# Léxicos del sector hotelero: una palabra o frase por línea. ¡Ayudan a afinar el análisis!
+LEXICON_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'lexicons')
+POSITIVE_LEXICON_PATH = os.path.join(LEXICON_DIR, 'hotel_positive.txt')
+NEGATIVE_LEXICON_PATH = os.path.join(LEXICON_DIR, 'hotel_negative.txt')
+NEGATIONS_LEXICON_PATH = os.path.join(LEXICON_DIR, 'negations.txt')
+ASPECTS_LEXICON_PATH = os.path.join(LEXICON_DIR, 'aspects.txt')
+
+# Palabras tras una negación ("not very clean") cuya polaridad se invierte
+NEGATION_SCOPE = 3
+
+# Peso de cada fuente en la polaridad combinada y umbrales de cada etiqueta.
+# Se pueden cambiar con ``configure_model`` o con un JSON en SENTIMENT_CONFIG.
+TEXTBLOB_WEIGHT = 0.9
+DOMAIN_WEIGHT = 0.1
+POSITIVE_THRESHOLD = 0.25
+NEGATIVE_THRESHOLD = -0.25
+MODEL_CONFIG_KEYS = ('textblob_weight', 'domain_weight', 'positive_threshold', 'negative_threshold')
+
+SENTIMENT_LABELS = ('Positivo', 'Neutral', 'Negativo')
+
+# Textos normalizados distintos que recordamos (0 desactiva la caché)
+DEFAULT_CACHE_SIZE = 100_000
+
+# Cómo se puntúa: 'textblob' calcula la polaridad base con TextBlob,
+# 'snapshot' con la instantánea precompilada de su léxico (mismo resultado,
+# sin importar TextBlob ni NLTK) y 'hashing' sustituye todo el análisis por el
+# modelo lineal de ``hashing_model`` guardado en HASHING_MODEL_PATH.
+# Se pueden elegir con SENTIMENT_SCORER y SENTIMENT_MODEL_PATH.
+SCORERS = ('textblob', 'snapshot', 'hashing')
+SCORER = os.environ.get('SENTIMENT_SCORER', 'textblob')
+HASHING_MODEL_PATH = os.environ.get('SENTIMENT_MODEL_PATH')
+# Instantánea que lee SCORER='snapshot' (ver ``configure_scorer``)
+LEXICON_SNAPSHOT_PATH = SNAPSHOT_PATH
+
+# Motores de ``batch_analyze`` y ``score_texts``
+ENGINES = ('textblob', 'lexicon', 'hashing')
 
 def preprocess_text(text):
     """
     Prepara el texto para el análisis de sentimientos.
-    Aquí limpiamos y normalizamos para que el modelo entienda mejor el mensaje real.
-    """
-    # Convertir a minúsculas para evitar confusiones
-    text = text.lower()
-    # Eliminar caracteres raros pero dejar puntuación útil
-    text = re.sub(r'[^a-zA-Z0-9\s.,!?]', '', text)
-    # Quitar espacios extra
-    text = ' '.join(text.split())
+    Aquí limpiamos y normalizamos para que el modelo entienda mejor el mensaje real:
+    minúsculas, letras sin acentos ("Habitación" -> "habitacion"), dígitos,
+    puntuación útil (. , ! ?) y un solo espacio entre palabras (ver ``normalizer``).
+    """
+    recorder = instrumentation.active
+    if recorder is None:
+        return normalize_text(text)
+    start = recorder.clock()
+    recorder.observe_length(len(text))
+    text = normalize_text(text)
+    recorder.observe('preprocess', start)
     return text
 
+def preprocess_texts(texts):
+    """
+    Como ``preprocess_text`` para una secuencia de textos, normalizados por
+    bloques en lugar de uno a uno.
+    Returns:
+        list of str: Textos normalizados, en el mismo orden
+    """
+    recorder = instrumentation.active
+    if recorder is None:
+        return normalize_texts(texts)
+    texts = list(texts)
+    start = recorder.clock()
+    for text in texts:
+        recorder.observe_length(len(text))
+    processed = normalize_texts(texts)
+    recorder.observe('preprocess', start)
+    return processed
+
+def load_keyword_lexicons(positive_path=POSITIVE_LEXICON_PATH, negative_path=NEGATIVE_LEXICON_PATH,
+                          negations_path=NEGATIONS_LEXICON_PATH):
+    """
+    Carga (o recarga) los léxicos de palabras clave desde ficheros externos.
+    Vacía la caché de ``analyze_sentiment``, porque las puntuaciones cambian.
+    """
+    global HOTEL_POSITIVE_KEYWORDS, HOTEL_NEGATIVE_KEYWORDS, NEGATION_WORDS
+    HOTEL_POSITIVE_KEYWORDS = load_lexicon(positive_path, preprocess_text)
+    HOTEL_NEGATIVE_KEYWORDS = load_lexicon(negative_path, preprocess_text)
+    NEGATION_WORDS = load_lexicon(negations_path, preprocess_text)
+    if '_cached_score' in globals():
+        clear_cache()
+
+load_keyword_lexicons()
+
+def load_aspect_lexicon(path=ASPECTS_LEXICON_PATH):
+    """
+    Carga (o recarga) los aspectos que puntúa ``get_aspect_details``: una línea
+    por aspecto con la forma "aspecto: palabra, palabra, ...".
+    """
+    global ASPECT_TERMS
+    aspects = {}
+    with open(path, encoding='utf-8') as handle:
+        for number, line in enumerate(handle, start=1):
+            line = line.split('#', 1)[0].strip()
+            if not line:
+                continue
+            aspect, separator, words = line.partition(':')
+            if not separator or not aspect.strip():
+                raise ValueError(f"{path}, línea {number}: se esperaba 'aspecto: palabra, palabra'")
+            words = {preprocess_text(word) for word in words.split(',')} - {''}
+            if any(' ' in word for word in words):
+                raise ValueError(f"{path}, línea {number}: los aspectos solo admiten palabras sueltas")
+            aspects.setdefault(aspect.strip(), set()).update(words)
+    ASPECT_TERMS = aspects
+
+load_aspect_lexicon()
+
+_matcher_cache = {}
+
+def get_keyword_matcher():
+    """
+    Devuelve el autómata compilado para los léxicos actuales. Se recompila solo
+    si alguno de los sets de palabras clave se ha sustituido.
+    """
+    key = (id(HOTEL_POSITIVE_KEYWORDS), id(HOTEL_NEGATIVE_KEYWORDS), id(NEGATION_WORDS), NEGATION_SCOPE)
+    matcher = _matcher_cache.get(key)
+    if matcher is None:
+        matcher = KeywordMatcher(HOTEL_POSITIVE_KEYWORDS, HOTEL_NEGATIVE_KEYWORDS, NEGATION_WORDS,
+                                 negation_scope=NEGATION_SCOPE)
+        _matcher_cache.clear()
+        _matcher_cache[key] = matcher
+    return matcher
+
+def lexicon_config():
+    """
+    Léxicos en uso: palabras clave, negaciones y su alcance y aspectos.
+    """
+    return {'positive_keywords': HOTEL_POSITIVE_KEYWORDS, 'negative_keywords': HOTEL_NEGATIVE_KEYWORDS,
+            'negations': NEGATION_WORDS, 'negation_scope': NEGATION_SCOPE, 'aspects': ASPECT_TERMS}
+
+def configure_lexicons(positive_keywords=None, negative_keywords=None, negations=None, negation_scope=None,
+                       aspects=None):
+    """
+    Sustituye los léxicos ya cargados (los que no se den se mantienen) y vacía
+    la caché. Con lo que devuelve ``lexicon_config`` reproduce los de otro proceso.
+    """
+    global HOTEL_POSITIVE_KEYWORDS, HOTEL_NEGATIVE_KEYWORDS, NEGATION_WORDS, NEGATION_SCOPE, ASPECT_TERMS
+    if positive_keywords is not None:
+        HOTEL_POSITIVE_KEYWORDS = set(positive_keywords)
+    if negative_keywords is not None:
+        HOTEL_NEGATIVE_KEYWORDS = set(negative_keywords)
+    if negations is not None:
+        NEGATION_WORDS = set(negations)
+    if negation_scope is not None:
+        NEGATION_SCOPE = negation_scope
+    if aspects is not None:
+        ASPECT_TERMS = {aspect: set(words) for aspect, words in aspects.items()}
+    clear_cache()
+
 def calculate_domain_sentiment(text):
     """
     Calcula un puntaje de sentimiento usando palabras clave típicas del sector hotelero.
     Así, el análisis es más relevante para este dominio.
     """
-    words = set(text.lower().split())
-    positive_score = len(words.intersection(HOTEL_POSITIVE_KEYWORDS))
-    negative_score = len(words.intersection(HOTEL_NEGATIVE_KEYWORDS))
+    return domain_polarity_of(text.lower())
+
+def match_keywords(processed_text, tokens=None):
+    """
+    Busca las palabras y frases clave hoteleras en un texto ya normalizado, en una
+    sola pasada. Lo que va justo después de una negación cuenta con la polaridad
+    contraria ("not comfortable" es negativo).
+    Args:
+        processed_text (str): Texto normalizado con ``preprocess_text``
+        tokens (list of str): Sus tokens (``keyword_matcher.tokenize``), si ya
+            se tienen, para no volver a partir el texto
+    Returns:
+        tuple: (set de coincidencias positivas, set de coincidencias negativas)
+    """
+    matcher = get_keyword_matcher()
+    recorder = instrumentation.active
+    if recorder is None:
+        return matcher.match(processed_text) if tokens is None else matcher.match_tokens(tokens)
+    start = recorder.clock()
+    matches = matcher.match(processed_text) if tokens is None else matcher.match_tokens(tokens)
+    recorder.observe('keywords', start)
+    return matches
+
+def domain_polarity_of(processed_text, tokens=None):
+    """
+    Polaridad del dominio de un texto ya normalizado (como ``calculate_domain_sentiment``).
+    ``tokens`` es como en ``match_keywords``.
+    """
+    positive_words, negative_words = match_keywords(processed_text, tokens)
+    return _domain_score(len(positive_words), len(negative_words))
+
+def _domain_score(positive_score, negative_score):
     if positive_score == 0 and negative_score == 0:
         return 0
     return (positive_score - negative_score) / (positive_score + negative_score)
@@ -52,42 +211,382 @@ def analyze_sentiment(text):
             - polaridad: float entre -1 y 1
             - sentimiento: str ('Positivo', 'Negativo', o 'Neutral')
     """
+    recorder = instrumentation.active
+    if recorder is not None:
+        start = recorder.clock()
     # Preparamos el texto para que el análisis sea más preciso
     processed_text = preprocess_text(text)
+    # Las reseñas repetidas ("Great hotel!") salen directamente de la caché
+    if recorder is None:
+        return _cached_score(processed_text)
+    misses = _cached_score.cache_info().misses
+    result = _cached_score(processed_text)
+    recorder.record_cache(1, _cached_score.cache_info().misses - misses)
+    recorder.observe('analyze_sentiment', start)
+    return result
+
+def _textblob_polarity(processed_text):
+    """
+    Polaridad de TextBlob para un texto ya normalizado.
+    """
+    recorder = instrumentation.active
+    if recorder is not None:
+        start = recorder.clock()
+    if SCORER == 'snapshot':
+        polarity = get_pattern_lexicon().polarity(processed_text)
+    else:
+        from textblob import TextBlob
+        polarity = TextBlob(processed_text).sentiment.polarity
+    if recorder is not None:
+        recorder.observe('textblob', start)
+    return polarity
+
+_pattern_lexicon = None
+
+def get_pattern_lexicon():
+    """
+    Léxico de TextBlob que usan la instantánea y el motor vectorizado: se lee
+    del JSON precompilado con SCORER='snapshot' y de TextBlob en otro caso.
+    """
+    global _pattern_lexicon
+    if _pattern_lexicon is None:
+        _pattern_lexicon = (PatternLexicon.load(LEXICON_SNAPSHOT_PATH) if SCORER == 'snapshot'
+                            else PatternLexicon.from_textblob())
+    return _pattern_lexicon
+
+def configure_scorer(scorer='textblob', snapshot_path=SNAPSHOT_PATH, model_path=None):
+    """
+    Elige cómo se puntúa y vacía la caché.
+    Args:
+        scorer (str): 'textblob', 'snapshot' o 'hashing'
+        snapshot_path (str): JSON de la instantánea a usar con 'snapshot'
+        model_path (str): Modelo ``.npz`` a usar con 'hashing' (si no, HASHING_MODEL_PATH)
+    """
+    global SCORER, HASHING_MODEL_PATH, LEXICON_SNAPSHOT_PATH, _pattern_lexicon, _hashing_model
+    if scorer not in SCORERS:
+        raise ValueError(f"Motor de polaridad desconocido: {scorer!r}")
+    SCORER = scorer
+    _pattern_lexicon = PatternLexicon.load(snapshot_path) if scorer == 'snapshot' else None
+    LEXICON_SNAPSHOT_PATH = snapshot_path
+    if model_path is not None:
+        HASHING_MODEL_PATH = model_path
+        _hashing_model = None
+    if scorer == 'hashing':
+        get_hashing_model()
+    clear_cache()
+
+_hashing_model = None
+
+def get_hashing_model():
+    """
+    Devuelve el modelo de ``hashing_model`` en uso, cargándolo de
+    HASHING_MODEL_PATH la primera vez.
+    """
+    global _hashing_model
+    if _hashing_model is None:
+        if not HASHING_MODEL_PATH:
+            raise ValueError("No hay modelo hashing: usa configure_scorer('hashing', model_path=...) "
+                             "o define SENTIMENT_MODEL_PATH")
+        from .hashing_model import HashingSentimentModel
+        _hashing_model = HashingSentimentModel.load(HASHING_MODEL_PATH)
+    return _hashing_model
+
+def use_hashing_model(model):
+    """
+    Usa un ``HashingSentimentModel`` ya en memoria (p. ej. recién entrenado)
+    con SCORER='hashing' y el motor 'hashing'. Vacía la caché.
+    """
+    global _hashing_model
+    _hashing_model = model
+    clear_cache()
+
+def _score_processed_text(processed_text):
+    """
+    Puntúa un texto ya normalizado con ``preprocess_text``.
+    """
+    if SCORER == 'hashing':
+        polarity, sentiment = get_hashing_model().predict([processed_text], preprocessed=True)
+        return float(polarity[0]), sentiment[0]
     # TextBlob hace su magia aquí
-    blob = TextBlob(processed_text)
-    textblob_polarity = blob.sentiment.polarity
+    textblob_polarity = _textblob_polarity(processed_text)
     # Añadimos el toque hotelero
     domain_polarity = calculate_domain_sentiment(processed_text)
     # Combinamos ambos resultados para un veredicto más justo
-    combined_polarity = (textblob_polarity * 0.9) + (domain_polarity * 0.1)
-    # Definimos los umbrales de cada sentimiento
-    if combined_polarity > 0.25:
-        sentiment = 'Positivo'
-    elif combined_polarity < -0.25:
-        sentiment = 'Negativo'
-    else:
-        sentiment = 'Neutral'
-    return combined_polarity, sentiment
+    combined_polarity = combine_polarity(textblob_polarity, domain_polarity)
+    return combined_polarity, label_polarity(combined_polarity)
+
+_cached_score = lru_cache(maxsize=DEFAULT_CACHE_SIZE)(_score_processed_text)
 
-def batch_analyze(df, text_column='review'):
+def configure_cache(maxsize=DEFAULT_CACHE_SIZE):
+    """
+    Cambia el tamaño de la caché LRU de ``analyze_sentiment`` y la vacía.
+    Args:
+        maxsize (int): Textos normalizados a recordar; 0 la desactiva y None no pone límite
+    """
+    global _cached_score
+    _cached_score = lru_cache(maxsize=maxsize)(_score_processed_text)
+
+def cache_info():
+    """
+    Estadísticas de la caché: aciertos, fallos, tamaño máximo y tamaño actual.
+    """
+    return _cached_score.cache_info()
+
+def clear_cache():
+    """
+    Vacía la caché y pone a cero sus estadísticas.
+    """
+    _cached_score.cache_clear()
+
+def model_config():
+    """
+    Pesos y umbrales en uso, con las claves de MODEL_CONFIG_KEYS.
+    """
+    return dict(zip(MODEL_CONFIG_KEYS, (TEXTBLOB_WEIGHT, DOMAIN_WEIGHT, POSITIVE_THRESHOLD, NEGATIVE_THRESHOLD)))
+
+def configure_model(textblob_weight=None, domain_weight=None, positive_threshold=None, negative_threshold=None):
+    """
+    Cambia los pesos y umbrales del modelo (los que no se den se mantienen) y vacía la caché.
+    """
+    global TEXTBLOB_WEIGHT, DOMAIN_WEIGHT, POSITIVE_THRESHOLD, NEGATIVE_THRESHOLD
+    config = model_config()
+    config.update({k: float(v) for k, v in zip(MODEL_CONFIG_KEYS, (textblob_weight, domain_weight,
+                                                                   positive_threshold, negative_threshold))
+                   if v is not None})
+    if config['negative_threshold'] > config['positive_threshold']:
+        raise ValueError("El umbral negativo no puede ser mayor que el positivo")
+    TEXTBLOB_WEIGHT, DOMAIN_WEIGHT, POSITIVE_THRESHOLD, NEGATIVE_THRESHOLD = (config[k] for k in MODEL_CONFIG_KEYS)
+    clear_cache()
+
+def load_model_config(path):
+    """
+    Aplica la configuración guardada con ``save_model_config``.
+    """
+    import json
+    with open(path, encoding='utf-8') as handle:
+        config = json.load(handle)
+    unknown = set(config) - set(MODEL_CONFIG_KEYS)
+    if unknown:
+        raise ValueError(f"Claves desconocidas en {path}: {sorted(unknown)}")
+    configure_model(**config)
+
+def save_model_config(path, config=None):
+    """
+    Guarda en JSON unos pesos y umbrales (por defecto, los que están en uso).
+    """
+    import json
+    config = model_config() if config is None else {k: float(config[k]) for k in MODEL_CONFIG_KEYS}
+    with open(path, 'w', encoding='utf-8') as handle:
+        json.dump(config, handle, indent=2)
+        handle.write('\n')
+
+def combine_polarity(textblob_polarity, domain_polarity):
+    """
+    Mezcla la polaridad de TextBlob con la del dominio hotelero.
+    Funciona igual con números sueltos que con arrays de NumPy.
+    """
+    return (textblob_polarity * TEXTBLOB_WEIGHT) + (domain_polarity * DOMAIN_WEIGHT)
+
+def label_polarity(polarity):
+    """
+    Convierte una polaridad combinada en su etiqueta según los umbrales.
+    """
+    if polarity > POSITIVE_THRESHOLD:
+        return 'Positivo'
+    if polarity < NEGATIVE_THRESHOLD:
+        return 'Negativo'
+    return 'Neutral'
+
+def batch_analyze(df, text_column='review', engine='textblob', n_jobs=1, chunksize=None, store=None,
+                  components=False, aspects=False, compact=False, copy=True):
     """
     Analiza una columna completa de reseñas en un DataFrame de pandas.
     Ideal para cuando tienes muchas opiniones y poco tiempo.
     Args:
         df (pandas.DataFrame): DataFrame con la columna de texto a analizar
         text_column (str): Nombre de la columna que contiene los textos
+        engine (str): 'textblob' analiza reseña a reseña con TextBlob;
+            'lexicon' usa el motor vectorizado de ``lexicon_engine``, mucho más
+            rápido y con el mismo resultado salvo redondeo; 'hashing' usa el
+            modelo de ``hashing_model``. Con SCORER='hashing' se usa siempre este último
+        n_jobs (int): Procesos a usar (-1 = todos los núcleos). Con más de uno
+            se delega en ``parallel.parallel_batch_analyze``
+        chunksize (int): Filas por trozo en modo paralelo
+        store (score_store.ScoreStore): Si se da, reutiliza las puntuaciones guardadas
+            y solo analiza las reseñas nuevas o modificadas
+        components (bool): Añade también las columnas 'textblob_polarity' y
+            'domain_polarity', las dos partes de la polaridad combinada. No
+            disponible con el motor 'hashing' ni con ``store``
+        aspects (bool): Añade una columna 'aspect_<aspecto>' por aspecto de
+            ASPECT_TERMS con su polaridad (NaN si la reseña no lo menciona).
+            Solo con el motor 'lexicon' y sin ``store``
+        compact (bool): Polaridad en float32 y sentimiento categórico (ver ``compact``)
+        copy (bool): Con False no se copia ``df``: se devuelven solo las columnas
+            nuevas, con el mismo índice
     Returns:
         pandas.DataFrame: DataFrame original con columnas extra de polaridad y sentimiento
     """
-    # Trabajamos sobre una copia para no tocar tus datos originales
+    if store is not None:
+        if components or aspects:
+            raise ValueError("El almacén solo guarda la polaridad combinada: usa components=False y aspects=False")
+        from .score_store import batch_analyze_with_store
+        return batch_analyze_with_store(df, store, text_column, engine=engine, n_jobs=n_jobs,
+                                        chunksize=chunksize, compact=compact, copy=copy)
+    if n_jobs != 1:
+        from .parallel import parallel_batch_analyze
+        return parallel_batch_analyze(df, text_column, engine=engine, n_jobs=n_jobs, chunksize=chunksize,
+                                      components=components, aspects=aspects, compact=compact, copy=copy)
+    from .compact import result_columns
+    recorder = instrumentation.active
+    if recorder is not None:
+        start = recorder.clock()
+    # Analizamos cada reseña distinta una sola vez
+    if components or aspects:
+        if aspects:
+            textblob_polarity, domain_polarity, aspect_polarity = score_aspects(df[text_column], engine)
+        else:
+            textblob_polarity, domain_polarity = score_components(df[text_column], engine)
+        columns = result_columns(*polarity_from_components(textblob_polarity, domain_polarity), compact=compact)
+        dtype = columns['polarity'].dtype
+        if components:
+            columns.update(textblob_polarity=textblob_polarity.astype(dtype),
+                           domain_polarity=domain_polarity.astype(dtype))
+        if aspects:
+            columns.update(aspect_columns(aspect_polarity, dtype))
+    else:
+        codes, polarity, sentiment = _score_unique(df[text_column], engine)
+        columns = result_columns(polarity, sentiment, codes, compact=compact)
+    if recorder is not None:
+        pandas_start = recorder.clock()
+    result_df = result_frame(df, columns, copy)
+    if recorder is not None:
+        recorder.observe('pandas', pandas_start)
+        recorder.observe('batch_analyze', start)
+    return result_df
+
+def score_texts(texts, engine='textblob'):
+    """
+    Puntúa una secuencia de textos. Los que quedan iguales tras ``preprocess_text``
+    se puntúan una sola vez y el resultado se reparte a todas sus filas.
+    Args:
+        texts (iterable of str): Textos a analizar
+        engine (str): 'textblob', 'lexicon' o 'hashing', como en ``batch_analyze``
+    Returns:
+        tuple: (polaridades, sentimientos) como arrays de NumPy alineados con ``texts``
+    """
+    codes, polarity, sentiment = _score_unique(texts, engine)
+    return polarity[codes], sentiment[codes]
+
+def _score_unique(texts, engine):
+    """
+    Como ``score_texts`` pero sin repartir el resultado a las filas.
+    Returns:
+        tuple: (codes, polaridades, sentimientos); la fila i es el texto distinto codes[i]
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Motor de análisis desconocido: {engine!r}")
+    import numpy as np
+    import pandas as pd
+    recorder = instrumentation.active
+    processed = np.array(preprocess_texts(texts), dtype=object)
+    if recorder is not None:
+        start = recorder.clock()
+    codes, uniques = pd.factorize(processed)
+    if recorder is not None:
+        recorder.observe('pandas', start)
+        recorder.count('rows', len(codes))
+        recorder.count('unique_texts', len(uniques))
+        start = recorder.clock()
+        misses = _cached_score.cache_info().misses
+    if engine == 'hashing' or SCORER == 'hashing':
+        engine = 'hashing'
+        polarity, sentiment = get_hashing_model().predict(uniques, preprocessed=True)
+    elif engine == 'lexicon':
+        from .lexicon_engine import get_default_engine
+        polarity, sentiment = get_default_engine().score(uniques, preprocessed=True)
+    else:
+        results = [_cached_score(t) for t in uniques]
+        polarity = np.array([r[0] for r in results], dtype=float)
+        sentiment = np.array([r[1] for r in results], dtype=object)
+    if recorder is not None:
+        if engine in ('lexicon', 'hashing'):
+            recorder.observe(f'{engine}_engine', start)
+        else:
+            recorder.record_cache(len(uniques), _cached_score.cache_info().misses - misses)
+    return codes, polarity, sentiment
+
+def result_frame(df, columns, copy=True):
+    """
+    Añade ``columns`` (nombre -> array por fila) a una copia de ``df``, para no
+    tocar tus datos originales, o con copy=False las devuelve solas con el índice de ``df``.
+    """
+    import pandas as pd
+    if not copy:
+        return pd.DataFrame(columns, index=df.index)
     result_df = df.copy()
-    # Analizamos cada reseña
-    sentiments = result_df[text_column].apply(analyze_sentiment)
-    # Separamos los resultados en columnas
-    result_df['polarity'], result_df['sentiment'] = zip(*sentiments)
+    for name, values in columns.items():
+        result_df[name] = values
     return result_df
 
+def score_components(texts, engine='textblob'):
+    """
+    Las dos partes de la polaridad combinada, sin mezclar: lo que sirve para
+    probar otros pesos y umbrales sin volver a analizar el texto.
+    Args:
+        texts (iterable of str): Textos a analizar
+        engine (str): 'textblob' o 'lexicon', como en ``batch_analyze``
+    Returns:
+        tuple: (polaridad de TextBlob, polaridad del dominio) como arrays de NumPy
+            alineados con ``texts``
+    """
+    if engine not in ('textblob', 'lexicon') or SCORER == 'hashing':
+        raise ValueError(f"El motor {engine!r} no separa la polaridad en componentes")
+    import numpy as np
+    import pandas as pd
+    codes, uniques = pd.factorize(np.array(preprocess_texts(texts), dtype=object))
+    if engine == 'lexicon':
+        from .lexicon_engine import get_default_engine
+        textblob_polarity, domain_polarity = get_default_engine().score_components(uniques, preprocessed=True)
+    else:
+        textblob_polarity = np.array([_textblob_polarity(t) for t in uniques], dtype=float)
+        domain_polarity = np.array([domain_polarity_of(t) for t in uniques], dtype=float)
+    return textblob_polarity[codes], domain_polarity[codes]
+
+def score_aspects(texts, engine='lexicon'):
+    """
+    Como ``score_components`` y, del mismo recorrido del texto, la polaridad de
+    cada aspecto de ASPECT_TERMS (ver ``get_aspect_details``).
+    Args:
+        texts (iterable of str): Textos a analizar
+        engine (str): Solo 'lexicon'
+    Returns:
+        tuple: (polaridad de TextBlob, polaridad del dominio, matriz con una
+            columna por aspecto y NaN donde el texto no lo menciona), alineados con ``texts``
+    """
+    if engine != 'lexicon' or SCORER == 'hashing':
+        raise ValueError(f"El análisis por aspectos necesita el motor 'lexicon', no {engine!r}")
+    import numpy as np
+    import pandas as pd
+    from .lexicon_engine import get_default_engine
+    codes, uniques = pd.factorize(np.array(preprocess_texts(texts), dtype=object))
+    textblob_polarity, domain_polarity, aspect_polarity = get_default_engine().score_aspects(uniques,
+                                                                                             preprocessed=True)
+    return textblob_polarity[codes], domain_polarity[codes], aspect_polarity[codes]
+
+def aspect_columns(aspect_polarity, dtype=float):
+    """
+    Columnas 'aspect_<aspecto>' a partir de la matriz de ``score_aspects``.
+    """
+    return {f'aspect_{aspect}': aspect_polarity[:, i].astype(dtype) for i, aspect in enumerate(ASPECT_TERMS)}
+
+def polarity_from_components(textblob_polarity, domain_polarity):
+    """
+    Polaridad combinada y etiquetas para arrays de componentes, con los pesos y umbrales en uso.
+    """
+    from .lexicon_engine import label_polarities
+    polarity = combine_polarity(textblob_polarity, domain_polarity)
+    return polarity, label_polarities(polarity)
+
 def get_sentiment_details(text):
     """
     Devuelve un análisis detallado y transparente del sentimiento de un texto.
@@ -97,15 +596,102 @@ def get_sentiment_details(text):
     Returns:
         dict: Diccionario con detalles del análisis
     """
-    polarity, sentiment = analyze_sentiment(text)
-    # Buscamos palabras clave positivas y negativas
-    words = set(preprocess_text(text).split())
-    positive_words = words.intersection(HOTEL_POSITIVE_KEYWORDS)
-    negative_words = words.intersection(HOTEL_NEGATIVE_KEYWORDS)
+    # Normalizamos una sola vez y reutilizamos las palabras clave para la polaridad
+    processed_text = preprocess_text(text)
+    positive_words, negative_words = match_keywords(processed_text)
+    textblob_polarity = _textblob_polarity(processed_text)
+    domain_polarity = _domain_score(len(positive_words), len(negative_words))
+    polarity = combine_polarity(textblob_polarity, domain_polarity)
     return {
         'polarity': polarity,
-        'sentiment': sentiment,
-        'positive_keywords': list(positive_words),
-        'negative_keywords': list(negative_words),
+        'sentiment': label_polarity(polarity),
+        'positive_keywords': sorted(positive_words),
+        'negative_keywords': sorted(negative_words),
         'confidence': abs(polarity)  # La confianza es la magnitud de la polaridad
     }
+
+def get_aspect_details(text):
+    """
+    Sentimiento de cada frase y de cada aspecto de ASPECT_TERMS (habitación,
+    personal, desayuno, ubicación, precio) de una reseña. Sale del mismo recorrido
+    del texto que la polaridad global, con el motor 'lexicon': cada valoración y
+    cada palabra clave suelta cuenta para la mención de aspecto más cercana de su
+    frase, mejor si está en la misma cláusula.
+    Args:
+        text (str): El texto a analizar
+    Returns:
+        dict: 'polarity' y 'sentiment' de la reseña; 'sentences', una lista de
+            dicts con 'text', 'polarity' y 'sentiment'; y 'aspects', un dict
+            aspecto -> {'polarity', 'sentiment'} con los aspectos mencionados
+    """
+    if SCORER == 'hashing':
+        raise ValueError("El análisis por aspectos necesita el léxico de TextBlob, no el modelo hashing")
+    from .lexicon_engine import get_default_engine
+    textblob_polarity, domain_polarity, aspect_polarity, sentences = get_default_engine().aspect_details(text)
+    polarity = combine_polarity(textblob_polarity, domain_polarity)
+    return {
+        'polarity': polarity,
+        'sentiment': label_polarity(polarity),
+        'sentences': [{'text': sentence, 'polarity': p, 'sentiment': label_polarity(p)}
+                      for sentence, p in ((sentence, combine_polarity(textblob, domain))
+                                          for sentence, textblob, domain in sentences)],
+        'aspects': {aspect: {'polarity': float(p), 'sentiment': label_polarity(p)}
+                    for aspect, p in zip(ASPECT_TERMS, aspect_polarity) if p == p},
+    }
+
+def batch_sentiment_details(df, text_column='review', engine='textblob', compact=False, copy=True,
+                            lexicon_engine=None):
+    """
+    Versión por lotes de ``get_sentiment_details``: cada reseña distinta se
+    normaliza y se analiza una sola vez, y de esa pasada salen polaridad,
+    sentimiento, confianza y palabras clave.
+    Args:
+        df (pandas.DataFrame): DataFrame con la columna de texto a analizar
+        text_column (str): Nombre de la columna que contiene los textos
+        engine (str): 'textblob' o 'lexicon', como en ``batch_analyze``
+        compact (bool): float32, sentimiento categórico y palabras clave como
+            máscaras uint64 sobre las entradas del léxico, o como arrays de
+            posiciones si tiene más de 64 (ver ``compact``)
+        copy (bool): Con False devuelve solo las columnas nuevas, como en ``batch_analyze``
+        lexicon_engine (lexicon_engine.LexiconEngine): Motor a usar con
+            engine='lexicon'; por defecto, el compartido del proceso
+    Returns:
+        pandas.DataFrame: DataFrame original con las columnas 'polarity', 'sentiment',
+            'confidence', 'positive_keywords' y 'negative_keywords'
+    """
+    if engine not in ('textblob', 'lexicon'):
+        raise ValueError(f"Motor de análisis desconocido: {engine!r}")
+    import numpy as np
+    import pandas as pd
+    from .compact import keyword_columns, result_columns
+    codes, uniques = pd.factorize(np.array(preprocess_texts(df[text_column]), dtype=object))
+    if compact:
+        positive, negative = keyword_columns(uniques)
+    else:
+        matches = [match_keywords(t) for t in uniques]
+        positive = np.empty(len(uniques), dtype=object)
+        negative = np.empty(len(uniques), dtype=object)
+        positive[:] = [sorted(p) for p, _ in matches]
+        negative[:] = [sorted(n) for _, n in matches]
+    if engine == 'lexicon':
+        if lexicon_engine is None:
+            from .lexicon_engine import get_default_engine
+            lexicon_engine = get_default_engine()
+        textblob_polarity, domain_polarity = lexicon_engine.score_components(uniques, preprocessed=True)
+    else:
+        textblob_polarity = np.array([_textblob_polarity(t) for t in uniques], dtype=float)
+        if compact:
+            domain_polarity = np.array([domain_polarity_of(t) for t in uniques], dtype=float)
+        else:
+            domain_polarity = np.array([_domain_score(len(p), len(n)) for p, n in matches], dtype=float)
+    polarity = combine_polarity(textblob_polarity, domain_polarity)
+    sentiment = np.array([label_polarity(p) for p in polarity], dtype=object)
+
+    columns = result_columns(polarity, sentiment, codes, compact=compact)
+    columns['confidence'] = np.abs(columns['polarity'])
+    columns['positive_keywords'] = positive[codes]
+    columns['negative_keywords'] = negative[codes]
+    return result_frame(df, columns, copy)
+
+if os.environ.get('SENTIMENT_CONFIG'):
+    load_model_config(os.environ['SENTIMENT_CONFIG'])
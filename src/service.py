@@ -0,0 +1,431 @@
+"""
+Servicio de puntuación asíncrono con micro-lotes.
+
+Las peticiones concurrentes se juntan en micro-lotes (hasta ``max_batch_size``
+textos o ``max_wait`` segundos, lo que llegue antes) que se puntúan de una vez
+con ``score_texts``. Así, muchas peticiones de una sola reseña aprovechan el
+camino por lotes en lugar de llamar a ``analyze_sentiment`` una a una.
+
+El servicio escucha en TCP o en un socket Unix y habla JSON por líneas:
+
+    -> {"id": 1, "text": "Great hotel!"}
+    <- {"id": 1, "polarity": 0.82, "sentiment": "Positivo"}
+    -> {"id": 2, "op": "metrics"}
+    <- {"id": 2, "metrics": {...}}
+
+La cola es acotada. Si se llena, las peticiones esperan hasta ``enqueue_timeout``
+y después se rechazan con un error ``overloaded``; si falla la puntuación del
+lote, sus peticiones reciben ``scoring_failed``. Además, cada conexión deja de
+leer del socket cuando tiene ``max_inflight`` peticiones pendientes. Una línea
+de más de ``max_request_bytes`` se descarta y se responde con el error
+``request_too_large`` sin cerrar la conexión.
+
+Uso:
+    python -m src.service --port 8765
+    python -m src.service --unix /tmp/sentiment.sock --max-batch-size 512 --max-wait-ms 2
+"""
+import argparse
+import asyncio
+import json
+import re
+import time
+from collections import deque
+
+import numpy as np
+
+from .sentiment_model import ENGINES, score_texts
+
+DEFAULT_MAX_BATCH_SIZE = 256
+DEFAULT_MAX_WAIT = 0.005
+DEFAULT_MAX_QUEUE = 10_000
+DEFAULT_ENQUEUE_TIMEOUT = 1.0
+DEFAULT_MAX_INFLIGHT = 1_024
+# Tamaño máximo de una línea de petición (el de asyncio por defecto es 64 KiB)
+DEFAULT_MAX_REQUEST_BYTES = 1 << 20
+# El id de una petición al principio de la línea, como lo manda ScoringClient
+_LEADING_ID = re.compile(rb'\s*\{\s*"id"\s*:\s*(-?\d+|"(?:[^"\\]|\\.)*"|null)\s*[,}]')
+# Latencias recientes que se guardan para calcular los percentiles
+LATENCY_WINDOW = 10_000
+
+
+class ServiceOverloaded(Exception):
+    """La cola del servicio sigue llena pasado el tiempo de espera."""
+
+
+class MicroBatcher:
+    """
+    Junta peticiones concurrentes en micro-lotes y las puntúa en un hilo aparte,
+    para que el bucle de eventos siga aceptando peticiones mientras tanto.
+    También sirve de cliente dentro del proceso: ``await batcher.score(text)``.
+    Args:
+        engine (str): 'lexicon', 'textblob' o 'hashing', como en ``batch_analyze``
+        max_batch_size (int): Textos como máximo por micro-lote
+        max_wait (float): Segundos que se espera a completar un lote tras su primera petición
+        max_queue (int): Peticiones pendientes como máximo
+    """
+
+    def __init__(self, engine='lexicon', max_batch_size=DEFAULT_MAX_BATCH_SIZE,
+                 max_wait=DEFAULT_MAX_WAIT, max_queue=DEFAULT_MAX_QUEUE):
+        if engine not in ENGINES:
+            raise ValueError(f"Motor de análisis desconocido: {engine!r}")
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size debe ser al menos 1")
+        self.engine = engine
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.max_queue = max_queue
+        self._queue = None
+        self._worker = None
+        self._started = None
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self.requests = 0
+        self.rejected = 0
+        self.batches = 0
+        self.batched_texts = 0
+
+    async def start(self):
+        """
+        Puntúa un texto de prueba y arranca el trabajador. Si el motor no puede
+        puntuar (p. ej. 'hashing' sin modelo), el error sale aquí y no en cada petición.
+        """
+        if self._worker is None:
+            await asyncio.get_running_loop().run_in_executor(None, score_texts, ['warm up'], self.engine)
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._started = time.perf_counter()
+            self._worker = asyncio.create_task(self._run())
+        return self
+
+    async def stop(self):
+        """Termina los lotes pendientes y para el trabajador."""
+        if self._worker is None:
+            return
+        await self._queue.join()
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    async def score(self, text, timeout=None):
+        """
+        Puntúa un texto dentro de un micro-lote.
+        Args:
+            text (str): El texto a analizar
+            timeout (float): Segundos a esperar sitio en la cola; None espera sin límite
+        Returns:
+            tuple: (polaridad, sentimiento), como ``analyze_sentiment``
+        Raises:
+            ServiceOverloaded: si la cola sigue llena pasado ``timeout``
+        """
+        if self._worker is None:
+            await self.start()
+        future = asyncio.get_running_loop().create_future()
+        item = (text, future, time.perf_counter())
+        try:
+            if timeout is None:
+                await self._queue.put(item)
+            else:
+                await asyncio.wait_for(self._queue.put(item), timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise ServiceOverloaded(f"cola llena ({self.max_queue} peticiones pendientes)") from None
+        return await future
+
+    async def _next_batch(self):
+        """Espera la primera petición y añade las que lleguen antes de ``max_wait``."""
+        queue = self._queue
+        batch = [await queue.get()]
+        deadline = asyncio.get_running_loop().time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            if queue.empty():
+                remaining = deadline - asyncio.get_running_loop().time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            else:
+                batch.append(queue.get_nowait())
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._next_batch()
+            try:
+                texts = [text for text, _, _ in batch]
+                try:
+                    polarity, sentiment = await loop.run_in_executor(None, score_texts, texts, self.engine)
+                except Exception as error:
+                    for _, future, _ in batch:
+                        if not future.done():
+                            future.set_exception(error)
+                    continue
+                now = time.perf_counter()
+                for (_, future, enqueued), p, s in zip(batch, polarity.tolist(), sentiment.tolist()):
+                    if not future.done():
+                        future.set_result((p, s))
+                    self._latencies.append(now - enqueued)
+                self.requests += len(batch)
+                self.batches += 1
+                self.batched_texts += len(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def metrics(self):
+        """
+        Métricas desde que arrancó el servicio.
+        Returns:
+            dict: peticiones servidas y rechazadas, lotes, tamaño medio de lote,
+                profundidad de la cola, peticiones/s y latencia p50/p99 en ms
+        """
+        elapsed = time.perf_counter() - self._started if self._started else 0.0
+        latencies = np.fromiter(self._latencies, dtype=float)
+        p50, p99 = (np.percentile(latencies, [50, 99]) * 1e3).tolist() if len(latencies) else (None, None)
+        return {
+            'requests': self.requests,
+            'rejected': self.rejected,
+            'batches': self.batches,
+            'mean_batch_size': self.batched_texts / self.batches if self.batches else None,
+            'queue_depth': self._queue.qsize() if self._queue is not None else 0,
+            'requests_per_s': self.requests / elapsed if elapsed else None,
+            'latency_p50_ms': p50,
+            'latency_p99_ms': p99,
+        }
+
+
+async def _handle_request(batcher, line, enqueue_timeout):
+    try:
+        request = json.loads(line)
+    except ValueError:
+        return {'error': 'invalid_json'}
+    if not isinstance(request, dict):
+        return {'error': 'invalid_request'}
+    response = {'id': request.get('id')}
+    if request.get('op') == 'metrics':
+        response['metrics'] = batcher.metrics()
+        return response
+    text = request.get('text')
+    if not isinstance(text, str):
+        response['error'] = 'missing_text'
+        return response
+    try:
+        response['polarity'], response['sentiment'] = await batcher.score(text, enqueue_timeout)
+    except ServiceOverloaded:
+        response['error'] = 'overloaded'
+    except Exception:
+        # Un fallo del motor con este lote: se responde igual, o el cliente esperaría para siempre
+        response['error'] = 'scoring_failed'
+    return response
+
+
+def _leading_id(head):
+    """El id de una petición a partir de su principio, si va delante; si no, None."""
+    match = _LEADING_ID.match(head)
+    if match is None:
+        return None
+    try:
+        return json.loads(match.group(1))
+    except ValueError:
+        return None
+
+
+async def _read_request(reader):
+    """
+    La siguiente línea de ``reader`` (b'' al final de la conexión). Si pasa del
+    límite del lector se descarta hasta su salto de línea, para que la conexión
+    siga sincronizada, y se devuelve el error con el id que se haya podido leer.
+    Returns:
+        tuple: (línea, None) o (None, respuesta de error)
+    """
+    error = None
+    while True:
+        try:
+            line = await reader.readuntil(b'\n')
+        except asyncio.IncompleteReadError as incomplete:
+            line = incomplete.partial
+        except asyncio.LimitOverrunError as overrun:
+            discarded = await reader.readexactly(overrun.consumed)
+            if error is None:
+                error = {'id': _leading_id(discarded), 'error': 'request_too_large'}
+            continue
+        return (None, error) if error is not None else (line, None)
+
+
+async def _serve_connection(batcher, reader, writer, enqueue_timeout, max_inflight):
+    """Atiende una conexión; las respuestas pueden salir en otro orden que las peticiones."""
+    slots = asyncio.Semaphore(max_inflight)
+    pending = set()
+
+    async def answer(line, response):
+        try:
+            if response is None:
+                response = await _handle_request(batcher, line, enqueue_timeout)
+            writer.write(json.dumps(response).encode('utf-8') + b'\n')
+            await writer.drain()
+        finally:
+            slots.release()
+
+    try:
+        while True:
+            # Con max_inflight pendientes dejamos de leer: el cliente nota la presión
+            await slots.acquire()
+            line, response = await _read_request(reader)
+            if not line and response is None:
+                slots.release()
+                break
+            task = asyncio.create_task(answer(line, response))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def start_server(batcher, host='127.0.0.1', port=8765, path=None,
+                       enqueue_timeout=DEFAULT_ENQUEUE_TIMEOUT, max_inflight=DEFAULT_MAX_INFLIGHT,
+                       max_request_bytes=DEFAULT_MAX_REQUEST_BYTES):
+    """
+    Arranca el servicio sobre ``batcher`` en TCP o, si se da ``path``, en un socket Unix.
+    Las peticiones de más de ``max_request_bytes`` se rechazan con ``request_too_large``.
+    Returns:
+        asyncio.Server: el servidor ya escuchando
+    """
+    await batcher.start()
+
+    def handler(reader, writer):
+        return _serve_connection(batcher, reader, writer, enqueue_timeout, max_inflight)
+
+    if path is not None:
+        return await asyncio.start_unix_server(handler, path=path, limit=max_request_bytes)
+    return await asyncio.start_server(handler, host, port, limit=max_request_bytes)
+
+
+class ScoringClient:
+    """
+    Cliente asíncrono del servicio. Admite muchas peticiones concurrentes sobre
+    una sola conexión y empareja cada respuesta con su petición por ``id``.
+    """
+
+    def __init__(self, reader, writer):
+        self._reader = reader
+        self._writer = writer
+        self._next_id = 0
+        self._waiting = {}
+        self._listener = asyncio.create_task(self._listen())
+
+    @classmethod
+    async def connect(cls, host='127.0.0.1', port=8765, path=None):
+        if path is not None:
+            reader, writer = await asyncio.open_unix_connection(path)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def _listen(self):
+        try:
+            while True:
+                line = await self._reader.readline()
+                if not line:
+                    break
+                response = json.loads(line)
+                future = self._waiting.pop(response.get('id'), None)
+                if future is not None and not future.done():
+                    future.set_result(response)
+        finally:
+            for future in self._waiting.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("conexión cerrada por el servicio"))
+            self._waiting.clear()
+
+    async def _request(self, payload):
+        if self._listener.done():
+            raise ConnectionError("conexión cerrada por el servicio")
+        self._next_id += 1
+        # El id va delante: si la petición es demasiado larga, el servicio aún lo lee
+        payload = {'id': self._next_id, **payload}
+        future = asyncio.get_running_loop().create_future()
+        self._waiting[self._next_id] = future
+        self._writer.write(json.dumps(payload).encode('utf-8') + b'\n')
+        await self._writer.drain()
+        return await future
+
+    async def score(self, text):
+        """
+        Returns:
+            tuple: (polaridad, sentimiento)
+        Raises:
+            ServiceOverloaded: si el servicio rechaza la petición por estar saturado
+        """
+        response = await self._request({'text': text})
+        if response.get('error') == 'overloaded':
+            raise ServiceOverloaded("el servicio está saturado")
+        if 'error' in response:
+            raise ValueError(f"Petición rechazada: {response['error']}")
+        return response['polarity'], response['sentiment']
+
+    async def metrics(self):
+        return (await self._request({'op': 'metrics'}))['metrics']
+
+    async def close(self):
+        self._writer.close()
+        try:
+            await self._writer.wait_closed()
+        except ConnectionError:
+            pass
+        self._listener.cancel()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+
+async def _serve_forever(args):
+    batcher = MicroBatcher(args.engine, args.max_batch_size, args.max_wait_ms / 1e3, args.max_queue)
+    server = await start_server(batcher, args.host, args.port, args.unix, args.enqueue_timeout,
+                                args.max_inflight, args.max_request_bytes)
+    where = args.unix or f"{args.host}:{args.port}"
+    print(f"Servicio de sentimiento escuchando en {where} (motor '{args.engine}')", flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servicio de puntuación con micro-lotes.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', help="Escucha en este socket Unix en lugar de TCP")
+    parser.add_argument('--engine', choices=ENGINES, default='lexicon')
+    parser.add_argument('--max-batch-size', type=int, default=DEFAULT_MAX_BATCH_SIZE)
+    parser.add_argument('--max-wait-ms', type=float, default=DEFAULT_MAX_WAIT * 1e3)
+    parser.add_argument('--max-queue', type=int, default=DEFAULT_MAX_QUEUE)
+    parser.add_argument('--enqueue-timeout', type=float, default=DEFAULT_ENQUEUE_TIMEOUT,
+                        help="Segundos a esperar sitio en la cola antes de responder 'overloaded'")
+    parser.add_argument('--max-inflight', type=int, default=DEFAULT_MAX_INFLIGHT,
+                        help="Peticiones pendientes por conexión antes de dejar de leer")
+    parser.add_argument('--max-request-bytes', type=int, default=DEFAULT_MAX_REQUEST_BYTES,
+                        help="Longitud máxima de una línea de petición; las más largas reciben "
+                             "'request_too_large'")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(_serve_forever(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+Resumen incremental de un análisis por trozos.
+
+``SentimentSummary`` se alimenta con cada trozo ya puntuado y guarda solo
+agregados de tamaño fijo: cuántas reseñas hay de cada etiqueta, un histograma
+de polaridad y la frecuencia de cada entrada del léxico de palabras clave.
+Así se pueden dibujar los gráficos de un fichero enorme sin tener todos los
+resultados en memoria.
+"""
+from collections import Counter
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+
+from .compact import KEYWORD_MASK_DTYPE, decode_keywords
+from .keyword_matcher import lexicon_entry
+from .sentiment_model import SENTIMENT_LABELS, get_keyword_matcher
+
+POLARITY_BINS = 20
+
+
+def _entries(column):
+    """Entradas del léxico de una columna de palabras clave, en cualquiera de sus formatos."""
+    matcher = get_keyword_matcher()
+    if column.dtype == KEYWORD_MASK_DTYPE or any(isinstance(v, np.ndarray) for v in column):
+        return chain.from_iterable(decode_keywords(column, matcher))
+    entries = set(matcher.entries)
+    found = (lexicon_entry(keyword, entries) for keyword in chain.from_iterable(column))
+    return (entry for entry in found if entry is not None)
+
+
+class SentimentSummary:
+    """
+    Agregados acumulados de las reseñas vistas hasta ahora.
+    Args:
+        bins (int): Número de intervalos del histograma de polaridad en [-1, 1]
+    """
+
+    def __init__(self, bins=POLARITY_BINS):
+        self.rows = 0
+        self.polarity_sum = 0.0
+        self.label_counts = dict.fromkeys(SENTIMENT_LABELS, 0)
+        self.bin_edges = np.linspace(-1.0, 1.0, bins + 1)
+        self.histogram = np.zeros(bins, dtype=np.int64)
+        self.positive_keywords = Counter()
+        self.negative_keywords = Counter()
+
+    def update(self, scored):
+        """
+        Suma un trozo de resultados de ``batch_analyze`` o ``batch_sentiment_details``
+        (también en formato compacto). Las palabras clave solo se cuentan si el
+        trozo trae sus columnas, y se cuentan por entrada del léxico: una
+        coincidencia negada ("not really clean") suma a la suya ("clean") en
+        la polaridad contraria, igual que en las máscaras.
+        """
+        polarity = scored['polarity'].to_numpy(dtype=float)
+        self.rows += len(polarity)
+        self.polarity_sum += float(polarity.sum())
+        counts, _ = np.histogram(np.clip(polarity, -1.0, 1.0), bins=self.bin_edges)
+        self.histogram += counts
+        for label, count in scored['sentiment'].value_counts().items():
+            self.label_counts[label] = self.label_counts.get(label, 0) + int(count)
+        for column, counter in (('positive_keywords', self.positive_keywords),
+                                ('negative_keywords', self.negative_keywords)):
+            if column in scored:
+                counter.update(_entries(scored[column]))
+        return self
+
+    def merge(self, other):
+        """Añade los agregados de otro resumen con los mismos intervalos."""
+        if not np.array_equal(self.bin_edges, other.bin_edges):
+            raise ValueError("Los histogramas tienen intervalos distintos")
+        self.rows += other.rows
+        self.polarity_sum += other.polarity_sum
+        for label, count in other.label_counts.items():
+            self.label_counts[label] = self.label_counts.get(label, 0) + count
+        self.histogram += other.histogram
+        self.positive_keywords.update(other.positive_keywords)
+        self.negative_keywords.update(other.negative_keywords)
+        return self
+
+    @property
+    def mean_polarity(self):
+        return self.polarity_sum / self.rows if self.rows else 0.0
+
+    def label_frame(self):
+        """Reseñas por etiqueta, listo para ``st.bar_chart``."""
+        return pd.DataFrame({'reviews': list(self.label_counts.values())},
+                            index=pd.Index(list(self.label_counts), name='sentiment'))
+
+    def histogram_frame(self):
+        """Reseñas por intervalo de polaridad, con el centro del intervalo como índice."""
+        centers = (self.bin_edges[:-1] + self.bin_edges[1:]) / 2
+        return pd.DataFrame({'reviews': self.histogram},
+                            index=pd.Index(centers.round(2), name='polarity'))
+
+    def top_keywords(self, n=10):
+        """Las ``n`` palabras clave más frecuentes de cada polaridad."""
+        rows = [(kw, count, 'positive') for kw, count in self.positive_keywords.most_common(n)]
+        rows += [(kw, count, 'negative') for kw, count in self.negative_keywords.most_common(n)]
+        return pd.DataFrame(rows, columns=['keyword', 'count', 'kind'])
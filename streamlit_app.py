@@ -1,16 +1,158 @@
+import os
+import tempfile
+
 import streamlit as st
-from src.sentiment_model import analyze_sentiment
+
+# Filas que se leen, analizan y escriben de cada vez al procesar un CSV
+BULK_CHUNKSIZE = 20_000
+
+@st.cache_resource
+def load_lexicon():
+    """
+    La instantánea del léxico de TextBlob, leída una sola vez por proceso, o
+    None si SENTIMENT_SCORER pide otro motor. Es solo de la app: no se cambia
+    la configuración global de ``sentiment_model``, que comparten todas las
+    sesiones y el resto del proceso.
+    """
+    if 'SENTIMENT_SCORER' in os.environ:
+        return None
+    from src.lexicon_snapshot import PatternLexicon
+    return PatternLexicon.load()
+
+@st.cache_resource
+def load_analyzer():
+    """
+    Prepara el analizador una sola vez por proceso, no en cada interacción.
+    Con la instantánea no se cargan TextBlob, NLTK, NumPy ni pandas al arrancar.
+    """
+    from src.sentiment_model import (analyze_sentiment, combine_polarity, domain_polarity_of,
+                                     label_polarity, preprocess_text)
+    lexicon = load_lexicon()
+    if lexicon is None:
+        analyze_sentiment("warm up")
+        return analyze_sentiment
+
+    def analyze(text):
+        processed = preprocess_text(text)
+        polarity = combine_polarity(lexicon.polarity(processed), domain_polarity_of(processed))
+        return polarity, label_polarity(polarity)
+
+    analyze("warm up")
+    return analyze
+
+@st.cache_resource
+def load_bulk_engine():
+    """Motor vectorizado para los CSV sobre la misma instantánea (None: el del proceso)."""
+    from src.lexicon_engine import LexiconEngine
+    lexicon = load_lexicon()
+    return None if lexicon is None else LexiconEngine(lexicon)
+
+def render_summary(summary):
+    """Dibuja los gráficos a partir de los agregados, nunca de las filas."""
+    total, mean = st.columns(2)
+    total.metric("Reseñas analizadas", f"{summary.rows:,}")
+    mean.metric("Polaridad media", f"{summary.mean_polarity:.2f}")
+    st.subheader("Sentimiento")
+    st.bar_chart(summary.label_frame())
+    st.subheader("Distribución de polaridad")
+    st.bar_chart(summary.histogram_frame())
+    st.subheader("Palabras clave más frecuentes")
+    st.dataframe(summary.top_keywords(), hide_index=True)
+
+def downloadable(scored):
+    """Las listas de palabras clave se guardan como texto separado por ';'."""
+    scored = scored.copy()
+    for column in ('positive_keywords', 'negative_keywords'):
+        scored[column] = scored[column].map('; '.join)
+    return scored
+
+def score_upload(uploaded, text_column, placeholder, engine=None):
+    """
+    Analiza el CSV subido por trozos. Cada trozo se escribe a un fichero de un
+    directorio temporal propio y se suma al resumen; en memoria solo queda el
+    trozo actual y los agregados. Si algo falla (o Streamlit corta la ejecución)
+    el directorio se borra en el momento; si no, se borra al sustituirlo por otro
+    análisis o cuando la sesión desaparece y se libera el objeto.
+    Args:
+        engine (LexiconEngine): El de ``load_bulk_engine``; None usa el del proceso
+    Returns:
+        tuple: (SentimentSummary, tempfile.TemporaryDirectory, ruta del CSV)
+    """
+    from src.data_loader import iter_reviews
+    from src.pipeline import CsvChunkWriter
+    from src.sentiment_model import batch_sentiment_details
+    from src.summary import SentimentSummary
+
+    summary = SentimentSummary()
+    results = tempfile.TemporaryDirectory(prefix='sentiment_')
+    output_path = os.path.join(results.name, 'results.csv')
+    try:
+        writer = CsvChunkWriter(output_path)
+        progress = st.progress(0.0, text="Analizando...")
+        for chunk in iter_reviews(uploaded, BULK_CHUNKSIZE):
+            scored = batch_sentiment_details(chunk.fillna({text_column: ''}), text_column, engine='lexicon',
+                                             lexicon_engine=engine)
+            writer.write(downloadable(scored))
+            summary.update(scored)
+            done = min(uploaded.tell() / max(uploaded.size, 1), 1.0)
+            progress.progress(done, text=f"{summary.rows:,} reseñas analizadas")
+            with placeholder.container():
+                render_summary(summary)
+        writer.close()
+    except BaseException:
+        results.cleanup()
+        raise
+    progress.progress(1.0, text=f"¡Listo! {summary.rows:,} reseñas analizadas")
+    return summary, results, output_path
+
+def single_review_mode():
+    analyze_sentiment = load_analyzer()
+    # Instrucción cálida para el usuario
+    user_input = st.text_area("¡Cuéntame tu experiencia! Escribe una review y descubre el sentimiento:")
+
+    if st.button("Analizar"):
+        if user_input.strip():
+            polarity, sentiment = analyze_sentiment(user_input)
+            st.success(f"✨ <b>Sentimiento:</b> {sentiment}", icon="💡")
+            st.info(f"<b>Polaridad:</b> {polarity:.2f}", icon="📊")
+        else:
+            st.warning("Por favor, escribe una review antes de analizar.")
+
+def bulk_upload_mode():
+    import pandas as pd
+
+    engine = load_bulk_engine()
+    uploaded = st.file_uploader("Sube un CSV con una review por fila", type=['csv'])
+    if uploaded is None:
+        return
+    columns = list(pd.read_csv(uploaded, nrows=0).columns)
+    uploaded.seek(0)
+    default = columns.index('review') if 'review' in columns else 0
+    text_column = st.selectbox("Columna con el texto de las reviews", columns, index=default)
+    placeholder = st.empty()
+
+    if st.button("Analizar archivo"):
+        previous = st.session_state.pop('bulk', None)
+        if previous is not None:
+            previous['results'].cleanup()
+        summary, results, output_path = score_upload(uploaded, text_column, placeholder, engine)
+        # Guardamos solo los agregados y el directorio del fichero, nunca las filas
+        st.session_state['bulk'] = {'name': uploaded.name, 'summary': summary, 'results': results,
+                                    'output_path': output_path}
+
+    bulk = st.session_state.get('bulk')
+    if bulk is not None and bulk['name'] == uploaded.name:
+        with placeholder.container():
+            render_summary(bulk['summary'])
+        with open(bulk['output_path'], 'rb') as results:
+            st.download_button("⬇️ Descargar resultados (CSV)", results, mime='text/csv',
+                               file_name=f"sentiment_{os.path.splitext(uploaded.name)[0]}.csv")
 
 # Título amigable para la app
 st.title("😊 Análisis de Sentimientos en Reviews de Hoteles")
 
-# Instrucción cálida para el usuario
-user_input = st.text_area("¡Cuéntame tu experiencia! Escribe una review y descubre el sentimiento:")
-
-if st.button("Analizar"):
-    if user_input.strip():
-        polarity, sentiment = analyze_sentiment(user_input)
-        st.success(f"✨ <b>Sentimiento:</b> {sentiment}", icon="💡")
-        st.info(f"<b>Polaridad:</b> {polarity:.2f}", icon="📊")
-    else:
-        st.warning("Por favor, escribe una review antes de analizar.")
+mode = st.radio("¿Qué quieres analizar?", ["Una review", "Un archivo CSV"], horizontal=True)
+if mode == "Una review":
+    single_review_mode()
+else:
+    bulk_upload_mode()
@@ -1,9 +1,19 @@
+import argparse
+import itertools
 import pandas as pd
-from src.sentiment_model import analyze_sentiment, batch_analyze, get_sentiment_details
+from src.sentiment_model import (
+    MODEL_CONFIG_KEYS,
+    SENTIMENT_LABELS,
+    batch_analyze,
+    batch_sentiment_details,
+    model_config,
+    save_model_config,
+)
 import matplotlib.pyplot as plt
 import seaborn as sns
-from sklearn.metrics import classification_report, confusion_matrix
 import numpy as np
+from src.data_loader import iter_reviews
+from src.evaluation import EvaluationMetrics, encode_labels, evaluate_chunks, metrics_from_confusion
 
 def load_sample_reviews():
     """
@@ -56,66 +66,116 @@ def load_sample_reviews():
     
     return df
 
-def evaluate_model(df):
+def evaluate_model(df, engine='textblob'):
     """
     Evalúa el desempeño del modelo de sentimiento con métricas y detalles útiles.
+    Con engine='lexicon' el análisis va vectorizado, pensado para millones de reseñas.
     """
-    # Analyze sentiments
-    result_df = batch_analyze(df)
+    # Analyze sentiments and details in a single pass
+    result_df = batch_sentiment_details(df, engine=engine)
     
-    # Get detailed analysis for each review
-    detailed_analysis = []
-    for review in df['review']:
-        details = get_sentiment_details(review)
-        detailed_analysis.append(details)
-    
-    # Add detailed analysis to results
-    result_df['confidence'] = [d['confidence'] for d in detailed_analysis]
-    result_df['positive_keywords'] = [d['positive_keywords'] for d in detailed_analysis]
-    result_df['negative_keywords'] = [d['negative_keywords'] for d in detailed_analysis]
-    
-    # Calculate accuracy
-    accuracy = (result_df['sentiment'] == result_df['true_sentiment']).mean()
-    
-    # Create confusion matrix
-    conf_matrix = confusion_matrix(
-        result_df['true_sentiment'],
-        result_df['sentiment'],
-        labels=['Positivo', 'Neutral', 'Negativo']
-    )
-    
-    # Calculate metrics for each sentiment
+    # Every metric comes from a single confusion-matrix pass
+    evaluation = EvaluationMetrics().update(result_df['true_sentiment'], result_df['sentiment'])
+    per_class = evaluation.per_class()
     metrics = {}
     for sentiment in ['Positivo', 'Negativo', 'Neutral']:
-        true_positives = ((result_df['true_sentiment'] == sentiment) & 
-                         (result_df['sentiment'] == sentiment)).sum()
-        false_positives = ((result_df['true_sentiment'] != sentiment) & 
-                          (result_df['sentiment'] == sentiment)).sum()
-        false_negatives = ((result_df['true_sentiment'] == sentiment) & 
-                          (result_df['sentiment'] != sentiment)).sum()
-        
-        precision = true_positives / (true_positives + false_positives) if (true_positives + false_positives) > 0 else 0
-        recall = true_positives / (true_positives + false_negatives) if (true_positives + false_negatives) > 0 else 0
-        f1_score = 2 * (precision * recall) / (precision + recall) if (precision + recall) > 0 else 0
-        
+        row = per_class.loc[sentiment]
         metrics[sentiment] = {
-            'Precision': precision,
-            'Recall': recall,
-            'F1 Score': f1_score,
-            'Support': (result_df['true_sentiment'] == sentiment).sum()
+            'Precision': row['precision'],
+            'Recall': row['recall'],
+            'F1 Score': row['f1'],
+            'Support': int(row['support'])
         }
     
     # Calculate average confidence by sentiment
     confidence_by_sentiment = result_df.groupby('sentiment')['confidence'].mean()
     
     return {
-        'accuracy': accuracy,
-        'confusion_matrix': conf_matrix,
+        'accuracy': evaluation.accuracy,
+        'confusion_matrix': evaluation.confusion,
         'metrics': metrics,
         'results': result_df,
         'confidence_by_sentiment': confidence_by_sentiment
     }
 
+def default_sweep_grid():
+    """
+    Rejilla por defecto: el peso de TextBlob de 0 a 1 (el del dominio es el
+    resto) y cada umbral de 0 a ±0.5, en pasos de 0.025. Unas 9.000 combinaciones.
+    """
+    textblob_weights = np.round(np.linspace(0, 1, 21), 3)
+    weights = np.column_stack([textblob_weights, 1 - textblob_weights])
+    steps = np.round(np.linspace(0, 0.5, 21), 3)
+    thresholds = np.array(list(itertools.product(steps, -steps)))
+    return weights, thresholds
+
+def sweep_configs(df, weights=None, thresholds=None, engine='textblob',
+                  text_column='review', label_column='true_sentiment', max_cells=2 ** 22):
+    """
+    Evalúa de golpe muchas combinaciones de pesos y umbrales. El texto se
+    analiza una sola vez: las polaridades de TextBlob y del dominio se guardan
+    y cada combinación se calcula con broadcasting de NumPy sobre ellas.
+    Args:
+        df (pandas.DataFrame): Reseñas con su etiqueta real
+        weights (array (W, 2)): Pares (peso de TextBlob, peso del dominio)
+        thresholds (array (T, 2)): Pares (umbral positivo, umbral negativo)
+        engine (str): 'textblob' o 'lexicon', para calcular los componentes
+        max_cells (int): Tope de combinaciones × reseñas que se evalúan a la vez
+    Returns:
+        dict: 'results' (DataFrame con una fila por combinación: pesos, umbrales,
+            exactitud y F1 por clase) y 'confusion_matrices' (array (W*T, 3, 3)
+            alineado con las filas, real en filas y predicción en columnas)
+    """
+    default_weights, default_thresholds = default_sweep_grid()
+    weights = np.asarray(default_weights if weights is None else weights, dtype=float).reshape(-1, 2)
+    thresholds = np.asarray(default_thresholds if thresholds is None else thresholds, dtype=float).reshape(-1, 2)
+
+    truth = encode_labels(df[label_column])
+    scored = batch_analyze(df, text_column, engine=engine, components=True)
+    # Las filas con los mismos componentes y etiqueta se evalúan una vez, con su peso
+    rows, counts = np.unique(np.column_stack([scored['textblob_polarity'], scored['domain_polarity'],
+                                              truth]), axis=0, return_counts=True)
+    textblob_polarity, domain_polarity, true_codes = rows[:, 0], rows[:, 1], rows[:, 2].astype(np.int64)
+
+    n_configs = len(weights) * len(thresholds)
+    cells = np.zeros(n_configs * 9)
+    config_offsets = (np.arange(n_configs) * 9)[:, None]
+    block = max(1, max_cells // n_configs)
+    for start in range(0, len(rows), block):
+        end = start + block
+        polarity = weights[:, :1] * textblob_polarity[start:end] + weights[:, 1:] * domain_polarity[start:end]
+        polarity = polarity[:, None, :]  # (W, 1, filas) frente a umbrales (1, T, 1)
+        predicted = np.where(polarity > thresholds[None, :, :1], 0,
+                             np.where(polarity < thresholds[None, :, 1:], 2, 1))
+        flat = config_offsets + (true_codes[start:end] * 3 + predicted.reshape(n_configs, -1))
+        cells += np.bincount(flat.ravel(), weights=np.tile(counts[start:end], n_configs), minlength=len(cells))
+    confusion = cells.reshape(n_configs, 3, 3).astype(np.int64)
+
+    metrics = metrics_from_confusion(confusion)
+
+    results = pd.DataFrame({
+        'textblob_weight': np.repeat(weights[:, 0], len(thresholds)),
+        'domain_weight': np.repeat(weights[:, 1], len(thresholds)),
+        'positive_threshold': np.tile(thresholds[:, 0], len(weights)),
+        'negative_threshold': np.tile(thresholds[:, 1], len(weights)),
+        'accuracy': metrics['accuracy'],
+    })
+    for i, label in enumerate(SENTIMENT_LABELS):
+        results[f'f1_{label}'] = metrics['f1'][:, i]
+    results['macro_f1'] = metrics['macro_f1']
+    return {'results': results, 'confusion_matrices': confusion}
+
+def best_config(sweep, metric='accuracy'):
+    """
+    Mejor combinación del barrido según ``metric`` (empates: mayor F1 macro),
+    como diccionario listo para ``configure_model`` o ``save_model_config``.
+    """
+    results = sweep['results']
+    # Los umbrales negativos por encima de los positivos no son una configuración válida
+    results = results[results['negative_threshold'] <= results['positive_threshold']]
+    best = results.sort_values([metric, 'macro_f1'], ascending=False, kind='stable').iloc[0]
+    return {key: float(best[key]) for key in MODEL_CONFIG_KEYS}
+
 def plot_results(evaluation_results):
     """
     Genera y guarda gráficos visuales para entender mejor el desempeño del modelo.
@@ -165,16 +225,66 @@ def plot_results(evaluation_results):
     plt.savefig('confidence_by_sentiment.png')
     plt.close()
 
-def main():
-    # Load sample reviews
-    df = load_sample_reviews()
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evalúa el modelo sobre reseñas etiquetadas.")
+    parser.add_argument('labeled_csv', nargs='?',
+                        help="CSV con columnas 'review' y 'true_sentiment' (por defecto, las reseñas de ejemplo)")
+    parser.add_argument('--engine', choices=['textblob', 'lexicon'], default='textblob')
+    parser.add_argument('--sweep', action='store_true',
+                        help="Prueba miles de pesos y umbrales en lugar de evaluar la configuración actual")
+    parser.add_argument('--export-config', metavar='JSON',
+                        help="Con --sweep, guarda la mejor configuración (úsala con SENTIMENT_CONFIG)")
+    parser.add_argument('--chunksize', type=int,
+                        help="Lee el CSV por trozos de este tamaño y solo acumula la matriz de confusión (sin gráficos)")
+    parser.add_argument('--prediction-column',
+                        help="Con --chunksize, evalúa esta columna ya puntuada en lugar de analizar el texto")
+    parser.add_argument('--bootstrap', type=int, default=0, metavar='N',
+                        help="Intervalos de confianza del 95%% con N remuestreos")
+    args = parser.parse_args(argv)
+
+    if args.chunksize:
+        if not args.labeled_csv:
+            parser.error("--chunksize necesita un CSV")
+        evaluation = evaluate_chunks(iter_reviews(args.labeled_csv, args.chunksize),
+                                     prediction_column=args.prediction_column, engine=args.engine)
+        print(f"\n🌟 {evaluation.rows:,} reseñas evaluadas. Precisión General: {evaluation.accuracy:.2%}")
+        print("\n📊 Matriz de Confusión:")
+        print(evaluation.confusion_frame())
+        print("\n🔎 Métricas Detalladas:")
+        print(evaluation.per_class().round(4))
+        if args.bootstrap:
+            print(f"\n🎯 Intervalos de confianza ({args.bootstrap} remuestreos):")
+            print(evaluation.bootstrap(args.bootstrap).round(4))
+        return
+
+    # Load labeled reviews
+    df = pd.read_csv(args.labeled_csv) if args.labeled_csv else load_sample_reviews()
+
+    if args.sweep:
+        sweep = sweep_configs(df, engine=args.engine)
+        results = sweep['results']
+        print(f"\n🔧 {len(results)} combinaciones evaluadas. Las 10 mejores:")
+        print(results.sort_values(['accuracy', 'macro_f1'], ascending=False).head(10).round(3).to_string(index=False))
+        best = best_config(sweep)
+        current = model_config()
+        print(f"\nConfiguración actual: {current}")
+        print(f"Mejor configuración:  {best}")
+        if args.export_config:
+            save_model_config(args.export_config, best)
+            print(f"Guardada en {args.export_config}")
+        return
     
     # Evaluate model
-    evaluation_results = evaluate_model(df)
+    evaluation_results = evaluate_model(df, engine=args.engine)
     
     # Print results
     print("\n🌟 Resultados de Evaluación del Modelo:")
     print(f"Precisión General: {evaluation_results['accuracy']:.2%}")
+    if args.bootstrap:
+        evaluation = EvaluationMetrics()
+        evaluation.confusion += evaluation_results['confusion_matrix']
+        print(f"\n🎯 Intervalos de confianza ({args.bootstrap} remuestreos):")
+        print(evaluation.bootstrap(args.bootstrap).round(4))
     
     print("\n📊 Matriz de Confusión:")
     conf_matrix = pd.DataFrame(
@@ -0,0 +1,135 @@
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+
+import pandas as pd
+
+from benchmarks.corpus import make_corpus
+from src import instrumentation
+from src.app import main
+from src.sentiment_model import batch_analyze
+
+
+class TestCommandLine(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.df = make_corpus(400)
+        self.df.insert(0, 'hotel', [f'H{i % 3}' for i in range(len(self.df))])
+        self.df.iloc[:250].to_csv(self.path('part-a.csv'), index=False)
+        self.df.iloc[250:].to_csv(self.path('part-b.csv'), index=False)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.tmp.name, name)
+
+    def run_cli(self, *argv):
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            code = main(list(argv))
+        return code, stdout.getvalue(), stderr.getvalue()
+
+    def test_glob_to_parquet_with_summary(self):
+        output = self.path('scored.parquet')
+        code, _, summary = self.run_cli(self.path('part-*.csv'), '--output', output, '--chunk-mb', '0.01',
+                                        '--profile')
+        self.assertEqual(code, 0)
+        expected = batch_analyze(self.df, engine='lexicon')
+        pd.testing.assert_frame_equal(pd.read_parquet(output), expected)
+        self.assertIn('400 filas de 2 fichero(s)', summary)
+        self.assertIn('lexicon_engine', summary)
+        self.assertIn('textos analizados', summary)
+
+    def test_stdout_and_worker_pool_give_the_same_rows(self):
+        code, serial, _ = self.run_cli(self.path('part-*.csv'), '--chunk-mb', '0.005')
+        self.assertEqual(code, 0)
+        code, _, summary = self.run_cli(self.path('part-*.csv'), '--chunk-mb', '0.005', '--workers', '2',
+                                        '--output', self.path('pool.csv'), '--profile')
+        self.assertEqual(code, 0)
+        with open(self.path('pool.csv')) as handle:
+            self.assertEqual(handle.read(), serial)
+        self.assertIn('--workers 1', summary)
+
+    def test_instrumentation_only_with_profile(self):
+        code, _, summary = self.run_cli(self.path('part-*.csv'), '--output', self.path('scored.csv'))
+        self.assertEqual(code, 0)
+        self.assertIsNone(instrumentation.active)
+        self.assertIn('400 filas de 2 fichero(s)', summary)
+        self.assertNotIn('textos analizados', summary)
+        self.assertNotIn('lexicon_engine', summary)
+
+    def test_malformed_rows_are_dropped_or_fatal(self):
+        with open(self.path('part-b.csv'), 'a') as handle:
+            handle.write('H1,"Great stay",unexpected\n')
+        output = self.path('scored.csv')
+        code, _, stderr = self.run_cli(self.path('part-*.csv'), '--output', output)
+        self.assertEqual(code, 0)
+        self.assertIn('línea 152', stderr)
+        self.assertIn('filas mal formadas descartadas: 1', stderr)
+        self.assertEqual(len(pd.read_csv(output)), len(self.df))
+
+        os.remove(output)
+        code, _, stderr = self.run_cli(self.path('part-*.csv'), '--output', output, '--strict')
+        self.assertEqual(code, 1)
+        self.assertIn('part-b.csv: línea 152', stderr)
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), ['part-a.csv', 'part-b.csv'])
+
+    def test_jsonl_with_store_and_text_column(self):
+        path = self.path('reviews.jsonl')
+        self.df.rename(columns={'review': 'text'}).to_json(path, orient='records', lines=True)
+        store = self.path('scores.sqlite')
+        self.run_cli(path, '--text-column', 'text', '--store', store, '--output', self.path('a.csv'))
+        code, _, summary = self.run_cli(path, '--text-column', 'text', '--store', store,
+                                        '--output', self.path('b.csv'))
+        self.assertEqual(code, 0)
+        self.assertIn('almacén: 400 reutilizadas, 0 analizadas', summary)
+        scored = pd.read_csv(self.path('b.csv'))
+        self.assertEqual(list(scored.columns), ['text', 'polarity', 'sentiment'])
+
+    def test_bad_arguments(self):
+        for argv in ([self.path('missing-*.csv')], [self.path('part-a.csv'), '--format', 'parquet']):
+            with self.assertRaises(SystemExit) as raised, redirect_stderr(io.StringIO()):
+                main(argv)
+            self.assertEqual(raised.exception.code, 2)
+        # Un JSONL solo aporta la columna de texto: mezclarlo con CSV se rechaza antes de leer
+        self.df.to_json(self.path('part-c.jsonl'), orient='records', lines=True)
+        with self.assertRaises(SystemExit) as raised, redirect_stderr(io.StringIO()) as stderr:
+            main([self.path('part-a.csv'), self.path('part-c.jsonl'), '--output', self.path('mixed.csv')])
+        self.assertEqual(raised.exception.code, 2)
+        self.assertIn('No se pueden mezclar CSV y JSONL', stderr.getvalue())
+        self.assertFalse(os.path.exists(self.path('mixed.csv')))
+        code, _, stderr = self.run_cli(self.path('part-a.csv'), '--text-column', 'comment')
+        self.assertEqual(code, 1)
+        self.assertIn("'comment'", stderr)
+
+    def test_output_dir_job(self):
+        output_dir = self.path('job')
+        code, _, _ = self.run_cli(self.path('part-a.csv'), '--output-dir', output_dir, '--chunk-mb', '0.005')
+        self.assertEqual(code, 0)
+        parts = sorted(name for name in os.listdir(output_dir) if name.endswith('.parquet'))
+        self.assertGreater(len(parts), 1)
+        scored = pd.concat([pd.read_parquet(os.path.join(output_dir, name)) for name in parts], ignore_index=True)
+        pd.testing.assert_frame_equal(scored, batch_analyze(self.df.iloc[:250], engine='lexicon'))
+
+        # Otro fichero en el mismo directorio, o una columna que no existe: error, no traza
+        code, _, stderr = self.run_cli(self.path('part-b.csv'), '--output-dir', output_dir)
+        self.assertEqual(code, 1)
+        self.assertTrue(stderr.startswith('error: '), stderr)
+        code, _, stderr = self.run_cli(self.path('part-b.csv'), '--output-dir', self.path('other'),
+                                       '--text-column', 'comment')
+        self.assertEqual(code, 1)
+        self.assertIn("'comment'", stderr)
+
+        for option in (['--strict'], ['--store', self.path('scores.sqlite')], ['--cache-size', '10'],
+                       ['--output', self.path('scored.csv')]):
+            with self.assertRaises(SystemExit) as raised, redirect_stderr(io.StringIO()) as stderr:
+                main([self.path('part-a.csv'), '--output-dir', output_dir] + option)
+            self.assertEqual(raised.exception.code, 2)
+            self.assertIn(option[0], stderr.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
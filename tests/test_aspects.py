@@ -0,0 +1,128 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from src import sentiment_model
+from src.lexicon_engine import POLARITY_TOLERANCE, LexiconEngine, get_default_engine
+from src.parallel import parallel_batch_analyze
+from src.score_store import ScoreStore
+from src.sentiment_model import (
+    analyze_sentiment,
+    batch_analyze,
+    get_aspect_details,
+    load_aspect_lexicon,
+)
+from tests.evaluate_model import load_sample_reviews
+from tests.test_lexicon_engine import synthetic_reviews
+
+ASPECT_COLUMNS = ['aspect_room', 'aspect_staff', 'aspect_breakfast', 'aspect_location', 'aspect_price']
+
+
+class TestAspectDetails(unittest.TestCase):
+    def test_mixed_review(self):
+        text = "The location was convenient but the room was small."
+        details = get_aspect_details(text)
+        self.assertEqual(set(details['aspects']), {'location', 'room'})
+        self.assertGreater(details['aspects']['location']['polarity'], 0)
+        self.assertEqual(details['aspects']['room']['sentiment'], 'Negativo')
+        self.assertEqual(len(details['sentences']), 1)
+        polarity, sentiment = analyze_sentiment(text)
+        self.assertAlmostEqual(details['polarity'], polarity, delta=POLARITY_TOLERANCE)
+        self.assertEqual(details['sentiment'], sentiment)
+
+    def test_sentences(self):
+        details = get_aspect_details("The staff was rude. Breakfast was great!! Nothing else...")
+        self.assertEqual([s['text'] for s in details['sentences']],
+                         ['the staff was rude .', 'breakfast was great ! !', 'nothing else ...'])
+        self.assertEqual([s['sentiment'] for s in details['sentences']], ['Negativo', 'Positivo', 'Neutral'])
+        self.assertEqual(details['aspects']['staff']['sentiment'], 'Negativo')
+        self.assertEqual(details['aspects']['breakfast']['sentiment'], 'Positivo')
+        for text in ('', '...', '!!!'):
+            self.assertEqual(get_aspect_details(text)['sentences'], [])
+            self.assertEqual(get_aspect_details(text)['aspects'], {})
+
+    def test_opinion_goes_to_nearest_mention_in_its_clause(self):
+        aspects = get_aspect_details("Great breakfast, rude staff and a clean room")['aspects']
+        self.assertEqual([aspects[a]['sentiment'] for a in ('breakfast', 'staff', 'room')],
+                         ['Positivo', 'Negativo', 'Positivo'])
+        # Una negación del léxico invierte la palabra clave que la sigue
+        self.assertGreater(get_aspect_details("The room was never noisy")['aspects']['room']['polarity'], 0)
+        # Sin mención en su frase, la opinión no cuenta para ningún aspecto
+        self.assertEqual(get_aspect_details("Nice room. Terrible!")['aspects'],
+                         get_aspect_details("Nice room.")['aspects'])
+
+
+class TestBatchAspects(unittest.TestCase):
+    def setUp(self):
+        df = load_sample_reviews()
+        self.df = pd.concat([df, df.head(5)]).set_index(pd.RangeIndex(100, 135))
+
+    def test_columns_match_single_reviews(self):
+        result = batch_analyze(self.df, engine='lexicon', aspects=True)
+        expected = batch_analyze(self.df, engine='lexicon')
+        pd.testing.assert_frame_equal(result.drop(columns=ASPECT_COLUMNS), expected)
+        self.assertEqual(list(result.columns[-5:]), ASPECT_COLUMNS)
+        for text, row in zip(self.df['review'], result[ASPECT_COLUMNS].to_numpy()):
+            aspects = get_aspect_details(text)['aspects']
+            for column, value in zip(ASPECT_COLUMNS, row):
+                aspect = column[len('aspect_'):]
+                if aspect in aspects:
+                    self.assertAlmostEqual(value, aspects[aspect]['polarity'], msg=text)
+                else:
+                    self.assertTrue(np.isnan(value), text)
+
+    def test_same_pass_as_overall_polarity(self):
+        texts = synthetic_reviews(1000) + list(self.df['review'])
+        engine = get_default_engine()
+        textblob, domain, aspect_polarity = engine.score_aspects(texts)
+        expected_textblob, expected_domain = engine.score_components(texts)
+        np.testing.assert_allclose(textblob, expected_textblob, atol=POLARITY_TOLERANCE)
+        np.testing.assert_array_equal(domain, expected_domain)
+        # Cortar el lote en bloques no cambia nada
+        small = LexiconEngine(batch_size=7).score_aspects(texts)
+        np.testing.assert_allclose(small[2], aspect_polarity)
+        self.assertTrue(np.isfinite(aspect_polarity).any(axis=0).all())
+
+    def test_compact_and_components(self):
+        result = batch_analyze(self.df, engine='lexicon', aspects=True, components=True, compact=True, copy=False)
+        self.assertEqual(list(result.columns), ['polarity', 'sentiment', 'textblob_polarity', 'domain_polarity']
+                         + ASPECT_COLUMNS)
+        self.assertTrue((result[ASPECT_COLUMNS].dtypes == np.float32).all())
+        full = batch_analyze(self.df, engine='lexicon', aspects=True)
+        np.testing.assert_allclose(result[ASPECT_COLUMNS], full[ASPECT_COLUMNS], atol=1e-6)
+
+    def test_parallel(self):
+        df = pd.concat([self.df] * 4, ignore_index=True)
+        result = parallel_batch_analyze(df, n_jobs=2, chunksize=25, min_rows=0, aspects=True)
+        pd.testing.assert_frame_equal(result, batch_analyze(df, engine='lexicon', aspects=True))
+
+    def test_unsupported(self):
+        with self.assertRaises(ValueError):
+            batch_analyze(self.df, engine='textblob', aspects=True)
+        with tempfile.TemporaryDirectory() as tmp, ScoreStore(os.path.join(tmp, 'scores.db')) as store:
+            with self.assertRaises(ValueError):
+                batch_analyze(self.df, engine='lexicon', store=store, aspects=True)
+
+    def test_custom_aspect_lexicon(self):
+        self.addCleanup(load_aspect_lexicon)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'aspects.txt')
+            with open(path, 'w', encoding='utf-8') as handle:
+                handle.write("# Solo dos aspectos\npool: pool, pools\nwifi: wifi, internet\n")
+            load_aspect_lexicon(path)
+            with open(path, 'w', encoding='utf-8') as handle:
+                handle.write("pool: swimming pool\n")
+            with self.assertRaises(ValueError):
+                load_aspect_lexicon(path)
+        self.assertEqual(list(sentiment_model.ASPECT_TERMS), ['pool', 'wifi'])
+        result = batch_analyze(pd.DataFrame({'review': ["The pool was great but the wifi was terrible"]}),
+                               engine='lexicon', aspects=True)
+        self.assertGreater(result.loc[0, 'aspect_pool'], 0)
+        self.assertLess(result.loc[0, 'aspect_wifi'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
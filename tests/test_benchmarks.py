@@ -0,0 +1,39 @@
+import multiprocessing
+import os
+import unittest
+
+from benchmarks.corpus import make_corpus
+from benchmarks.suite import _collect, compare, format_result, run_stage
+
+
+class TestBenchmarkSuite(unittest.TestCase):
+    def test_corpus_is_reproducible(self):
+        self.assertListEqual(list(make_corpus(50, seed=3)['review']), list(make_corpus(50, seed=3)['review']))
+
+    def test_run_stage_reports_metrics(self):
+        result = run_stage('preprocess_text', 200, sample=100)
+        self.assertEqual(result['measured_rows'], 100)
+        for key in ('rows_per_s', 'p50_us', 'p99_us', 'peak_rss_mb'):
+            self.assertGreater(result[key], 0)
+        self.assertLessEqual(result['p50_us'], result['p99_us'])
+        self.assertIn('preprocess_text', format_result(result))
+
+    def test_crashed_child_raises_instead_of_hanging(self):
+        ctx = multiprocessing.get_context('spawn')
+        queue = ctx.Queue()
+        process = ctx.Process(target=os._exit, args=(3,))
+        process.start()
+        with self.assertRaisesRegex(RuntimeError, 'código 3'):
+            _collect(process, queue, poll=0.1)
+
+    def test_compare_flags_regressions(self):
+        def report(rate):
+            return {'results': [{'stage': 'load_reviews', 'rows': 1000, 'rows_per_s': rate}]}
+        self.assertEqual(compare(report(95), report(100), threshold=0.10), [])
+        regressions = compare(report(80), report(100), threshold=0.10)
+        self.assertEqual(len(regressions), 1)
+        self.assertAlmostEqual(regressions[0][-1], -0.2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+
+import pandas as pd
+
+from src.sentiment_model import (
+    analyze_sentiment, batch_analyze, cache_info, clear_cache, configure_cache, score_texts,
+)
+
+
+class TestSentimentCache(unittest.TestCase):
+    def setUp(self):
+        configure_cache(3)
+
+    def tearDown(self):
+        configure_cache()
+
+    def test_hits_on_normalized_text(self):
+        """Variantes que normalizan igual comparten la misma entrada de la caché."""
+        first = analyze_sentiment("Great hotel!")
+        second = analyze_sentiment("  GREAT   hotel! ")
+        info = cache_info()
+        self.assertEqual(first, second)
+        self.assertEqual((info.hits, info.misses, info.currsize), (1, 1, 1))
+
+    def test_lru_eviction(self):
+        for text in ["great", "awful", "okay", "great", "nice"]:
+            analyze_sentiment(text)
+        info = cache_info()
+        self.assertEqual(info.maxsize, 3)
+        self.assertEqual(info.currsize, 3)
+        # "awful" fue la menos usada recientemente y se expulsó
+        analyze_sentiment("awful")
+        self.assertEqual(cache_info().misses, info.misses + 1)
+
+    def test_clear_cache(self):
+        analyze_sentiment("Great hotel!")
+        clear_cache()
+        info = cache_info()
+        self.assertEqual((info.hits, info.misses, info.currsize), (0, 0, 0))
+
+    def test_batch_scores_each_normalized_text_once(self):
+        """batch_analyze agrupa duplicados y reparte el resultado a cada fila."""
+        configure_cache(0)  # sin caché, solo cuenta la deduplicación
+        reviews = ["Great hotel!", "great hotel!", "Dirty room.", "GREAT  hotel!", "Dirty room."]
+        result = batch_analyze(pd.DataFrame({'review': reviews}))
+        self.assertEqual(cache_info().misses, 2)
+        self.assertListEqual(list(result['sentiment']), [analyze_sentiment(r)[1] for r in reviews])
+
+    def test_score_texts_engines_agree(self):
+        reviews = ["Great hotel!", "great hotel!", "Dirty room.", ""]
+        textblob_polarity, textblob_sentiment = score_texts(reviews)
+        lexicon_polarity, lexicon_sentiment = score_texts(reviews, engine='lexicon')
+        self.assertListEqual(list(textblob_sentiment), list(lexicon_sentiment))
+        self.assertListEqual(list(textblob_polarity), list(lexicon_polarity))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,159 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src import sentiment_model
+from src.compact import (
+    KEYWORD_MASK_BITS, KEYWORD_MASK_DTYPE, SENTIMENT_DTYPE, compact_results, decode_keywords, keyword_indices,
+    keyword_masks,
+)
+from src.keyword_matcher import KeywordMatcher
+from src.parallel import parallel_batch_analyze
+from src.pipeline import analyze_stream
+from src.score_store import ScoreStore
+from src.sentiment_model import (
+    batch_analyze, batch_sentiment_details, get_keyword_matcher, load_keyword_lexicons, preprocess_text,
+)
+from tests.evaluate_model import load_sample_reviews
+
+
+def load_large_lexicon(test_case, extra=200):
+    """
+    Carga el léxico positivo real más ``extra`` entradas inventadas, para pasar
+    de las 64 que caben en una máscara, y lo restaura al acabar el test.
+    """
+    test_case.addCleanup(load_keyword_lexicons)
+    tmp = tempfile.TemporaryDirectory()
+    test_case.addCleanup(tmp.cleanup)
+    path = os.path.join(tmp.name, 'positive.txt')
+    with open(sentiment_model.POSITIVE_LEXICON_PATH, encoding='utf-8') as source, \
+            open(path, 'w', encoding='utf-8') as handle:
+        handle.write(source.read() + '\n' + '\n'.join(f'madeup{i}' for i in range(extra)) + '\n')
+    load_keyword_lexicons(positive_path=path)
+    test_case.assertGreater(len(get_keyword_matcher().entries), KEYWORD_MASK_BITS)
+
+
+class TestCompactResults(unittest.TestCase):
+    def setUp(self):
+        df = load_sample_reviews()
+        # Índice no trivial y reseñas repetidas
+        self.df = pd.concat([df, df.head(5)]).set_index(pd.RangeIndex(100, 135))
+
+    def assert_same_scores(self, compact, full):
+        self.assertEqual(compact['polarity'].dtype, np.float32)
+        self.assertEqual(compact['sentiment'].dtype, SENTIMENT_DTYPE)
+        np.testing.assert_allclose(compact['polarity'], full['polarity'], atol=1e-6)
+        self.assertEqual(list(compact['sentiment'].astype(str)), list(full['sentiment']))
+        self.assertTrue(compact.index.equals(full.index))
+
+    def test_batch_analyze_compact(self):
+        for engine in ('textblob', 'lexicon'):
+            full = batch_analyze(self.df, engine=engine)
+            compact = batch_analyze(self.df, engine=engine, compact=True)
+            self.assert_same_scores(compact, full)
+            self.assertEqual(list(compact.columns), list(full.columns))
+
+    def test_no_copy_returns_only_new_columns(self):
+        result = batch_analyze(self.df, engine='lexicon', compact=True, copy=False)
+        self.assertEqual(list(result.columns), ['polarity', 'sentiment'])
+        self.assert_same_scores(result, batch_analyze(self.df, engine='lexicon'))
+        components = batch_analyze(self.df, engine='lexicon', components=True, compact=True, copy=False)
+        self.assertEqual(components['textblob_polarity'].dtype, np.float32)
+
+    def test_parallel_and_store_paths(self):
+        full = batch_analyze(self.df, engine='lexicon')
+        parallel = parallel_batch_analyze(self.df, engine='lexicon', n_jobs=2, chunksize=10, min_rows=0,
+                                          compact=True, copy=False)
+        self.assert_same_scores(parallel, full)
+        with tempfile.TemporaryDirectory() as tmp, ScoreStore(os.path.join(tmp, 'scores.sqlite')) as store:
+            for _ in range(2):  # la segunda vez todo sale del almacén
+                stored = batch_analyze(self.df, engine='lexicon', store=store, compact=True, copy=False)
+                self.assert_same_scores(stored, full)
+
+    def test_compact_results_of_existing_frame(self):
+        full = batch_sentiment_details(self.df, engine='lexicon')
+        compact = compact_results(full)
+        self.assert_same_scores(compact, full)
+        self.assertEqual(compact['confidence'].dtype, np.float32)
+        self.assertEqual(full['polarity'].dtype, np.float64)
+
+    def test_details_keyword_masks_decode_to_entries(self):
+        full = batch_sentiment_details(self.df, engine='lexicon')
+        compact = batch_sentiment_details(self.df, engine='lexicon', compact=True, copy=False)
+        self.assert_same_scores(compact, full)
+        for column in ('positive_keywords', 'negative_keywords'):
+            self.assertEqual(compact[column].dtype, KEYWORD_MASK_DTYPE)
+            for decoded, words in zip(decode_keywords(compact[column]), full[column]):
+                # Sin negaciones en estas reseñas, cada coincidencia es una entrada del léxico
+                self.assertEqual(sorted(decoded), words)
+
+    def test_negated_entry_sets_the_opposite_mask(self):
+        matcher = get_keyword_matcher()
+        positive, negative = keyword_masks([preprocess_text("The room was not dirty.")])
+        self.assertEqual(matcher.decode_mask(int(positive[0])), ['dirty'])
+        self.assertEqual(int(negative[0]), 0)
+
+    def test_lexicon_too_big_for_masks(self):
+        matcher = KeywordMatcher({f'word{i}' for i in range(40_000)}, set())
+        with self.assertRaises(ValueError):
+            keyword_masks(["word1"], matcher)
+        positive, negative = keyword_indices(["word1 and word39999", "", "nothing"], matcher)
+        self.assertEqual(positive[0].dtype, np.int32)
+        self.assertEqual([len(p) for p in positive], [2, 0, 0])
+        self.assertEqual([matcher.entries[i] for i in positive[0]], ['word1', 'word39999'])
+        self.assertEqual([len(n) for n in negative], [0, 0, 0])
+
+    def test_large_lexicon_keeps_entry_positions(self):
+        load_large_lexicon(self)
+        df = pd.concat([self.df, pd.DataFrame({'review': ["madeup7 and madeup150, not madeup3"]}, index=[999])])
+        full = batch_sentiment_details(df, engine='lexicon')
+        compact = batch_sentiment_details(df, engine='lexicon', compact=True, copy=False)
+        self.assert_same_scores(compact, full)
+        for column in ('positive_keywords', 'negative_keywords'):
+            self.assertEqual(compact[column].dtype, object)
+            self.assertTrue(all(positions.dtype == np.int16 for positions in compact[column]))
+            # La última reseña lleva una negación, cuyo texto no se guarda
+            for decoded, words in zip(decode_keywords(compact[column])[:-1], full[column].iloc[:-1]):
+                self.assertEqual(sorted(decoded), words)
+        self.assertEqual(decode_keywords(compact['positive_keywords'])[-1], ['madeup150', 'madeup7'])
+        self.assertEqual(decode_keywords(compact['negative_keywords'])[-1], ['madeup3'])
+        table = pa.Table.from_pandas(compact)
+        self.assertEqual(table.schema.field('positive_keywords').type, pa.list_(pa.int16()))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'scores.parquet')
+            compact.to_parquet(path)
+            restored = pd.read_parquet(path)
+        for column in ('positive_keywords', 'negative_keywords'):
+            self.assertEqual(list(decode_keywords(restored[column])), list(decode_keywords(compact[column])))
+
+    def test_arrow_and_parquet_round_trip(self):
+        compact = batch_sentiment_details(self.df, engine='lexicon', compact=True, copy=False)
+        table = pa.Table.from_pandas(compact)
+        self.assertEqual(table.schema.field('polarity').type, pa.float32())
+        self.assertEqual(table.schema.field('sentiment').type.index_type, pa.int8())
+        self.assertEqual(table.schema.field('positive_keywords').type, pa.uint64())
+        pd.testing.assert_frame_equal(table.to_pandas(), compact)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'scores.parquet')
+            compact.to_parquet(path)
+            pd.testing.assert_frame_equal(pd.read_parquet(path), compact)
+
+    def test_streamed_parquet_keeps_compact_types(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            source, output = os.path.join(tmp, 'reviews.csv'), os.path.join(tmp, 'scores.parquet')
+            self.df.to_csv(source, index=False)
+            rows = analyze_stream(source, output, chunksize=10, compact=True)
+            schema = pq.read_schema(output)
+            self.assertEqual(rows, len(self.df))
+            self.assertEqual(schema.field('polarity').type, pa.float32())
+            self.assertEqual(schema.field('sentiment').type.index_type, pa.int8())
+            self.assertEqual(pd.read_parquet(output)['sentiment'].dtype, SENTIMENT_DTYPE)
+
+
+if __name__ == '__main__':
+    unittest.main()
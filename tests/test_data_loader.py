@@ -0,0 +1,152 @@
+import json
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+from pandas.errors import ParserError, ParserWarning
+
+from benchmarks.corpus import make_corpus
+from src.data_loader import JsonFieldReader, iter_csv_frames, iter_text_batches, load_reviews
+from src.pipeline import analyze_stream
+from src.sentiment_model import batch_analyze
+
+TRICKY_REVIEWS = [
+    'Plain review.',
+    'Two lines,\n"quoted" and, commas',
+    'Acentos: habitación ñ ☃',
+    'Ends with a backslash \\',
+    '',
+    'x' * 5000,
+]
+
+TRICKY_RECORDS = [
+    {'id': 1, 'review': 'plain'},
+    {'title': '"review": "fake"', 'review': 'real'},
+    {'type': 'review', 'review': 'key repeated as a value'},
+    {'meta': {'review': 'nested'}},
+    {'meta': {'review': 'nested'}, 'review': 'top level'},
+    {'tags': ['a', 'b'], 'review': 'after a list'},
+    {'x': '{', 'review': 'brace in a string'},
+    {'review': 'Quote " and backslash \\ and \t tab\nnewline'},
+    {'review': None},
+    {'review': 5},
+    {},
+]
+
+
+def expected_value(record):
+    value = record.get('review')
+    return value if isinstance(value, str) else ('' if value is None else str(value))
+
+
+class TestTextBatches(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.tmp.name, name)
+
+    def read_all(self, path, **kwargs):
+        return [text for batch in iter_text_batches(path, **kwargs) for text in batch]
+
+    def test_csv_matches_pandas(self):
+        df = make_corpus(300)
+        df.insert(0, 'hotel', 'H')
+        df.loc[::50, 'review'] = TRICKY_REVIEWS
+        df.loc[3, 'review'] = None
+        path = self.path('reviews.csv')
+        df.to_csv(path, index=False)
+        expected = pd.read_csv(path)['review'].fillna('').tolist()
+        for batch_bytes in (1, 100, 4096, 2 ** 20):
+            batches = list(iter_text_batches(path, batch_bytes=batch_bytes))
+            self.assertEqual([text for batch in batches for text in batch], expected)
+        self.assertGreater(len(list(iter_text_batches(path, batch_bytes=1000))), 10)
+
+    def test_csv_with_bom_and_crlf(self):
+        path = self.path('reviews.csv')
+        with open(path, 'w', encoding='utf-8-sig', newline='') as handle:
+            handle.write('review,rating\r\n"Great, really\r\ngreat",5\r\nDirty room,1\r\n')
+        self.assertEqual(self.read_all(path, batch_bytes=8), ['Great, really\r\ngreat', 'Dirty room'])
+
+    def test_csv_missing_column(self):
+        path = self.path('reviews.csv')
+        make_corpus(3).to_csv(path, index=False)
+        with self.assertRaises(KeyError):
+            list(iter_text_batches(path, text_column='text'))
+
+    def test_jsonl_matches_json_loads(self):
+        records = TRICKY_RECORDS + [{'id': i, 'review': r} for i, r in enumerate(TRICKY_REVIEWS)]
+        path = self.path('reviews.jsonl')
+        with open(path, 'w', encoding='utf-8') as handle:
+            for i, record in enumerate(records):
+                handle.write(json.dumps(record, ensure_ascii=i % 2 == 0) + '\n')
+            handle.write('\n')  # Línea en blanco al final
+        expected = [expected_value(record) for record in records]
+        for batch_bytes in (1, 64, 2 ** 20):
+            self.assertEqual(self.read_all(path, batch_bytes=batch_bytes), expected)
+
+    def test_reader_fast_path_agrees_with_fallback(self):
+        reader = JsonFieldReader('review')
+        lines = [json.dumps({'id': i, 'review': f'text {i} "é" \\'}).encode() for i in range(50)]
+        self.assertEqual(reader.read(b'\n'.join(lines)), [f'text {i} "é" \\' for i in range(50)])
+        self.assertEqual([reader.read_line(line) for line in lines], reader.read(b'\n'.join(lines)))
+
+    def test_empty_file_and_unknown_format(self):
+        path = self.path('empty.jsonl')
+        open(path, 'w').close()
+        self.assertEqual(list(iter_text_batches(path)), [])
+        with self.assertRaises(ValueError):
+            list(iter_text_batches(path, input_format='xml'))
+
+    def test_csv_rows_with_extra_fields(self):
+        path = self.path('reviews.csv')
+        with open(path, 'w') as handle:
+            handle.write('review,rating\nwide,2,3\nok,1\n"multi\nline",4\nwider,1,1,1\nshort\n')
+        for batch_bytes in (1, 2 ** 20):
+            bad = []
+            frames = list(iter_csv_frames(path, batch_bytes, on_bad_lines=bad.append))
+            self.assertEqual(pd.concat(frames)['review'].tolist(), ['ok', 'multi\nline', 'short'])
+            self.assertEqual([message.split(':')[0] for message in bad], ['línea 2', 'línea 6'])
+            self.assertEqual(self.read_all(path, batch_bytes=batch_bytes, on_bad_lines='skip'),
+                             ['ok', 'multi\nline', 'short'])
+        with self.assertRaises(ParserError):
+            list(iter_csv_frames(path))
+        with self.assertWarns(ParserWarning):
+            list(iter_text_batches(path, on_bad_lines='warn'))
+
+    def test_jsonl_bad_lines(self):
+        path = self.path('reviews.jsonl')
+        with open(path, 'w') as handle:
+            handle.write('{"review": "a"}\n{"review": "truncated"\n[1, 2]\n\n{"review": "b"}\n')
+        bad = []
+        self.assertEqual(self.read_all(path, on_bad_lines=bad.append), ['a', 'b'])
+        self.assertEqual([message.split(':')[0] for message in bad], ['línea 2', 'línea 3'])
+        with self.assertRaises(ParserError):
+            self.read_all(path)
+
+    def test_jsonl_strict_validates_fields_after_text(self):
+        path = self.path('reviews.jsonl')
+        with open(path, 'w') as handle:
+            handle.write('{"review": "a", "rating": 5}\n{"review": "b", "rating": 5,, "x": }\n')
+        # El camino rápido solo mira hasta el texto; con 'error' se valida la línea entera
+        self.assertEqual(self.read_all(path, on_bad_lines='skip'), ['a', 'b'])
+        with self.assertRaisesRegex(ParserError, 'línea 2'):
+            self.read_all(path)
+        self.assertEqual(JsonFieldReader('review', validate=True).read(b'{"review": "a", "rating": 5}'), ['a'])
+
+    def test_jsonl_through_pipeline(self):
+        df = make_corpus(200)
+        path, output = self.path('reviews.jsonl'), self.path('scored.csv')
+        df.to_json(path, orient='records', lines=True)
+        pd.testing.assert_frame_equal(load_reviews(path), df)
+        self.assertEqual(analyze_stream(path, output), len(df))
+        expected = batch_analyze(df, engine='lexicon')
+        self.assertEqual(pd.read_csv(output)['sentiment'].tolist(), expected['sentiment'].tolist())
+
+
+if __name__ == '__main__':
+    unittest.main()
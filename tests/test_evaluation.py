@@ -0,0 +1,96 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import confusion_matrix, precision_recall_fscore_support
+
+from src.evaluation import EvaluationMetrics, encode_labels, evaluate_chunks, metrics_from_confusion
+from src.sentiment_model import SENTIMENT_LABELS, batch_analyze
+from tests.evaluate_model import load_sample_reviews
+
+
+def random_labels(n, seed=0):
+    rng = np.random.default_rng(seed)
+    labels = np.array(SENTIMENT_LABELS, dtype=object)
+    return labels[rng.integers(0, 3, n)], labels[rng.integers(0, 3, n)]
+
+
+class TestEncodeLabels(unittest.TestCase):
+    def test_text_categorical_and_codes_agree(self):
+        true, _ = random_labels(1000)
+        expected = np.array([SENTIMENT_LABELS.index(label) for label in true], dtype=np.int8)
+        np.testing.assert_array_equal(encode_labels(true), expected)
+        np.testing.assert_array_equal(encode_labels(pd.Series(true, dtype='category')), expected)
+        np.testing.assert_array_equal(encode_labels(pd.Series(true, dtype='str')), expected)
+        np.testing.assert_array_equal(encode_labels(expected.astype(np.int64)), expected)
+
+    def test_unknown_labels_raise(self):
+        for values in (['Positivo', 'Mixto'], ['Neutral', None], pd.Series(['Neutral', None], dtype='category'),
+                       [0, 300]):
+            with self.assertRaises(ValueError):
+                encode_labels(values)
+
+
+class TestEvaluationMetrics(unittest.TestCase):
+    def test_matches_sklearn(self):
+        true, predicted = random_labels(5000)
+        metrics = EvaluationMetrics().update(true, predicted)
+        np.testing.assert_array_equal(metrics.confusion,
+                                      confusion_matrix(true, predicted, labels=list(SENTIMENT_LABELS)))
+        precision, recall, f1, support = precision_recall_fscore_support(
+            true, predicted, labels=list(SENTIMENT_LABELS), zero_division=0)
+        per_class = metrics.per_class()
+        np.testing.assert_allclose(per_class['precision'], precision)
+        np.testing.assert_allclose(per_class['recall'], recall)
+        np.testing.assert_allclose(per_class['f1'], f1)
+        np.testing.assert_array_equal(per_class['support'], support)
+        self.assertAlmostEqual(metrics.accuracy, float((true == predicted).mean()))
+
+    def test_chunks_merge_to_the_same_matrix(self):
+        true, predicted = random_labels(10_000, seed=1)
+        whole = EvaluationMetrics().update(true, predicted)
+        merged = EvaluationMetrics()
+        for start in range(0, len(true), 3000):
+            part = EvaluationMetrics().update(true[start:start + 3000], predicted[start:start + 3000])
+            merged.merge(part)
+        np.testing.assert_array_equal(merged.confusion, whole.confusion)
+        self.assertEqual(merged.rows, 10_000)
+
+    def test_metrics_broadcast_over_many_matrices(self):
+        true, predicted = random_labels(300, seed=2)
+        first = EvaluationMetrics().update(true, predicted).confusion
+        second = EvaluationMetrics().update(true, true).confusion
+        stacked = metrics_from_confusion(np.stack([first, second]))
+        self.assertAlmostEqual(stacked['accuracy'][0], metrics_from_confusion(first)['accuracy'])
+        self.assertEqual(stacked['macro_f1'][1], 1.0)
+        self.assertEqual(stacked['f1'].shape, (2, 3))
+
+    def test_bootstrap_interval_contains_estimate(self):
+        true, predicted = random_labels(2000, seed=3)
+        metrics = EvaluationMetrics().update(true, predicted)
+        intervals = metrics.bootstrap(n_resamples=500)
+        self.assertEqual(list(intervals.index), ['accuracy', 'macro_f1'] + [f'f1_{l}' for l in SENTIMENT_LABELS])
+        self.assertTrue((intervals['low'] <= intervals['estimate']).all())
+        self.assertTrue((intervals['estimate'] <= intervals['high']).all())
+        # Con 2000 filas el intervalo de la exactitud es de unos ±2 puntos
+        width = intervals.loc['accuracy', 'high'] - intervals.loc['accuracy', 'low']
+        self.assertLess(width, 0.06)
+        pd.testing.assert_frame_equal(intervals, metrics.bootstrap(n_resamples=500))
+
+    def test_bootstrap_needs_rows(self):
+        with self.assertRaises(ValueError):
+            EvaluationMetrics().bootstrap()
+
+    def test_evaluate_chunks_scores_or_uses_predictions(self):
+        df = load_sample_reviews()
+        chunks = [df[i:i + 7] for i in range(0, len(df), 7)]
+        scored = evaluate_chunks(chunks, engine='lexicon')
+        expected = batch_analyze(df, engine='lexicon')['sentiment']
+        np.testing.assert_array_equal(scored.confusion,
+                                      EvaluationMetrics().update(df['true_sentiment'], expected).confusion)
+        given = evaluate_chunks([df.assign(sentiment=df['true_sentiment'])], prediction_column='sentiment')
+        self.assertEqual(given.accuracy, 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
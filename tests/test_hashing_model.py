@@ -0,0 +1,114 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from src import sentiment_model
+from src.hashing_model import HashingSentimentModel, main
+from src.sentiment_model import analyze_sentiment, batch_analyze, configure_scorer, score_texts
+
+POSITIVE = ["great hotel, amazing staff!", "clean and comfortable room", "wonderful stay, lovely view"]
+NEGATIVE = ["dirty room and rude staff", "terrible noisy awful stay", "broken shower, horrible bed"]
+NEUTRAL = ["the room was on the third floor", "we arrived on monday", "the hotel has a lift"]
+
+
+def training_frame(repeat=20):
+    reviews = (POSITIVE + NEGATIVE + NEUTRAL) * repeat
+    labels = (['Positivo'] * 3 + ['Negativo'] * 3 + ['Neutral'] * 3) * repeat
+    return pd.DataFrame({'review': reviews, 'sentiment': labels})
+
+
+def trained_model():
+    model = HashingSentimentModel(n_features=2 ** 12)
+    model.fit_stream([training_frame()], epochs=5)
+    return model
+
+
+class TestHashingSentimentModel(unittest.TestCase):
+    def setUp(self):
+        self.model = trained_model()
+
+    def test_learns_training_labels(self):
+        polarity, sentiment = self.model.predict(POSITIVE + NEGATIVE + NEUTRAL)
+        self.assertEqual(list(sentiment), ['Positivo'] * 3 + ['Negativo'] * 3 + ['Neutral'] * 3)
+        self.assertTrue(np.all(polarity[:3] > 0))
+        self.assertTrue(np.all(polarity[3:6] < 0))
+        self.assertTrue(np.all(np.abs(polarity) <= 1))
+
+    def test_fit_stream_accepts_callable_and_counts_rows(self):
+        model = HashingSentimentModel(n_features=2 ** 12)
+        frame = training_frame(repeat=2)
+        rows = model.fit_stream(lambda: iter([frame[:9], frame[9:]]), epochs=3)
+        self.assertEqual(rows, 3 * len(frame))
+
+    def test_save_and_load_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'model.npz')
+            self.model.save(path)
+            loaded = HashingSentimentModel.load(path)
+        texts = POSITIVE + NEGATIVE + ["not great, not awful"]
+        expected, expected_labels = self.model.predict(texts)
+        polarity, sentiment = loaded.predict(texts)
+        np.testing.assert_allclose(polarity, expected, atol=1e-5)
+        self.assertEqual(list(sentiment), list(expected_labels))
+        self.assertEqual(loaded.coef_.dtype, np.float32)
+        with self.assertRaises(ValueError):
+            loaded.partial_fit(POSITIVE, ['Positivo'] * 3)
+
+    def test_untrained_model_raises(self):
+        with self.assertRaises(ValueError):
+            HashingSentimentModel().predict(["hello"])
+
+    def test_train_cli_uses_teacher_without_labels(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, 'reviews.csv')
+            output = os.path.join(tmp, 'model.npz')
+            pd.DataFrame({'review': POSITIVE + NEGATIVE + [None]}).to_csv(source, index=False)
+            main(['train', source, '--output', output, '--n-features', '4096', '--chunksize', '4'])
+            model = HashingSentimentModel.load(output)
+        self.assertEqual(model.n_features, 4096)
+        self.assertEqual(model.predict(["great hotel, amazing staff!"])[1][0], 'Positivo')
+
+
+class TestHashingScorer(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'model.npz')
+        self.model = trained_model()
+        self.model.save(self.path)
+        self.model_path = sentiment_model.HASHING_MODEL_PATH
+
+    def tearDown(self):
+        configure_scorer('textblob')
+        sentiment_model.HASHING_MODEL_PATH = self.model_path
+        sentiment_model._hashing_model = None
+        self.tmp.cleanup()
+
+    def test_engine_hashing_in_batch(self):
+        sentiment_model.use_hashing_model(self.model)
+        df = pd.DataFrame({'review': POSITIVE + NEGATIVE + POSITIVE})
+        result = batch_analyze(df, engine='hashing')
+        expected, labels = self.model.predict(df['review'])
+        np.testing.assert_allclose(result['polarity'], expected)
+        self.assertEqual(list(result['sentiment']), list(labels))
+
+    def test_configure_scorer_routes_single_and_batch(self):
+        configure_scorer('hashing', model_path=self.path)
+        polarity, sentiment = analyze_sentiment("Dirty room and rude staff")
+        self.assertEqual(sentiment, 'Negativo')
+        self.assertLess(polarity, 0)
+        batch_polarity, batch_sentiment = score_texts(["Dirty room and rude staff"], 'textblob')
+        self.assertAlmostEqual(batch_polarity[0], polarity)
+        self.assertEqual(batch_sentiment[0], sentiment)
+
+    def test_missing_model_raises(self):
+        sentiment_model._hashing_model = None
+        sentiment_model.HASHING_MODEL_PATH = None
+        with self.assertRaises(ValueError):
+            score_texts(["hello"], 'hashing')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+
+import pandas as pd
+
+from src import instrumentation
+from src.instrumentation import Recorder, recording
+from src.sentiment_model import analyze_sentiment, batch_analyze, configure_cache
+
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        configure_cache()
+
+    def test_disabled_by_default(self):
+        recorder = Recorder()
+        analyze_sentiment("Great hotel!")
+        self.assertIsNone(instrumentation.active)
+        self.assertEqual(recorder.as_dict()['stages'], {})
+
+    def test_records_stages_and_cache(self):
+        with recording() as recorder:
+            analyze_sentiment("Great hotel!")
+            analyze_sentiment("great   HOTEL!")
+        self.assertIsNone(instrumentation.active)
+        data = recorder.as_dict()
+        for stage in ('preprocess', 'textblob', 'keywords', 'analyze_sentiment'):
+            self.assertIn(stage, data['stages'])
+        self.assertEqual(data['stages']['preprocess']['calls'], 2)
+        self.assertEqual(data['stages']['textblob']['calls'], 1)
+        self.assertEqual((data['cache']['hits'], data['cache']['misses']), (1, 1))
+        self.assertEqual(data['cache']['hit_rate'], 0.5)
+
+    def test_batch_counters_and_histogram(self):
+        df = pd.DataFrame({'review': ["Nice room", "nice room", "x" * 100, "Dirty and noisy"]})
+        with recording() as recorder:
+            batch_analyze(df, engine='lexicon')
+        data = recorder.as_dict()
+        self.assertEqual(data['counters'], {'rows': 4, 'unique_texts': 3})
+        self.assertIn('pandas', data['stages'])
+        self.assertIn('lexicon_engine', data['stages'])
+        self.assertEqual(data['review_length']['count'], 4)
+        self.assertEqual(data['review_length']['sum'], 9 + 9 + 100 + 15)
+        self.assertEqual(data['review_length']['buckets'][0], (16, 3))
+        self.assertEqual(data['review_length']['buckets'][-1], ('+Inf', 4))
+
+    def test_prometheus_format(self):
+        with recording() as recorder:
+            analyze_sentiment("Comfortable bed")
+        text = recorder.to_prometheus()
+        self.assertIn('# TYPE sentiment_stage_seconds_total counter', text)
+        self.assertIn('sentiment_stage_calls_total{stage="preprocess"} 1', text)
+        self.assertIn('sentiment_review_length_chars_bucket{le="+Inf"} 1', text)
+        self.assertIn('sentiment_cache_hit_ratio 0.0', text)
+        self.assertTrue(text.endswith('\n'))
+
+    def test_nested_recording_restores_previous(self):
+        outer = instrumentation.enable()
+        try:
+            with recording() as inner:
+                self.assertIs(instrumentation.active, inner)
+            self.assertIs(instrumentation.active, outer)
+        finally:
+            self.assertIs(instrumentation.disable(), outer)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,156 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from benchmarks.corpus import make_corpus
+from src import jobs
+from src.jobs import MANIFEST_NAME, plan_shards, run_job
+from src.sentiment_model import batch_analyze
+
+
+def read_outputs(report):
+    return pd.concat([pd.read_parquet(path) for path in report['outputs']], ignore_index=True)
+
+
+class TestPlanShards(unittest.TestCase):
+    def test_ranges_cover_file_and_keep_quoted_newlines(self):
+        df = make_corpus(500)
+        df.loc[::37, 'review'] = 'Two lines,\n"quoted" and\nmore'
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'reviews.csv')
+            df.to_csv(path, index=False)
+            header, ranges = plan_shards(path, shard_bytes=500)
+            self.assertGreater(len(ranges), 10)
+            self.assertEqual(ranges[-1][1], os.path.getsize(path))
+            self.assertTrue(all(a[1] == b[0] for a, b in zip(ranges, ranges[1:])))
+            with open(path, 'rb') as handle:
+                data = handle.read()
+        parts = [pd.read_csv(pd.io.common.BytesIO(header + data[start:end])) for start, end in ranges]
+        pd.testing.assert_frame_equal(pd.concat(parts, ignore_index=True), df)
+
+    def test_header_only_file_has_no_shards(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'empty.csv')
+            with open(path, 'w') as handle:
+                handle.write('review\n')
+            self.assertEqual(plan_shards(path, 100)[1], [])
+
+
+class TestRunJob(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.input = os.path.join(self.tmp.name, 'reviews.csv')
+        self.output = os.path.join(self.tmp.name, 'scored')
+        self.df = make_corpus(3000)
+        self.df.loc[7, 'review'] = None
+        self.df.to_csv(self.input, index=False)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_output_matches_serial_analysis(self):
+        report = run_job(self.input, self.output, shard_bytes=20_000, n_jobs=2)
+        self.assertEqual(report['rows'], len(self.df))
+        self.assertEqual(report['skipped'], 0)
+        self.assertEqual(sum(w['rows'] for w in report['workers'].values()), len(self.df))
+        self.assertTrue(all(w['rows_per_s'] > 0 for w in report['workers'].values()))
+        expected = batch_analyze(self.df.fillna({'review': ''}), engine='lexicon')
+        pd.testing.assert_frame_equal(read_outputs(report), expected)
+        self.assertFalse([n for n in os.listdir(self.output) if n.endswith('.partial')])
+
+    def test_shards_share_one_schema(self):
+        """Un fragmento con una columna vacía o solo numérica no cambia el esquema de su salida."""
+        self.df['hotel'] = [None] * 1500 + ['Hotel Sol'] * 1500
+        self.df['rating'] = ['5'] * 1500 + ['cinco'] * 1500
+        self.df.loc[:1500, 'review'] = ''
+        self.df.to_csv(self.input, index=False)
+        report = run_job(self.input, self.output, shard_bytes=2_000, n_jobs=1)
+        schemas = {pq.read_schema(path) for path in report['outputs']}
+        self.assertEqual(len(schemas), 1)
+        scored = pd.read_parquet(report['outputs'])
+        self.assertEqual(scored['review'].iloc[0], '')
+        self.assertTrue(scored['hotel'].iloc[:1500].isna().all())
+        self.assertEqual(scored['rating'].iloc[0], '5')
+
+    def test_stale_partial_outputs_are_removed(self):
+        run_job(self.input, self.output, shard_bytes=20_000, n_jobs=1)
+        stale = os.path.join(self.output, 'part-00001.parquet.partial')
+        with open(stale, 'wb') as handle:
+            handle.write(b'a medias')
+        report = run_job(self.input, self.output, shard_bytes=20_000, n_jobs=1)
+        self.assertEqual(report['skipped'], report['shards'])
+        self.assertFalse(os.path.exists(stale))
+
+    def test_restart_skips_finished_shards(self):
+        first = run_job(self.input, self.output, shard_bytes=20_000, n_jobs=2)
+        # Simulamos una caída: un fragmento sin terminar y su salida sin publicar
+        manifest_path = os.path.join(self.output, MANIFEST_NAME)
+        with open(manifest_path) as handle:
+            manifest = json.load(handle)
+        manifest['shards'][2]['done'] = False
+        with open(manifest_path, 'w') as handle:
+            json.dump(manifest, handle)
+        os.remove(first['outputs'][3])
+
+        second = run_job(self.input, self.output, shard_bytes=20_000, n_jobs=2)
+        self.assertEqual(second['skipped'], first['shards'] - 2)
+        self.assertEqual(second['rows'], manifest['shards'][2]['rows'] + manifest['shards'][3]['rows'])
+        pd.testing.assert_frame_equal(read_outputs(second), read_outputs(first))
+
+    def test_failed_shard_keeps_finished_work(self):
+        real = jobs._score_shard
+        calls = []
+
+        def flaky(*args):
+            calls.append(args[4])
+            if len(calls) == 3:
+                raise RuntimeError("caída simulada")
+            return real(*args)
+
+        # Con el pool en el mismo proceso todos los fragmentos terminan antes de ver el fallo
+        with mock.patch.object(jobs, 'ProcessPoolExecutor', FakePool), mock.patch.object(jobs, '_score_shard', flaky):
+            with self.assertRaises(RuntimeError):
+                run_job(self.input, self.output, shard_bytes=20_000, n_jobs=1)
+        report = run_job(self.input, self.output, shard_bytes=20_000, n_jobs=1)
+        self.assertEqual(report['skipped'], report['shards'] - 1)
+        self.assertEqual(report['rows'], pd.read_parquet(calls[2]).shape[0])
+        self.assertEqual(len(read_outputs(report)), len(self.df))
+
+    def test_changed_parameters_need_restart(self):
+        run_job(self.input, self.output, shard_bytes=50_000, n_jobs=1)
+        with self.assertRaises(ValueError):
+            run_job(self.input, self.output, shard_bytes=20_000, n_jobs=1)
+        report = run_job(self.input, self.output, shard_bytes=20_000, n_jobs=1, restart=True)
+        self.assertEqual(report['skipped'], 0)
+        self.assertEqual(len(read_outputs(report)), len(self.df))
+
+
+class FakePool:
+    """Pool en el mismo proceso: ejecuta cada tarea al enviarla."""
+
+    def __init__(self, max_workers, initializer, initargs):
+        initializer(*initargs)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def submit(self, fn, *args):
+        from concurrent.futures import Future
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as exc:
+            future.set_exception(exc)
+        return future
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import os
+import tempfile
+import unittest
+
+from src.keyword_matcher import KeywordMatcher, lexicon_entry, load_lexicon
+from src.sentiment_model import calculate_domain_sentiment, get_sentiment_details, preprocess_text
+
+
+class TestKeywordMatcher(unittest.TestCase):
+    def setUp(self):
+        self.matcher = KeywordMatcher(
+            positive={'clean', 'comfortable', 'above and beyond', 'great'},
+            negative={'dirty', 'rude', 'not worth', 'small'},
+            negations={'not', 'never', 'by no means'},
+            negation_scope=3,
+        )
+
+    def match(self, text):
+        return self.matcher.match(preprocess_text(text))
+
+    def test_punctuation_does_not_hide_keywords(self):
+        """'dirty.' y 'rude,' cuentan como 'dirty' y 'rude'."""
+        self.assertEqual(self.match("The room was dirty. Staff rude, sadly"), (set(), {'dirty', 'rude'}))
+
+    def test_multi_word_phrases(self):
+        self.assertEqual(self.match("The staff went above and beyond!"), ({'above and beyond'}, set()))
+        self.assertEqual(self.match("Not worth the price"), (set(), {'not worth'}))
+
+    def test_negation_flips_polarity(self):
+        self.assertEqual(self.match("The room was not clean"), (set(), {'not clean'}))
+        self.assertEqual(self.match("never too small"), ({'never too small'}, set()))
+        self.assertEqual(self.match("by no means comfortable"), (set(), {'by no means comfortable'}))
+        entries = set(self.matcher.entries)
+        self.assertEqual(lexicon_entry('never too small', entries), 'small')
+        self.assertEqual(lexicon_entry('not worth', entries), 'not worth')
+        self.assertIsNone(lexicon_entry('not a room', entries))
+
+    def test_negation_scope_is_limited(self):
+        """La negación solo alcanza unas pocas palabras y no cruza la puntuación."""
+        self.assertEqual(self.match("not a very big but clean room"), ({'clean'}, set()))
+        self.assertEqual(self.match("Not bad. Clean room"), ({'clean'}, set()))
+
+    def test_overlapping_entries(self):
+        matcher = KeywordMatcher({'great', 'great view', 'view of the sea'}, set())
+        positive, _ = matcher.match("great view of the sea")
+        self.assertEqual(positive, {'great', 'great view', 'view of the sea'})
+
+    def test_large_lexicon(self):
+        positive = {f"word{i}" for i in range(5000)} | {f"nice phrase {i}" for i in range(5000)}
+        matcher = KeywordMatcher(positive, set())
+        self.assertEqual(matcher.match("word42 and nice phrase 4999 but nice phrase"),
+                         ({'word42', 'nice phrase 4999'}, set()))
+
+    def test_load_lexicon(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'lexicon.txt')
+            with open(path, 'w', encoding='utf-8') as handle:
+                handle.write("# comentario\nTop-Notch\n\nabove  and beyond  # frase\ndidn't work\n")
+            self.assertEqual(load_lexicon(path, preprocess_text), {'topnotch', 'above and beyond', 'didnt work'})
+
+
+class TestDomainSentimentWithLexicons(unittest.TestCase):
+    def test_shipped_lexicons(self):
+        """Los léxicos incluidos reconocen frases y negaciones."""
+        self.assertEqual(calculate_domain_sentiment("the staff went above and beyond"), 1)
+        self.assertEqual(calculate_domain_sentiment("the bed was not comfortable."), -1)
+        details = get_sentiment_details("Terrible experience. The room was dirty.")
+        self.assertEqual(details['negative_keywords'], ['dirty', 'terrible'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import os
+import random
+import re
+import string
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from src import normalizer
+from src.keyword_matcher import KeywordMatcher, load_lexicon
+from src.lexicon_engine import POLARITY_TOLERANCE
+from src.normalizer import fold_char, normalize_text, normalize_texts
+from src.sentiment_model import batch_analyze, preprocess_text, preprocess_texts
+from tests.evaluate_model import load_sample_reviews
+
+
+def legacy_preprocess(text):
+    """La implementación anterior de ``preprocess_text``."""
+    text = text.lower()
+    text = re.sub(r'[^a-zA-Z0-9\s.,!?]', '', text)
+    return ' '.join(text.split())
+
+
+def random_texts(n, alphabet, seed=0):
+    rng = random.Random(seed)
+    return [''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 40))) for _ in range(n)]
+
+
+class TestNormalizer(unittest.TestCase):
+    def test_ascii_matches_legacy(self):
+        texts = list(load_sample_reviews()['review']) + random_texts(2000, string.printable + '\x1c\x1f\x00')
+        for text in texts:
+            self.assertEqual(normalize_text(text), legacy_preprocess(text), repr(text))
+        self.assertEqual(normalize_texts(texts), [legacy_preprocess(t) for t in texts])
+
+    def test_accents_and_unicode_spaces(self):
+        self.assertEqual(normalize_text("Habitación CÓMODA, ¡genial!"), "habitacion comoda, genial!")
+        self.assertEqual(normalize_text("Niño pequeño　straße ÆON Œuvre"), "nino pequeno strasse aeon oeuvre")
+        # Tildes ya descompuestas (NFD), emojis y otros alfabetos
+        self.assertEqual(normalize_text("café 😀 bueno Отель"), "cafe bueno")
+        # Lo que antes se perdía entero ahora se pliega
+        self.assertEqual(legacy_preprocess("Habitación"), "habitacin")
+        self.assertEqual(fold_char('Ñ'), 'n')
+        self.assertEqual(fold_char(' '), ' ')
+        self.assertEqual(fold_char('€'), '')
+
+    def test_batch_matches_single(self):
+        alphabet = string.ascii_letters + ' .!?\t\n' + 'áéíóúüñÁÉÍÓÚÑ¿¡' + ' ́😀'
+        texts = random_texts(1000, alphabet, seed=1) + ['', '   ', ' ', '¡!']
+        expected = [normalize_text(t) for t in texts]
+        self.assertEqual(normalize_texts(texts), expected)
+        self.assertEqual(normalize_texts(iter(texts)), expected)
+        self.assertEqual(normalize_texts([]), [])
+        # Un texto con el separador del lote obliga a normalizar su bloque uno a uno
+        texts[normalizer.BATCH_SIZE + 3] = 'a\x00b C'
+        self.assertEqual(normalize_texts(texts)[normalizer.BATCH_SIZE + 3], 'ab c')
+        self.assertEqual(preprocess_texts(texts), [preprocess_text(t) for t in texts])
+
+    def test_accented_reviews_and_lexicons(self):
+        self.assertEqual(preprocess_text("La habitación estaba LIMPÍSIMA y muy cómoda. Great location!"),
+                         "la habitacion estaba limpisima y muy comoda. great location!")
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'positive.txt')
+            with open(path, 'w', encoding='utf-8') as handle:
+                handle.write("Limpísima\nmuy cómoda\n")
+            positive = load_lexicon(path, preprocess_text)
+        self.assertEqual(positive, {'limpisima', 'muy comoda'})
+        matcher = KeywordMatcher(positive, set())
+        self.assertEqual(matcher.match(preprocess_text("Limpísima y MUY CÓMODA")),
+                         ({'limpisima', 'muy comoda'}, set()))
+
+    def test_engines_agree_on_accented_text(self):
+        reviews = ["Très propre, great café!", "Habitación dirty and noisy", "Ótimo   staff helpful"]
+        df = pd.DataFrame({'review': reviews})
+        lexicon = batch_analyze(df, engine='lexicon')
+        textblob = batch_analyze(df, engine='textblob')
+        np.testing.assert_allclose(lexicon['polarity'], textblob['polarity'], atol=POLARITY_TOLERANCE)
+        self.assertListEqual(list(lexicon['sentiment']), list(textblob['sentiment']))
+
+
+if __name__ == '__main__':
+    unittest.main()
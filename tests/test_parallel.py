@@ -0,0 +1,83 @@
+import multiprocessing
+import os
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from unittest import mock
+
+import pandas as pd
+
+from src import parallel, sentiment_model
+from src.sentiment_model import batch_analyze
+from src.parallel import parallel_batch_analyze, resolve_n_jobs
+from tests.evaluate_model import load_sample_reviews
+
+
+class TestParallelBatchAnalyze(unittest.TestCase):
+    def setUp(self):
+        reviews = list(load_sample_reviews()['review']) * 4
+        # Índice desordenado para comprobar que se respeta tal cual
+        self.df = pd.DataFrame({'review': reviews, 'id': range(len(reviews))},
+                               index=[f"r{i}" for i in reversed(range(len(reviews)))])
+
+    def test_keeps_order_and_index(self):
+        """Los resultados vuelven en el orden original y con el mismo índice."""
+        serial = batch_analyze(self.df, engine='lexicon')
+        result = parallel_batch_analyze(self.df, n_jobs=2, chunksize=7, min_rows=0)
+        self.assertListEqual(list(result.index), list(self.df.index))
+        self.assertListEqual(list(result['id']), list(self.df['id']))
+        self.assertListEqual(list(result['sentiment']), list(serial['sentiment']))
+        self.assertListEqual(list(result['polarity']), list(serial['polarity']))
+
+    def test_textblob_engine_in_pool(self):
+        serial = batch_analyze(self.df)
+        result = parallel_batch_analyze(self.df, engine='textblob', n_jobs=2, chunksize=25, min_rows=0)
+        self.assertListEqual(list(result['sentiment']), list(serial['sentiment']))
+
+    def test_spawn_workers_use_the_parent_configuration(self):
+        """Con 'spawn' los procesos no heredan léxicos, alcance de negación ni instantánea."""
+        default = batch_analyze(self.df, engine='lexicon', aspects=True)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        positive, aspects = os.path.join(tmp.name, 'positive.txt'), os.path.join(tmp.name, 'aspects.txt')
+        with open(positive, 'w') as handle:
+            handle.write("room\nhotel\n")
+        with open(aspects, 'w') as handle:
+            handle.write("estancia: hotel, stay\n")
+        snapshot = sentiment_model.get_pattern_lexicon()
+        snapshot.words = {**snapshot.words, 'great': (-1.0,) + snapshot.words['great'][1:]}
+        snapshot.save(os.path.join(tmp.name, 'snapshot.json'))
+
+        scope = sentiment_model.NEGATION_SCOPE
+        self.addCleanup(sentiment_model.configure_scorer, sentiment_model.SCORER)
+        self.addCleanup(sentiment_model.configure_lexicons, negation_scope=scope)
+        self.addCleanup(sentiment_model.load_aspect_lexicon)
+        self.addCleanup(sentiment_model.load_keyword_lexicons)
+        sentiment_model.load_keyword_lexicons(positive_path=positive)
+        sentiment_model.load_aspect_lexicon(aspects)
+        sentiment_model.configure_lexicons(negation_scope=1)
+        sentiment_model.configure_scorer('snapshot', snapshot_path=os.path.join(tmp.name, 'snapshot.json'))
+
+        serial = batch_analyze(self.df, engine='lexicon', aspects=True)
+        self.assertIn('aspect_estancia', serial.columns)
+        self.assertFalse(serial['polarity'].equals(default['polarity']))
+        spawn = partial(ProcessPoolExecutor, mp_context=multiprocessing.get_context('spawn'))
+        with mock.patch.object(parallel, 'ProcessPoolExecutor', spawn):
+            result = parallel_batch_analyze(self.df, n_jobs=2, chunksize=60, min_rows=0, aspects=True)
+        pd.testing.assert_frame_equal(result, serial)
+
+    def test_small_input_runs_serially(self):
+        """Con pocas filas no merece la pena arrancar procesos."""
+        result = parallel_batch_analyze(self.df, n_jobs=4, chunksize=10)
+        self.assertEqual(len(result), len(self.df))
+        self.assertIn('polarity', result.columns)
+
+    def test_resolve_n_jobs(self):
+        self.assertEqual(resolve_n_jobs(3), 3)
+        self.assertEqual(resolve_n_jobs(None), 1)
+        self.assertGreaterEqual(resolve_n_jobs(-1), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
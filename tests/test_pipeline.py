@@ -0,0 +1,56 @@
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+
+from src.data_loader import iter_reviews
+from src.pipeline import analyze_stream
+from src.sentiment_model import batch_analyze
+from tests.evaluate_model import load_sample_reviews
+
+try:
+    import pyarrow  # noqa: F401
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+
+class TestStreamingPipeline(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.input_path = os.path.join(self.tmp.name, 'reviews.csv')
+        self.df = load_sample_reviews()
+        self.df.to_csv(self.input_path, index=False)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_iter_reviews_chunks(self):
+        """El cargador entrega trozos acotados que juntos son el fichero entero."""
+        chunks = list(iter_reviews(self.input_path, chunksize=7))
+        self.assertTrue(all(len(c) <= 7 for c in chunks))
+        self.assertEqual(sum(len(c) for c in chunks), len(self.df))
+
+    def test_stream_to_csv(self):
+        """Analizar en streaming da lo mismo que analizar todo de golpe."""
+        output_path = os.path.join(self.tmp.name, 'scored.csv')
+        rows = analyze_stream(self.input_path, output_path, chunksize=7)
+        self.assertEqual(rows, len(self.df))
+        streamed = pd.read_csv(output_path)
+        expected = batch_analyze(self.df)
+        self.assertListEqual(list(streamed.columns), list(expected.columns))
+        self.assertListEqual(list(streamed['sentiment']), list(expected['sentiment']))
+        self.assertListEqual(list(streamed['review']), list(expected['review']))
+
+    @unittest.skipUnless(HAS_PYARROW, "pyarrow no está instalado")
+    def test_stream_to_parquet(self):
+        output_path = os.path.join(self.tmp.name, 'scored.parquet')
+        analyze_stream(self.input_path, output_path, chunksize=4)
+        streamed = pd.read_parquet(output_path)
+        self.assertEqual(len(streamed), len(self.df))
+        self.assertListEqual(list(streamed['sentiment']), list(batch_analyze(self.df)['sentiment']))
+
+
+if __name__ == '__main__':
+    unittest.main()
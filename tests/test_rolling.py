@@ -0,0 +1,139 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.corpus import make_corpus
+from src.rolling import RollingSummary
+from src.sentiment_model import SENTIMENT_LABELS, batch_sentiment_details
+from tests.test_compact import load_large_lexicon
+
+
+def scored_reviews(n_rows=600, seed=0):
+    df = make_corpus(n_rows, seed)
+    rng = np.random.default_rng(seed)
+    df['hotel'] = rng.choice(['Hotel Sol', 'Hotel Mar', 'Hotel Luna'], n_rows)
+    df['date'] = pd.Timestamp('2024-03-01') + pd.to_timedelta(rng.integers(0, 40 * 24 * 60, n_rows), unit='min')
+    return batch_sentiment_details(df, engine='lexicon')
+
+
+class TestRollingSummary(unittest.TestCase):
+    def setUp(self):
+        self.scored = scored_reviews()
+
+    def assert_same(self, left, right):
+        pd.testing.assert_frame_equal(left.to_frame(), right.to_frame())
+        np.testing.assert_array_equal(left.positive_keywords[:len(left)][self.order(left, right)],
+                                      right.positive_keywords[:len(right)])
+        np.testing.assert_array_equal(left.negative_keywords[:len(left)][self.order(left, right)],
+                                      right.negative_keywords[:len(right)])
+
+    @staticmethod
+    def order(left, right):
+        # Fila de ``left`` para cada clave de ``right``
+        return [left._slots[key] for key in right._keys]
+
+    def test_matches_pandas_groupby(self):
+        for window, freq in (('day', 'D'), ('week', 'W-SUN')):
+            summary = RollingSummary(window).update(self.scored)
+            frame = summary.to_frame()
+            windows = self.scored['date'].dt.to_period(freq).dt.start_time if window == 'week' \
+                else self.scored['date'].dt.floor('D')
+            grouped = self.scored.groupby(['hotel', windows])
+            expected = grouped['polarity'].agg(['count', 'mean', lambda p: p.std(ddof=0)])
+            self.assertEqual(frame['reviews'].tolist(), expected['count'].tolist())
+            np.testing.assert_allclose(frame['mean_polarity'], expected['mean'])
+            np.testing.assert_allclose(frame['std_polarity'], expected['<lambda_0>'], atol=1e-9)
+            counts = grouped['sentiment'].value_counts().unstack(fill_value=0)
+            counts = counts.reindex(columns=SENTIMENT_LABELS, fill_value=0)
+            for label in SENTIMENT_LABELS:
+                self.assertEqual(frame[label].tolist(), counts[label].tolist())
+
+    def test_weeks_start_on_monday(self):
+        summary = RollingSummary('week')
+        for day in ('2024-03-04', '2024-03-07 23:59', '2024-03-10'):
+            self.assertEqual(summary.window_of(day), np.datetime64('2024-03-04'))
+        self.assertEqual(summary.window_of('2024-03-11'), np.datetime64('2024-03-11'))
+
+    def test_add_one_at_a_time_matches_update(self):
+        batch = RollingSummary().update(self.scored)
+        single = RollingSummary()
+        for row in self.scored.itertuples():
+            single.add(row.hotel, row.date, row.polarity, row.sentiment,
+                       row.positive_keywords, row.negative_keywords)
+        self.assert_same(single, batch)
+
+    def test_chunks_and_merge_match_whole(self):
+        whole = RollingSummary().update(self.scored)
+        chunked = RollingSummary()
+        for start in range(0, len(self.scored), 97):
+            chunked.update(self.scored.iloc[start:start + 97])
+        self.assert_same(chunked, whole)
+        merged = RollingSummary().update(self.scored.iloc[::2]).merge(RollingSummary().update(self.scored.iloc[1::2]))
+        self.assert_same(merged, whole)
+        with self.assertRaises(ValueError):
+            merged.merge(RollingSummary('week'))
+
+    def test_compact_masks_match_lists(self):
+        df = self.scored.drop(columns=['polarity', 'sentiment', 'positive_keywords', 'negative_keywords'])
+        compact = batch_sentiment_details(df, engine='lexicon', compact=True)
+        self.assert_same(RollingSummary().update(compact), RollingSummary().update(self.scored))
+        self.assertGreater(RollingSummary().update(compact).negative_keywords.sum(), 0)
+
+    def test_compact_positions_match_lists(self):
+        """Con más de 64 entradas el formato compacto lleva posiciones en lugar de máscaras."""
+        load_large_lexicon(self)
+        scored = batch_sentiment_details(self.scored.drop(columns=['polarity', 'sentiment', 'positive_keywords',
+                                                                    'negative_keywords']), engine='lexicon')
+        df = scored.drop(columns=['polarity', 'sentiment', 'positive_keywords', 'negative_keywords'])
+        compact = batch_sentiment_details(df, engine='lexicon', compact=True)
+        self.assertEqual(compact['positive_keywords'].dtype, object)
+        self.assert_same(RollingSummary().update(compact), RollingSummary().update(scored))
+        self.assertGreater(RollingSummary().update(compact).positive_keywords.sum(), 0)
+
+    def test_negated_phrasings_do_not_grow_the_index(self):
+        """Las palabras entre la negación y la entrada no quedan guardadas en el resumen."""
+        summary = RollingSummary()
+        size = len(summary._keyword_index)
+        for i in range(500):
+            summary.add('Hotel Sol', '2024-03-01', -0.5, 'Negativo', negative_keywords=[f'not word{i} comfortable'])
+        summary.add('Hotel Sol', '2024-03-01', 0.0, 'Neutral', positive_keywords=['unknown phrase'])
+        self.assertEqual(len(summary._keyword_index), size)
+        self.assertEqual(summary.current('Hotel Sol')['negative_keywords'], {'comfortable': 500})
+
+    def test_current_and_get(self):
+        summary = RollingSummary().update(self.scored)
+        sol = self.scored[self.scored['hotel'] == 'Hotel Sol']
+        last = sol['date'].max()
+        current = summary.current('Hotel Sol')
+        self.assertEqual(current['window'], np.datetime64(last.floor('D').date()))
+        same_day = sol[sol['date'].dt.floor('D') == last.floor('D')]
+        self.assertEqual(current['reviews'], len(same_day))
+        self.assertAlmostEqual(current['mean_polarity'], same_day['polarity'].mean())
+        self.assertEqual(summary.get('Hotel Sol', last), current)
+        self.assertIsNone(summary.get('Hotel Sol', '2023-01-01'))
+        self.assertIsNone(summary.current('Hotel Nuevo'))
+
+        # Una reseña de un día anterior no cambia la ventana actual
+        summary.add('Hotel Sol', '2024-01-01', 0.5, 'Positivo', ['friendly'], ['not dirty'])
+        self.assertEqual(summary.current('Hotel Sol')['window'], current['window'])
+        old = summary.get('Hotel Sol', pd.Timestamp('2024-01-01 10:00', tz='UTC'))
+        self.assertEqual(old['labels']['Positivo'], 1)
+        self.assertEqual(old['positive_keywords'], {'friendly': 1})
+        self.assertEqual(old['negative_keywords'], {'dirty': 1})
+
+    def test_missing_dates_and_hotels(self):
+        scored = self.scored.head(5).copy()
+        scored.loc[scored.index[0], 'date'] = None
+        with self.assertRaises(ValueError):
+            RollingSummary().update(scored)
+        with self.assertRaises(ValueError):
+            RollingSummary().update(self.scored.head(5).assign(hotel=None))
+        with self.assertRaises(ValueError):
+            RollingSummary().add('Hotel Sol', None, 0.0, 'Neutral')
+        with self.assertRaises(ValueError):
+            RollingSummary(window='month')
+
+
+if __name__ == '__main__':
+    unittest.main()
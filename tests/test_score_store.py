@@ -0,0 +1,77 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+from src import sentiment_model
+from src.sentiment_model import batch_analyze
+from src.score_store import ScoreStore, model_version
+from tests.evaluate_model import load_sample_reviews
+
+
+class TestScoreStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'scores.sqlite')
+        reviews = list(load_sample_reviews()['review'])
+        # Con duplicados, para comprobar que se cuentan por fila
+        self.df = pd.DataFrame({'review': reviews + reviews[:5]})
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_rerun_reuses_everything(self):
+        """La segunda ejecución no analiza nada y da el mismo resultado."""
+        with ScoreStore(self.path) as store:
+            first = batch_analyze(self.df, store=store)
+            self.assertEqual(first.attrs['score_store'], {'reused': 0, 'scored': len(self.df)})
+        with ScoreStore(self.path) as store:
+            second = batch_analyze(self.df, store=store)
+            self.assertEqual(second.attrs['score_store'], {'reused': len(self.df), 'scored': 0})
+        expected = batch_analyze(self.df)
+        self.assertListEqual(list(second['sentiment']), list(expected['sentiment']))
+        self.assertListEqual(list(second['polarity']), list(expected['polarity']))
+
+    def test_only_new_reviews_are_scored(self):
+        with ScoreStore(self.path) as store:
+            batch_analyze(self.df.head(10), store=store)
+            result = batch_analyze(self.df.head(12), store=store)
+            self.assertEqual(result.attrs['score_store'], {'reused': 10, 'scored': 2})
+            self.assertEqual((store.reused, store.scored), (10, 12))
+
+    def test_missing_review_raises(self):
+        """Una reseña NaN/None no se queda con la puntuación de otra."""
+        df = pd.DataFrame({'review': ["Great hotel", None, "Dirty and noisy room"]})
+        with self.assertRaises(TypeError):
+            batch_analyze(df)
+        with ScoreStore(self.path) as store:
+            with self.assertRaises(TypeError):
+                batch_analyze(df, store=store)
+            self.assertEqual(len(store), 0)
+            result = batch_analyze(df.fillna(''), store=store)
+        self.assertListEqual(list(result['polarity']), list(batch_analyze(df.fillna(''))['polarity']))
+
+    def test_invalidates_when_config_changes(self):
+        """Cambiar palabras clave o pesos invalida lo guardado."""
+        with ScoreStore(self.path) as store:
+            batch_analyze(self.df, store=store)
+        keywords = sentiment_model.HOTEL_POSITIVE_KEYWORDS | {'memorable'}
+        with mock.patch.object(sentiment_model, 'HOTEL_POSITIVE_KEYWORDS', keywords):
+            with ScoreStore(self.path) as store:
+                self.assertEqual(len(store), 0)
+                result = batch_analyze(self.df, store=store)
+                self.assertEqual(result.attrs['score_store']['reused'], 0)
+
+    def test_model_version_tracks_weights_and_thresholds(self):
+        version = model_version()
+        with mock.patch.object(sentiment_model, 'TEXTBLOB_WEIGHT', 0.8):
+            self.assertNotEqual(model_version(), version)
+        with mock.patch.object(sentiment_model, 'POSITIVE_THRESHOLD', 0.3):
+            self.assertNotEqual(model_version(), version)
+        self.assertEqual(model_version(), version)
+
+
+if __name__ == '__main__':
+    unittest.main()
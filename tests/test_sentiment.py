@@ -1,5 +1,5 @@
 import unittest
-from src.sentiment_model import analyze_sentiment, batch_analyze, get_sentiment_details
+from src.sentiment_model import analyze_sentiment, batch_analyze, batch_sentiment_details, get_sentiment_details
 import pandas as pd
 
 class TestSentimentAnalyzer(unittest.TestCase):
@@ -86,6 +86,20 @@ class TestSentimentAnalyzer(unittest.TestCase):
         self.assertGreater(len(details['positive_keywords']), 0, "No se detectaron palabras clave positivas.")
         # ¿La confianza está en el rango correcto?
         self.assertTrue(0 <= details['confidence'] <= 1, "La confianza está fuera de rango.")
+        # ¿Coincide con el análisis simple?
+        self.assertEqual((details['polarity'], details['sentiment']), analyze_sentiment(review))
+
+    def test_batch_sentiment_details(self):
+        """El detalle por lotes debe dar lo mismo que get_sentiment_details fila a fila."""
+        df = pd.DataFrame({'review': self.hotel_reviews + self.hotel_reviews[:2]})
+        for engine in ('textblob', 'lexicon'):
+            result_df = batch_sentiment_details(df, engine=engine)
+            for (_, row), review in zip(result_df.iterrows(), df['review']):
+                details = get_sentiment_details(review)
+                for key in ('sentiment', 'positive_keywords', 'negative_keywords'):
+                    self.assertEqual(row[key], details[key], f"'{key}' no coincide para: '{review}'")
+                self.assertAlmostEqual(row['polarity'], details['polarity'])
+                self.assertAlmostEqual(row['confidence'], details['confidence'])
 
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
@@ -0,0 +1,116 @@
+import asyncio
+import json
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from src.sentiment_model import analyze_sentiment, score_texts
+from src.service import MicroBatcher, ScoringClient, ServiceOverloaded, start_server
+
+REVIEWS = ["Great hotel!", "Dirty room and rude staff.", "It was ok", "great hotel!", "Not comfortable"]
+
+
+class TestMicroBatcher(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrent_requests_share_batches(self):
+        async with MicroBatcher(max_batch_size=64, max_wait=0.05) as batcher:
+            results = await asyncio.gather(*(batcher.score(text) for text in REVIEWS * 20))
+        self.assertEqual(len(results), 100)
+        for text, (polarity, sentiment) in zip(REVIEWS * 20, results):
+            expected_polarity, expected_sentiment = analyze_sentiment(text)
+            self.assertAlmostEqual(polarity, expected_polarity, places=9)
+            self.assertEqual(sentiment, expected_sentiment)
+        metrics = batcher.metrics()
+        self.assertEqual(metrics['requests'], 100)
+        self.assertLessEqual(metrics['batches'], 4)
+        self.assertGreater(metrics['mean_batch_size'], 20)
+        self.assertIsNotNone(metrics['latency_p99_ms'])
+
+    async def test_rejects_when_queue_is_full(self):
+        def slow_score(texts, engine):
+            time.sleep(0.2)
+            return score_texts(texts, engine)
+
+        with mock.patch('src.service.score_texts', side_effect=slow_score):
+            async with MicroBatcher(max_batch_size=1, max_wait=0, max_queue=1) as batcher:
+                results = await asyncio.gather(*(batcher.score(text, timeout=0.05) for text in REVIEWS),
+                                               return_exceptions=True)
+        rejected = [r for r in results if isinstance(r, ServiceOverloaded)]
+        self.assertTrue(rejected)
+        self.assertEqual(batcher.metrics()['rejected'], len(rejected))
+
+    async def test_invalid_engine(self):
+        with self.assertRaises(ValueError):
+            MicroBatcher(engine='magia')
+
+
+class TestScoringService(unittest.IsolatedAsyncioTestCase):
+    async def _roundtrip(self, server, **connect_kwargs):
+        async with server:
+            async with await ScoringClient.connect(**connect_kwargs) as client:
+                results = await asyncio.gather(*(client.score(text) for text in REVIEWS))
+                metrics = await client.metrics()
+        self.assertEqual([s for _, s in results], [analyze_sentiment(t)[1] for t in REVIEWS])
+        self.assertEqual(metrics['requests'], len(REVIEWS))
+
+    async def test_tcp(self):
+        server = await start_server(MicroBatcher(max_wait=0.01), port=0)
+        port = server.sockets[0].getsockname()[1]
+        await self._roundtrip(server, port=port)
+
+    @unittest.skipUnless(hasattr(asyncio, 'start_unix_server') and os.name == 'posix', "sin sockets Unix")
+    async def test_unix_socket(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'sentiment.sock')
+            server = await start_server(MicroBatcher(max_wait=0.01), path=path)
+            await self._roundtrip(server, path=path)
+
+    async def test_bad_request(self):
+        server = await start_server(MicroBatcher(), port=0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(b'not json\n{"id": 7}\n')
+            await writer.drain()
+            responses = {await reader.readline(), await reader.readline()}
+            writer.close()
+        self.assertEqual(responses, {b'{"error": "invalid_json"}\n', b'{"id": 7, "error": "missing_text"}\n'})
+
+    async def test_request_too_large_keeps_connection(self):
+        server = await start_server(MicroBatcher(max_wait=0.01), port=0, max_request_bytes=1_000)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            huge = json.dumps({'id': 9, 'text': 'great ' * 50_000}).encode()
+            writer.write(huge + b'\n' + b'x' * 5_000 + b'\n{"id": 10, "text": "Great hotel!"}\n')
+            await writer.drain()
+            responses = [json.loads(await reader.readline()) for _ in range(3)]
+            writer.close()
+            self.assertIn({'id': 9, 'error': 'request_too_large'}, responses)
+            self.assertIn({'id': None, 'error': 'request_too_large'}, responses)
+            self.assertIn('Positivo', [r.get('sentiment') for r in responses if r['id'] == 10])
+            # El cliente recibe el error de su petición y la conexión sigue viva
+            async with await ScoringClient.connect(port=port) as client:
+                with self.assertRaisesRegex(ValueError, 'request_too_large'):
+                    await client.score('great ' * 1_000)
+                self.assertEqual((await client.score("Great hotel!"))[1], 'Positivo')
+
+    async def test_scoring_failure_gets_an_error_response(self):
+        server = await start_server(MicroBatcher(max_wait=0.01), port=0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            async with await ScoringClient.connect(port=port) as client:
+                with mock.patch('src.service.score_texts', side_effect=RuntimeError("léxico roto")):
+                    with self.assertRaisesRegex(ValueError, 'scoring_failed'):
+                        await asyncio.wait_for(client.score("Great hotel!"), 5)
+                self.assertEqual((await client.score("Great hotel!"))[1], 'Positivo')
+
+    async def test_engine_that_cannot_score_fails_at_start(self):
+        with mock.patch('src.service.score_texts', side_effect=ValueError("No hay modelo hashing")):
+            with self.assertRaisesRegex(ValueError, 'hashing'):
+                await start_server(MicroBatcher(engine='hashing'), port=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import json
+import os
+import subprocess
+import sys
+import unittest
+from unittest import mock
+
+from textblob import TextBlob
+
+from src import sentiment_model
+from src.lexicon_snapshot import PatternLexicon
+from src.sentiment_model import configure_scorer, preprocess_text
+from tests.evaluate_model import load_sample_reviews
+from tests.test_lexicon_engine import synthetic_reviews
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Presupuesto de arranque en frío: importar el modelo y puntuar la primera reseña
+COLD_START_BUDGET = 0.5
+
+COLD_START_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+from src.sentiment_model import analyze_sentiment, configure_scorer
+configure_scorer('snapshot')
+analyze_sentiment('Great hotel, friendly staff!')
+print(json.dumps({
+    'seconds': time.perf_counter() - start,
+    'loaded': [m for m in ('pandas', 'numpy', 'textblob', 'nltk') if m in sys.modules],
+}))
+"""
+
+
+class TestLexiconSnapshot(unittest.TestCase):
+    def test_snapshot_is_up_to_date(self):
+        """Si falla, regenera la instantánea con ``python -m src.lexicon_snapshot``."""
+        snapshot = PatternLexicon.load()
+        live = PatternLexicon.from_textblob()
+        self.assertEqual(snapshot.textblob_version, live.textblob_version)
+        self.assertEqual(snapshot.words, live.words)
+        self.assertEqual(snapshot.emoticons, live.emoticons)
+        self.assertEqual(snapshot.negations, live.negations)
+
+    def test_matches_textblob(self):
+        lexicon = PatternLexicon.load()
+        extra = ["The U.S. hotel was nice!", "wow o.o!!", "really not good... e.g. awful", ""]
+        texts = list(load_sample_reviews()['review']) + synthetic_reviews(2000) + extra
+        for text in map(preprocess_text, texts):
+            self.assertEqual(lexicon.polarity(text), TextBlob(text).sentiment.polarity, text)
+
+
+class TestColdStart(unittest.TestCase):
+    def test_single_text_path_within_budget(self):
+        """Puntuar una reseña no debe importar pandas ni TextBlob y cabe en el presupuesto."""
+        output = subprocess.run([sys.executable, '-c', COLD_START_SCRIPT], cwd=ROOT, check=True,
+                                capture_output=True, text=True).stdout
+        result = json.loads(output)
+        self.assertEqual(result['loaded'], [])
+        self.assertLess(result['seconds'], COLD_START_BUDGET)
+
+
+class TestStreamlitApp(unittest.TestCase):
+    def tearDown(self):
+        configure_scorer('textblob')
+
+    def test_analyzer_is_loaded_once(self):
+        """El analizador se prepara en la primera ejecución y no en cada interacción."""
+        import streamlit as st
+        from streamlit.testing.v1 import AppTest
+
+        st.cache_resource.clear()
+        with mock.patch('src.lexicon_snapshot.PatternLexicon.load', wraps=PatternLexicon.load) as load, \
+                mock.patch('src.sentiment_model.configure_scorer') as configure:
+            app = AppTest.from_file(os.path.join(ROOT, 'streamlit_app.py')).run(timeout=30)
+            self.assertFalse(app.exception)
+            app.text_area[0].input("Great hotel, lovely staff!")
+            app.button[0].click().run(timeout=30)
+        self.assertIn('Positivo', app.success[0].value)
+        self.assertIn(f"{sentiment_model.analyze_sentiment('Great hotel, lovely staff!')[0]:.2f}", app.info[0].value)
+        load.assert_called_once_with()
+        # La instantánea es del analizador de la app, no de todo el proceso
+        configure.assert_not_called()
+        self.assertEqual(sentiment_model.SCORER, 'textblob')
+
+    def test_bulk_upload_mode_renders(self):
+        from streamlit.testing.v1 import AppTest
+
+        app = AppTest.from_file(os.path.join(ROOT, 'streamlit_app.py')).run(timeout=30)
+        app.radio[0].set_value("Un archivo CSV").run(timeout=30)
+        self.assertFalse(app.exception)
+        self.assertEqual(len(app.text_area), 0)
+
+    def test_upload_results_are_removed_on_failure(self):
+        """Un análisis que falla a medias no deja ficheros temporales."""
+        import importlib
+        import io
+        import tempfile
+
+        import streamlit as st
+
+        class Upload(io.BytesIO):
+            size = 64
+
+        def failing(*args, **kwargs):
+            original(*args, **kwargs)
+            raise RuntimeError("fallo a mitad")
+
+        original = sentiment_model.batch_sentiment_details
+        with tempfile.TemporaryDirectory() as tmp, mock.patch.object(tempfile, 'tempdir', tmp):
+            app = importlib.import_module('streamlit_app')
+            with mock.patch.object(sentiment_model, 'batch_sentiment_details', failing), \
+                    self.assertRaises(RuntimeError):
+                app.score_upload(Upload(b'review\nGreat hotel\n'), 'review', st.empty())
+            self.assertEqual(os.listdir(tmp), [])
+            summary, results, output_path = app.score_upload(Upload(b'review\nGreat hotel\n'), 'review',
+                                                             st.empty())
+            self.assertEqual(summary.rows, 1)
+            self.assertTrue(os.path.exists(output_path))
+            results.cleanup()
+            self.assertEqual(os.listdir(tmp), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from src.pipeline import analyze_chunks
+from src.sentiment_model import batch_analyze, batch_sentiment_details, get_keyword_matcher
+from src.summary import SentimentSummary
+from tests.evaluate_model import load_sample_reviews
+
+
+class TestSentimentSummary(unittest.TestCase):
+    def setUp(self):
+        self.df = pd.concat([load_sample_reviews()] * 5, ignore_index=True)
+        self.scored = batch_sentiment_details(self.df, engine='lexicon')
+
+    def test_chunked_updates_match_one_pass(self):
+        whole = SentimentSummary().update(self.scored)
+        chunked = SentimentSummary()
+        chunks = [self.df.iloc[i:i + 7] for i in range(0, len(self.df), 7)]
+        for scored in analyze_chunks(chunks, engine='lexicon', details=True):
+            chunked.update(scored)
+        self.assertEqual(chunked.rows, len(self.df))
+        self.assertEqual(chunked.label_counts, whole.label_counts)
+        np.testing.assert_array_equal(chunked.histogram, whole.histogram)
+        self.assertEqual(chunked.positive_keywords, whole.positive_keywords)
+        self.assertEqual(chunked.negative_keywords, whole.negative_keywords)
+        self.assertAlmostEqual(chunked.mean_polarity, self.scored['polarity'].mean())
+
+    def test_aggregates(self):
+        summary = SentimentSummary(bins=4).update(self.scored)
+        self.assertEqual(summary.histogram.sum(), len(self.df))
+        self.assertEqual(sum(summary.label_counts.values()), len(self.df))
+        self.assertEqual(summary.label_counts, self.scored['sentiment'].value_counts().to_dict())
+        top = summary.top_keywords(2)
+        self.assertListEqual(list(top.columns), ['keyword', 'count', 'kind'])
+        self.assertLessEqual(len(top), 4)
+        self.assertEqual(len(summary.histogram_frame()), 4)
+
+    def test_without_keyword_columns(self):
+        summary = SentimentSummary().update(batch_analyze(self.df, engine='lexicon'))
+        self.assertEqual(summary.rows, len(self.df))
+        self.assertEqual(len(summary.positive_keywords), 0)
+
+    def test_negated_phrasings_are_counted_by_entry(self):
+        """Las palabras entre la negación y la entrada no crean claves nuevas."""
+        reviews = [f"The room was not {word} comfortable" for word in ('really', 'at all', 'so', 'very')]
+        reviews += [f"never word{i} great" for i in range(300)]
+        scored = batch_sentiment_details(pd.DataFrame({'review': reviews}), engine='lexicon')
+        summary = SentimentSummary().update(scored)
+        self.assertEqual(dict(summary.negative_keywords), {'comfortable': 4, 'great': 300})
+        lexicon = set(get_keyword_matcher().entries)
+        self.assertLessEqual(set(summary.positive_keywords) | set(summary.negative_keywords), lexicon)
+
+    def test_compact_columns(self):
+        df = self.df.drop(columns=[c for c in self.scored.columns if c not in self.df.columns], errors='ignore')
+        compact = batch_sentiment_details(df, engine='lexicon', compact=True)
+        whole = SentimentSummary().update(self.scored)
+        self.assertEqual(SentimentSummary().update(compact).negative_keywords, whole.negative_keywords)
+        self.assertEqual(SentimentSummary().update(compact).positive_keywords, whole.positive_keywords)
+
+    def test_merge(self):
+        half = len(self.scored) // 2
+        merged = SentimentSummary().update(self.scored.iloc[:half])
+        merged.merge(SentimentSummary().update(self.scored.iloc[half:]))
+        whole = SentimentSummary().update(self.scored)
+        self.assertEqual(merged.label_counts, whole.label_counts)
+        np.testing.assert_array_equal(merged.histogram, whole.histogram)
+        with self.assertRaises(ValueError):
+            merged.merge(SentimentSummary(bins=5))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from src.parallel import parallel_batch_analyze
+from src.sentiment_model import (
+    analyze_sentiment,
+    batch_analyze,
+    configure_model,
+    load_model_config,
+    model_config,
+    save_model_config,
+)
+from tests.evaluate_model import best_config, evaluate_model, load_sample_reviews, sweep_configs
+
+
+class TestComponentScores(unittest.TestCase):
+    def setUp(self):
+        self.df = load_sample_reviews()
+
+    def test_components_recombine_to_polarity(self):
+        for engine in ('textblob', 'lexicon'):
+            result = batch_analyze(self.df, engine=engine, components=True)
+            plain = batch_analyze(self.df, engine=engine)
+            np.testing.assert_allclose(result['polarity'], plain['polarity'], atol=1e-9)
+            self.assertEqual(list(result['sentiment']), list(plain['sentiment']))
+            np.testing.assert_allclose(
+                0.9 * result['textblob_polarity'] + 0.1 * result['domain_polarity'], result['polarity'])
+
+    def test_parallel_components_match_serial(self):
+        serial = batch_analyze(self.df, engine='lexicon', components=True)
+        parallel = parallel_batch_analyze(self.df, engine='lexicon', n_jobs=2, chunksize=10,
+                                          min_rows=0, components=True)
+        pd.testing.assert_frame_equal(serial, parallel)
+
+    def test_hashing_has_no_components(self):
+        with self.assertRaises(ValueError):
+            batch_analyze(self.df, engine='hashing', components=True)
+
+
+class TestModelConfig(unittest.TestCase):
+    def setUp(self):
+        self.original = model_config()
+
+    def tearDown(self):
+        configure_model(**self.original)
+
+    def test_configure_changes_single_and_batch_labels(self):
+        text = "The hotel was nice."
+        self.assertEqual(analyze_sentiment(text)[1], 'Positivo')
+        configure_model(positive_threshold=0.9)
+        self.assertEqual(analyze_sentiment(text)[1], 'Neutral')
+        frame = pd.DataFrame({'review': [text]})
+        self.assertEqual(batch_analyze(frame, engine='lexicon')['sentiment'][0], 'Neutral')
+
+    def test_rejects_crossed_thresholds(self):
+        with self.assertRaises(ValueError):
+            configure_model(positive_threshold=-0.5)
+        self.assertEqual(model_config(), self.original)
+
+    def test_save_and_load_round_trip(self):
+        config = {'textblob_weight': 0.6, 'domain_weight': 0.4,
+                  'positive_threshold': 0.3, 'negative_threshold': -0.2}
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'config.json')
+            save_model_config(path, config)
+            load_model_config(path)
+        self.assertEqual(model_config(), config)
+
+
+class TestSweep(unittest.TestCase):
+    def setUp(self):
+        self.df = load_sample_reviews()
+        self.original = model_config()
+
+    def tearDown(self):
+        configure_model(**self.original)
+
+    def test_matches_direct_evaluation(self):
+        weights = [[0.9, 0.1], [0.5, 0.5], [1.0, 0.0]]
+        thresholds = [[0.25, -0.25], [0.1, -0.1], [0.4, -0.05]]
+        # max_cells pequeño para recorrer las reseñas en varios bloques
+        sweep = sweep_configs(self.df, weights, thresholds, engine='lexicon', max_cells=20)
+        self.assertEqual(len(sweep['results']), 9)
+        for i, row in sweep['results'].iterrows():
+            configure_model(**{k: row[k] for k in ('textblob_weight', 'domain_weight',
+                                                   'positive_threshold', 'negative_threshold')})
+            expected = evaluate_model(self.df, engine='lexicon')
+            self.assertAlmostEqual(row['accuracy'], expected['accuracy'])
+            np.testing.assert_array_equal(sweep['confusion_matrices'][i], expected['confusion_matrix'])
+            for label, metrics in expected['metrics'].items():
+                self.assertAlmostEqual(row[f'f1_{label}'], metrics['F1 Score'])
+
+    def test_best_config_is_applicable(self):
+        sweep = sweep_configs(self.df, engine='lexicon')
+        self.assertGreater(len(sweep['results']), 1000)
+        best = best_config(sweep)
+        self.assertEqual(sweep['results']['accuracy'].max(),
+                         sweep['results'].loc[(sweep['results'][list(best)] == pd.Series(best)).all(axis=1),
+                                              'accuracy'].iloc[0])
+        configure_model(**best)
+        self.assertEqual(model_config(), best)
+
+    def test_rejects_unknown_labels(self):
+        df = self.df.assign(true_sentiment='Mixto')
+        with self.assertRaises(ValueError):
+            sweep_configs(df, engine='lexicon')
+
+
+if __name__ == '__main__':
+    unittest.main()